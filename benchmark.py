@@ -0,0 +1,746 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de desempenho das etapas do pipeline.
+Cada subcomando mede uma etapa isolada com dados sintéticos.
+"""
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, List
+
+def _best_time(function: Callable[[], object], repeat: int) -> float:
+    """Retorna o menor tempo, em segundos, entre `repeat` execuções."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _report(label: str, items: int, seconds: float, unit: str) -> None:
+    rate = items / seconds if seconds else float('inf')
+    print(f"  {label:<28} {seconds * 1000:10.1f} ms  {rate:14,.0f} {unit}/s")
+
+# --- parsers ---------------------------------------------------------------
+
+def _synthetic_itau_lines(count: int, rng: random.Random) -> List[str]:
+    lines = []
+    for i in range(count):
+        day = 1 + i % 28
+        if i % 10 == 0:
+            lines.append(f"{day:02d}/03/2025 SALDO DO DIA {rng.randint(1, 9999)},{rng.randint(0, 99):02d}")
+        elif i % 7 == 0:
+            lines.append("Lançamentos do período")
+        else:
+            value = rng.choice(['', '-']) + f"{rng.randint(1, 9)}.{rng.randint(100, 999)},{rng.randint(0, 99):02d}"
+            lines.append(f"{day:02d}/03/2025 PIX TRANSF FULANO {i} {value}")
+    return lines
+
+def _synthetic_mercadopago_lines(count: int, rng: random.Random) -> List[str]:
+    lines = []
+    i = 0
+    while len(lines) < count:
+        day = 1 + i % 28
+        value = rng.choice(['', '-']) + f"{rng.randint(1, 999)},{rng.randint(0, 99):02d}"
+        kind = i % 6
+        if kind == 0:
+            lines.append("Data Descrição ID da operação Valor Saldo")
+        elif kind == 1:
+            lines.append("Transferência Pix enviada")
+            lines.append(f"{day:02d}-03-2025 Fulano de Tal {100000 + i} R$ {value} R$ 10,00")
+        elif kind == 2:
+            lines.append(f"{day:02d}-03-2025 Rendimentos {100000 + i} R$ {value}")
+            lines.append("R$ 1.234,56")
+        else:
+            lines.append(f"{day:02d}-03-2025 Pagamento com QR Pix {100000 + i} R$ {value} R$ 5,00")
+        i += 1
+    return lines[:count]
+
+def _legacy_itau_parse(parser, lines: List[str]):
+    """Implementação anterior ao motor de gramáticas: uma regex não compilada por linha."""
+    transactions = []
+    for line in lines:
+        match = re.search(r'(\d{2}/\d{2}/\d{4})\s+(.+?)\s+(-?[\d.,]+)$', line)
+        if not match:
+            continue
+        date_str, description, value_str = match.groups()
+        description = description.strip()
+        if 'saldo do dia' in description.lower():
+            continue
+        transactions.append(_legacy_transaction(parser, date_str, description, value_str))
+    return [t for t in transactions if t]
+
+def _legacy_mercadopago_parse(parser, lines: List[str]):
+    """Implementação anterior ao motor de gramáticas: até seis regex por linha."""
+    header_patterns = ['Data Descrição', '1/', 'EXTRATO DE CONTA', 'CPF/CNPJ:', 'Periodo:',
+                       'Entradas:', 'Saldo inicial:', 'Saidas:', 'DETALHE DOS MOVIMENTOS']
+    transaction_lines = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if any(line.startswith(pattern) for pattern in header_patterns):
+            i += 1
+            continue
+        if re.search(r'\d{2}-\d{2}-\d{4}.*R\$\s*-?[\d.,]+', line):
+            transaction_lines.append(line)
+            i += 1
+        elif re.search(r'R\$\s*-?[\d.,]+', line) and not re.match(r'\d{2}-\d{2}-\d{4}', line):
+            if transaction_lines:
+                transaction_lines[-1] += ' ' + line
+            i += 1
+        elif (not re.match(r'\d{2}-\d{2}-\d{4}', line) and
+              not re.search(r'R\$\s*-?[\d.,]+', line) and
+              not line.startswith('1/') and
+              not line.startswith('Data Descrição')):
+            if i + 1 < len(lines):
+                next_line = lines[i + 1]
+                if (re.search(r'\d{2}-\d{2}-\d{4}.*R\$\s*-?[\d.,]+', next_line) or
+                        re.search(r'\d{2}-\d{2}-\d{4}.*\d+.*R\$\s*-?[\d.,]+', next_line)):
+                    transaction_lines.append(line + ' ' + next_line)
+                    i += 2
+                else:
+                    i += 1
+            else:
+                i += 1
+        else:
+            i += 1
+    transactions = []
+    for line in transaction_lines:
+        match = re.search(r'(\d{2}-\d{2}-\d{4})\s+(.+?)\s+(\d+)\s+R\$\s*(-?[\d.,]+)', line)
+        if match:
+            date_str, description, _, value_str = match.groups()
+            transactions.append(_legacy_transaction(parser, date_str, description.strip(), value_str))
+    return [t for t in transactions if t]
+
+def _legacy_transaction(parser, date_str: str, description: str, value_str: str):
+    from interfaces import Transaction
+    try:
+        amount = float(value_str.replace('.', '').replace(',', '.'))
+        transaction_type = 'saída' if amount < 0 else 'entrada'
+        return Transaction(
+            date=parser._parse_date_to_iso(date_str),
+            amount=parser._normalize_amount(amount, transaction_type),
+            description=description,
+            transaction_type=transaction_type,
+            trntype=parser._determine_trntype(transaction_type)
+        )
+    except (ValueError, TypeError):
+        return None
+
+def bench_parsers(args) -> None:
+    """Vazão por linha do motor de gramáticas comparado à implementação anterior."""
+    from parsers.itau import ItauParser
+    from parsers.mercadopago import MercadoPagoParser
+
+    rng = random.Random(42)
+    cases = [
+        ('Itaú', ItauParser(), _synthetic_itau_lines(args.lines, rng), _legacy_itau_parse),
+        ('Mercado Pago', MercadoPagoParser(), _synthetic_mercadopago_lines(args.lines, rng), _legacy_mercadopago_parse),
+    ]
+    print(f"Parsers ({args.lines:,} linhas por banco, melhor de {args.repeat})")
+    for bank, parser, lines, legacy in cases:
+        if legacy(parser, lines) != parser._parse_transactions(lines):
+            raise SystemExit(f"Resultados divergentes para {bank}")
+        legacy_time = _best_time(lambda: legacy(parser, lines), args.repeat)
+        engine_time = _best_time(lambda: parser._parse_transactions(lines), args.repeat)
+        print(f"{bank}:")
+        _report("anterior", len(lines), legacy_time, "linhas")
+        _report("motor de gramáticas", len(lines), engine_time, "linhas")
+        print(f"  ganho: {legacy_time / engine_time:.2f}x")
+
+# --- backends de texto -----------------------------------------------------
+
+def bench_backends(args) -> None:
+    """Compara os backends de extração de texto e verifica se geram as mesmas transações."""
+    from pathlib import Path
+    from config import CACHE_CONFIG, PDFS_DIR
+    from parsers.text_backends import TEXT_BACKENDS
+    from services.bank_identifier import BankIdentifier
+
+    # Mede a extração real, não o cache
+    CACHE_CONFIG['extraction_cache_enabled'] = False
+    pdf_dir = Path(args.pdf_dir) if args.pdf_dir else PDFS_DIR
+    pdf_files = sorted(pdf_dir.glob("*.pdf"))
+    if not pdf_files:
+        raise SystemExit(f"Nenhum PDF encontrado em {pdf_dir}")
+
+    backends = sorted(TEXT_BACKENDS)
+    bank_identifier = BankIdentifier()
+    totals = {name: 0.0 for name in backends}
+    pages = 0
+    divergent = []
+    print(f"Backends de texto ({len(pdf_files)} PDFs em {pdf_dir}, melhor de {args.repeat})")
+    for pdf_file in pdf_files:
+        # Um PDF corrompido não interrompe a comparação dos demais; os tempos
+        # só entram nos totais quando todos os backends leram o arquivo
+        try:
+            bank_name = bank_identifier.identify_bank(str(pdf_file))
+            parser = bank_identifier.get_parser(bank_name) if bank_name else None
+            if parser is None:
+                print(f"  {pdf_file.name}: banco não identificado, ignorado")
+                continue
+            results, times = {}, {}
+            for name in backends:
+                parser.use_text_backend(name)
+                results[name] = parser.parse(str(pdf_file))[0]
+                times[name] = _best_time(lambda: parser.parse(str(pdf_file)), args.repeat)
+            with parser.text_backend.open(str(pdf_file)) as document:
+                page_count = document.page_count
+        except Exception as e:
+            print(f"  {pdf_file.name}: erro ({e.__class__.__name__}: {e}), ignorado")
+            continue
+        for name in backends:
+            totals[name] += times[name]
+        pages += page_count
+        reference = results[backends[0]]
+        if any(results[name] != reference for name in backends[1:]):
+            divergent.append(pdf_file.name)
+    for name in backends:
+        _report(name, pages, totals[name], "páginas")
+    if divergent:
+        print(f"  transações divergentes em {len(divergent)} arquivos:")
+        for file_name in divergent:
+            print(f"    - {file_name}")
+        raise SystemExit(1)
+    print("  equivalência: todos os backends geraram as mesmas transações")
+
+# --- escritores OFX ---------------------------------------------------------
+
+def _synthetic_transactions(count: int, rng: random.Random, transaction_class):
+    categories = ['Alimentação', 'Transporte', 'Saúde', 'Outros']
+    for i in range(count):
+        amount = round(rng.uniform(-900, 900), 2)
+        yield transaction_class(
+            date=f"2025{1 + i % 12:02d}{1 + i % 28:02d}",
+            amount=amount,
+            description=f"PIX TRANSF FULANO DE TAL {i}",
+            transaction_type='saída' if amount < 0 else 'entrada',
+            trntype='DEBIT' if amount < 0 else 'CREDIT',
+            category=categories[i % len(categories)]
+        )
+
+def _legacy_categorized_write(transactions, account_data, output_path: str) -> None:
+    """Implementação anterior do escritor categorizado: documento montado com += em memória."""
+    from datetime import datetime
+    from config import OFX_CONFIG
+    current_time = datetime.now().strftime("%Y%m%d%H%M%S")
+    ofx_content = '<?xml version="1.0" encoding="UTF-8"?>\n<OFX>\n'
+    ofx_content += (
+        f"  <SIGNONMSGSRSV1>\n    <SONRS>\n      <STATUS>\n        <CODE>0</CODE>\n"
+        f"        <SEVERITY>INFO</SEVERITY>\n      </STATUS>\n      <DTSERVER>{current_time}[0:GMT]</DTSERVER>\n"
+        f"      <LANGUAGE>{OFX_CONFIG['language']}</LANGUAGE>\n      <FI>\n        <ORG>CATEGORIZED OFX</ORG>\n"
+        f"        <FID>CAT</FID>\n      </FI>\n    </SONRS>\n  </SIGNONMSGSRSV1>\n"
+    )
+    if transactions:
+        dates = [t.date for t in transactions]
+        transactions_xml = ""
+        for i, transaction in enumerate(transactions):
+            date_str = datetime.strptime(transaction.date, "%Y%m%d").strftime('%Y%m%d')
+            transactions_xml += (
+                f"            <STMTTRN>\n              <TRNTYPE>{transaction.trntype}</TRNTYPE>\n"
+                f"              <DTPOSTED>{transaction.date}000000[-3:BRT]</DTPOSTED>\n"
+                f"              <TRNAMT>{transaction.amount:.2f}</TRNAMT>\n"
+                f"              <FITID>trans_{i + 1:03d}_{date_str}</FITID>\n"
+                f"              <MEMO>{transaction.description} [CATEGORIA: {transaction.category}]</MEMO>\n"
+                f"            </STMTTRN>\n"
+            )
+        ofx_content += (
+            f"  <BANKMSGSRSV1>\n    <STMTTRNRS>\n      <TRNUID>1</TRNUID>\n      <STATUS>\n"
+            f"        <CODE>0</CODE>\n        <SEVERITY>INFO</SEVERITY>\n      </STATUS>\n      <STMTRS>\n"
+            f"        <CURDEF>{OFX_CONFIG['currency']}</CURDEF>\n        <BANKACCTFROM>\n"
+            f"          <BANKID>{account_data.bank_id}</BANKID>\n          <BRANCHID>{account_data.agency}</BRANCHID>\n"
+            f"          <ACCTID>{account_data.account}</ACCTID>\n          <ACCTTYPE>{OFX_CONFIG['account_type']}</ACCTTYPE>\n"
+            f"        </BANKACCTFROM>\n        <BANKTRANLIST>\n"
+            f"          <DTSTART>{min(dates)}000000[-3:BRT]</DTSTART>\n"
+            f"          <DTEND>{max(dates)}000000[-3:BRT]</DTEND>\n"
+            f"{transactions_xml}        </BANKTRANLIST>\n      </STMTRS>\n    </STMTTRNRS>\n  </BANKMSGSRSV1>\n"
+        )
+    ofx_content += "</OFX>\n"
+    with open(output_path, 'w', encoding='utf-8') as file:
+        file.write(ofx_content)
+
+def _peak_memory(function: Callable[[], object]) -> int:
+    """Retorna o pico de memória alocada, em bytes, durante uma execução."""
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _read_without_timestamps(path) -> str:
+    with open(path, encoding='utf-8') as file:
+        return re.sub(r'<(DTSERVER|DTASOF)>\d{14}', r'<\1>', file.read())
+
+def bench_writers(args) -> None:
+    """Tempo de escrita dos OFX comum e categorizado, e equivalência com o escritor anterior."""
+    import tempfile
+    from pathlib import Path
+    from interfaces import AccountData, CategorizedTransaction
+    from writers.categorized_ofx_writer import CategorizedOFXWriterImpl
+    from writers.ofx_writer import OFXWriterRefactored
+
+    transactions = list(_synthetic_transactions(args.transactions, random.Random(42), CategorizedTransaction))
+    account_data = AccountData(
+        bank_name='Itaú', agency='7431', account='052607-3', bank_id='0260',
+        org='ITAÚ UNIBANCO S.A.', fid='260'
+    )
+    print(f"Escritores OFX ({args.transactions:,} transações, melhor de {args.repeat})")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        legacy_path = Path(temp_dir) / "anterior.ofx"
+        categorized_path = Path(temp_dir) / "categorizado.ofx"
+        plain_path = Path(temp_dir) / "comum.ofx"
+        categorized_writer = CategorizedOFXWriterImpl()
+        plain_writer = OFXWriterRefactored()
+
+        legacy_time = _best_time(
+            lambda: _legacy_categorized_write(transactions, account_data, legacy_path), args.repeat)
+        categorized_time = _best_time(
+            lambda: categorized_writer.write(iter(transactions), account_data, categorized_path), args.repeat)
+        plain_time = _best_time(
+            lambda: plain_writer.write(iter(transactions), account_data, plain_path), args.repeat)
+        if _read_without_timestamps(legacy_path) != _read_without_timestamps(categorized_path):
+            raise SystemExit("OFX categorizado divergente do escritor anterior")
+        legacy_peak = _peak_memory(
+            lambda: _legacy_categorized_write(transactions, account_data, legacy_path))
+        categorized_peak = _peak_memory(
+            lambda: categorized_writer.write(iter(transactions), account_data, categorized_path))
+    print("Categorizado:")
+    _report("anterior (+= em memória)", args.transactions, legacy_time, "transações")
+    _report("serializador em blocos", args.transactions, categorized_time, "transações")
+    print(f"  ganho: {legacy_time / categorized_time:.2f}x")
+    print(f"  pico de memória: {legacy_peak / 2**20:.1f} MiB (anterior) vs "
+          f"{categorized_peak / 2**20:.1f} MiB (serializador em blocos)")
+    print("Comum:")
+    _report("serializador em blocos", args.transactions, plain_time, "transações")
+
+def _legacy_write_transaction(file, transaction, index) -> None:
+    """Serialização anterior de um STMTTRN: strptime/strftime e uma escrita por linha."""
+    from datetime import datetime
+    from config import OFX_CONFIG
+    file.write('          <STMTTRN>\n')
+    file.write(f'            <TRNTYPE>{transaction.trntype}</TRNTYPE>\n')
+    file.write(f'            <DTPOSTED>{transaction.date}000000{OFX_CONFIG["timezone"]}</DTPOSTED>\n')
+    file.write(f'            <TRNAMT>{transaction.amount:.2f}</TRNAMT>\n')
+    date_str = datetime.strptime(transaction.date, "%Y%m%d").strftime('%Y%m%d')
+    file.write(f'            <FITID>trans_{index:03d}_{date_str}</FITID>\n')
+    file.write(f'            <MEMO>{transaction.description}</MEMO>\n')
+    file.write('          </STMTTRN>\n')
+
+def bench_serialize(args) -> None:
+    """Vazão da etapa de serialização dos STMTTRN, sem disco: anterior vs modelo compilado."""
+    import io
+    from config import PROCESSING_CONFIG
+    from interfaces import Transaction
+    from writers.ofx_writer import OFXWriterRefactored
+
+    transactions = list(_synthetic_transactions(args.transactions, random.Random(42), Transaction))
+    writer = OFXWriterRefactored()
+    chunk_size = PROCESSING_CONFIG['ofx_write_chunk_transactions']
+
+    def legacy():
+        sink = io.StringIO()
+        for index, transaction in enumerate(transactions, 1):
+            _legacy_write_transaction(sink, transaction, index)
+        return sink.getvalue()
+
+    def compiled():
+        sink = io.StringIO()
+        for start in range(0, len(transactions), chunk_size):
+            sink.write(writer._render_batch(transactions[start:start + chunk_size], start + 1))
+        return sink.getvalue()
+
+    if legacy() != compiled():
+        raise SystemExit("Serialização divergente da implementação anterior")
+    legacy_time = _best_time(legacy, args.repeat)
+    compiled_time = _best_time(compiled, args.repeat)
+    print(f"Serialização de STMTTRN ({args.transactions:,} transações, melhor de {args.repeat})")
+    _report("anterior", args.transactions, legacy_time, "transações")
+    _report("modelo compilado em lotes", args.transactions, compiled_time, "transações")
+    print(f"  ganho: {legacy_time / compiled_time:.2f}x")
+
+# --- leitura de OFX ----------------------------------------------------------
+
+def _count_ofxparse(path) -> int:
+    from ofxparse import OfxParser
+    from services.ofx_ingest import read_ofx
+    parsed = read_ofx(path).parse()
+    return sum(len(account.statement.transactions) for account in parsed.accounts)
+
+def bench_ofx_reader(args) -> None:
+    """Tempo e pico de memória da leitura de STMTTRN: leitor nativo vs ofxparse."""
+    import tempfile
+    from pathlib import Path
+    from interfaces import AccountData, Transaction
+    from parsers.ofx_parser import OFXParserImpl
+    from writers.ofx_writer import OFXWriterRefactored
+
+    account_data = AccountData(
+        bank_name='Itaú', agency='7431', account='052607-3', bank_id='0260',
+        org='ITAÚ UNIBANCO S.A.', fid='260'
+    )
+    reader = OFXParserImpl()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(f"Leitura de OFX (melhor de {args.repeat}; ofxparse até {args.ofxparse_max:,} transações)")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in sizes:
+            path = Path(temp_dir) / f"{size}.ofx"
+            OFXWriterRefactored().write(
+                _synthetic_transactions(size, random.Random(42), Transaction), account_data, str(path))
+            print(f"{size:,} transações ({path.stat().st_size / 2**20:.1f} MiB):")
+            count_native = lambda: sum(1 for _ in reader.iter_transactions(path))
+            if count_native() != size:
+                raise SystemExit("Leitor nativo não leu todas as transações")
+            native_time = _best_time(count_native, args.repeat)
+            native_peak = _peak_memory(count_native)
+            _report("leitor nativo", size, native_time, "transações")
+            print(f"  {'':<28} pico de memória: {native_peak / 2**20:.1f} MiB")
+            if size > args.ofxparse_max:
+                print("  ofxparse                     omitido (acima de --ofxparse-max)")
+                continue
+            if _count_ofxparse(path) != size:
+                raise SystemExit("ofxparse divergente do leitor nativo")
+            ofxparse_time = _best_time(lambda: _count_ofxparse(path), args.repeat)
+            ofxparse_peak = _peak_memory(lambda: _count_ofxparse(path))
+            _report("ofxparse", size, ofxparse_time, "transações")
+            print(f"  {'':<28} pico de memória: {ofxparse_peak / 2**20:.1f} MiB")
+            print(f"  ganho: {ofxparse_time / native_time:.2f}x")
+
+def _legacy_add_categories(ofx_content: str, transaction_map) -> str:
+    """Reescrita anterior do OFX categorizado: split em linhas, replaces e join."""
+    modified_lines = []
+    last_fitid = None
+    for line in ofx_content.split('\n'):
+        if '<FITID>' in line:
+            last_fitid = line.replace('<FITID>', '').replace('</FITID>', '').strip()
+            modified_lines.append(line)
+        elif '<MEMO>' in line:
+            if '</MEMO>' in line:
+                memo_content = line.replace('<MEMO>', '').replace('</MEMO>', '').strip()
+                modified_lines.append(f"<MEMO>{memo_content} [CATEGORIA: {transaction_map[last_fitid]}]</MEMO>")
+            else:
+                memo_content = line.replace('<MEMO>', '').strip()
+                modified_lines.append(f"<MEMO>{memo_content} [CATEGORIA: {transaction_map[last_fitid]}]")
+        else:
+            modified_lines.append(line)
+    return '\n'.join(modified_lines)
+
+def bench_rewrite(args) -> None:
+    """Reescrita do OFX com as categorias: anterior (decode/split/join) vs cópia por intervalos."""
+    import tempfile
+    from pathlib import Path
+    from interfaces import AccountData, Transaction
+    from services.ofx_ingest import read_ofx
+    from writers.ofx_writer import OFXWriterRefactored
+
+    account_data = AccountData(
+        bank_name='Itaú', agency='7431', account='052607-3', bank_id='0260',
+        org='ITAÚ UNIBANCO S.A.', fid='260'
+    )
+    categories = ['Alimentação', 'Transporte', 'Saúde', 'Outros']
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = Path(temp_dir) / "extrato.ofx"
+        legacy_path = Path(temp_dir) / "anterior.ofx"
+        offsets_path = Path(temp_dir) / "intervalos.ofx"
+        OFXWriterRefactored().write(
+            _synthetic_transactions(args.transactions, random.Random(42), Transaction), account_data, str(source))
+        size = source.stat().st_size
+        print(f"Reescrita do OFX categorizado ({args.transactions:,} transações, "
+              f"{size / 2**20:.1f} MiB, melhor de {args.repeat})")
+
+        with read_ofx(source) as document:
+            # Os intervalos dos MEMOs vêm da passada de parsing, que acontece de qualquer forma
+            indexed = list(document.index_transactions())
+            transaction_map = {
+                transaction.fitid: categories[i % len(categories)]
+                for i, (transaction, _) in enumerate(indexed)
+            }
+            insertions = [
+                (memo_span[1], f" [CATEGORIA: {transaction_map[transaction.fitid]}]")
+                for transaction, memo_span in indexed
+            ]
+
+            def legacy():
+                with open(source, 'r', encoding='utf-8') as file:
+                    content = _legacy_add_categories(file.read(), transaction_map)
+                with open(legacy_path, 'w', encoding='utf-8') as file:
+                    file.write(content)
+
+            def offsets():
+                document.write_with_insertions(offsets_path, insertions)
+
+            legacy_time = _best_time(legacy, args.repeat)
+            offsets_time = _best_time(offsets, args.repeat)
+            legacy_peak = _peak_memory(legacy)
+            offsets_peak = _peak_memory(offsets)
+
+        # A reescrita anterior perdia a indentação das linhas de MEMO
+        strip = lambda path: [line.strip() for line in path.read_text(encoding='utf-8').splitlines()]
+        if strip(legacy_path) != strip(offsets_path):
+            raise SystemExit("Reescrita divergente da implementação anterior")
+    _report("anterior (split/replace/join)", size // 2**20 or 1, legacy_time, "MiB")
+    _report("cópia por intervalos (mmap)", size // 2**20 or 1, offsets_time, "MiB")
+    print(f"  ganho: {legacy_time / offsets_time:.2f}x")
+    print(f"  pico de memória: {legacy_peak / 2**20:.1f} MiB (anterior) vs "
+          f"{offsets_peak / 2**20:.1f} MiB (cópia por intervalos)")
+
+# --- categorizador ------------------------------------------------------------
+
+def _legacy_categorize(categories, description: str, amount: float) -> str:
+    """
+    Categorização anterior: para cada descrição, percorre todas as categorias
+    e palavras-chave com keyword.lower() in descrição.
+    """
+    from keyword_config import MIN_SCORE_THRESHOLD, VALUE_BASED_RULES
+
+    if not description:
+        return "Outros"
+    description = re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', ' ', description)).strip().lower()
+    transaction_type = "income" if amount > 0 else "expense"
+    for exact in (False, True):
+        for category in categories:
+            if category.exact_match == exact and category.category_type in ("both", transaction_type):
+                for keyword in category.keywords:
+                    if keyword.lower() in description:
+                        return category.category
+    best_category, best_score = None, 0
+    for category in categories:
+        if not category.keywords or category.category_type not in ("both", transaction_type):
+            continue
+        score = 0
+        for keyword in category.keywords:
+            if keyword.lower() in description:
+                score += category.priority * 0.1
+                if len(keyword) > 3:
+                    score += 0.05
+        if amount > 0:
+            if amount > VALUE_BASED_RULES["high_value_threshold"]:
+                if category.category in ["Investimentos", "Transferências"]:
+                    score += 0.2
+                elif category.category in ["Alimentação", "Transporte"]:
+                    score -= 0.1
+            elif amount < VALUE_BASED_RULES["low_value_threshold"]:
+                if category.category in ["Alimentação", "Transporte", "Lazer"]:
+                    score += 0.1
+                elif category.category in ["Investimentos", "Transferências"]:
+                    score -= 0.2
+        if score > best_score:
+            best_category, best_score = category.category, score
+    if best_category and best_score > MIN_SCORE_THRESHOLD:
+        return best_category
+    if "pix" in description:
+        if "qr" in description or any(word in description for word in ["receb", "enviado", "transf"]):
+            return "Transferências"
+    if amount > VALUE_BASED_RULES["investment_threshold"]:
+        return "Investimentos"
+    return "Outros"
+
+def _categorization_corpus(count: int, rng: random.Random, categories, ofx_dir=None, unique=None):
+    """
+    Descrições e valores para comparar os categorizadores: palavras-chave
+    das regras em contextos variados, textos sem palavra-chave e, se houver,
+    as descrições reais dos OFX de ofx_dir.
+
+    Como nos extratos reais, as descrições se repetem: são sorteadas de um
+    conjunto de `unique` descrições (todas distintas, se None), com pesos
+    de Zipf, e cada ocorrência recebe um valor próprio.
+    """
+    from pathlib import Path
+    keywords = [keyword for category in categories for keyword in category.keywords]
+    prefixes = ["", "PIX TRANSF ", "PIX QRS ", "COMPRA CARTAO ", "PAG*", "TED ", "Pagamento de conta ", "DEB AUT "]
+    noise = ["LTDA", "SAO PAULO", "12/03", "0001", "SP", "BR", "ONLINE", "APP", "*", "-", "S.A."]
+    amounts = [
+        lambda: -round(rng.uniform(1, 900), 2), lambda: round(rng.uniform(1, 45), 2),
+        lambda: round(rng.uniform(1001, 4999), 2), lambda: round(rng.uniform(5001, 20000), 2),
+        lambda: -round(rng.uniform(5001, 20000), 2), lambda: 0.0,
+    ]
+    corpus = []
+    if ofx_dir and Path(ofx_dir).is_dir():
+        from parsers.ofx_parser import OFXParserImpl
+        reader = OFXParserImpl()
+        for path in sorted(Path(ofx_dir).glob("*.ofx")):
+            corpus.extend((t.description, t.amount) for t in reader.iter_transactions(str(path)))
+    def description():
+        if rng.random() < 0.7:
+            keyword = rng.choice(keywords)
+            keyword = rng.choice([keyword, keyword.upper(), keyword.title()])
+            return f"{rng.choice(prefixes)}{keyword} {' '.join(rng.sample(noise, rng.randint(0, 3)))}"
+        return ' '.join(rng.sample(noise, rng.randint(1, 5))) + rng.choice(["", " pix", " pix receb", " qr"])
+
+    missing = count - len(corpus)
+    if unique is None:
+        corpus.extend((description(), rng.choice(amounts)()) for _ in range(missing))
+        return corpus
+    pool = [description() for _ in range(unique)]
+    weights = [1 / rank for rank in range(1, unique + 1)]
+    corpus.extend((text, rng.choice(amounts)()) for text in rng.choices(pool, weights, k=missing))
+    return corpus
+
+def bench_categorizer(args) -> None:
+    """Vazão do categorizador (autômato, com e sem cache, vs busca anterior) e equivalência dos resultados."""
+    from services.logger import BufferedLogger
+    from services.smart_keyword_categorizer import SmartKeywordCategorizer
+
+    categorizer = SmartKeywordCategorizer(BufferedLogger(), cache_size=0)
+    cached = SmartKeywordCategorizer(BufferedLogger())
+    categories = categorizer.categories
+    corpus = _categorization_corpus(args.transactions, random.Random(42), categories, args.ofx_dir, args.unique)
+    keywords = sum(len(category.keywords) for category in categories)
+    print(f"Categorização ({len(corpus):,} transações, {len(set(d for d, _ in corpus)):,} descrições distintas, "
+          f"{keywords} palavras-chave, melhor de {args.repeat})")
+
+    legacy_results = [_legacy_categorize(categories, description, amount) for description, amount in corpus]
+    for label, candidate in (("autômato", categorizer), ("cache", cached)):
+        results = [candidate.categorize_transaction(description, amount) for description, amount in corpus]
+        divergent = [(item, old, new) for item, old, new in zip(corpus, legacy_results, results) if old != new]
+        if divergent:
+            for (description, amount), old, new in divergent[:10]:
+                print(f"  {description!r} ({amount}): {old} → {new}")
+            raise SystemExit(f"{len(divergent)} categorias divergentes da implementação anterior ({label})")
+    cache_info = cached.cache_info()
+
+    def with_empty_cache():
+        # Trocar pelo mesmo retrato descarta o cache, como no início de uma execução
+        cached.swap_ruleset(cached.ruleset)
+        return [cached.categorize_transaction(d, a) for d, a in corpus]
+
+    legacy_time = _best_time(
+        lambda: [_legacy_categorize(categories, d, a) for d, a in corpus], args.repeat)
+    automaton_time = _best_time(
+        lambda: [categorizer.categorize_transaction(d, a) for d, a in corpus], args.repeat)
+    cached_time = _best_time(with_empty_cache, args.repeat)
+    _report("anterior (laço por palavra)", len(corpus), legacy_time, "transações")
+    _report("autômato Aho-Corasick", len(corpus), automaton_time, "transações")
+    _report("autômato + cache LRU", len(corpus), cached_time, "transações")
+    print(f"  ganho: {legacy_time / automaton_time:.2f}x (autômato), {legacy_time / cached_time:.2f}x (com cache)")
+    lookups = cache_info['hits'] + cache_info['misses']
+    print(f"  cache: {cache_info['hits']:,} acertos, {cache_info['misses']:,} perdas, "
+          f"{cache_info['evictions']:,} descartes ({cache_info['hits'] / lookups:.1%} de acertos, "
+          f"{cache_info['size']:,}/{cache_info['max_size']:,} entradas)")
+
+# --- registro de parsers ----------------------------------------------------
+
+_IMPORT_TIMER = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+parsers = sorted(m for m in sys.modules if m.startswith('parsers.') and m not in
+                 ('parsers.base_parser', 'parsers.line_grammar', 'parsers.text_backends'))
+print(elapsed, ','.join(parsers))
+"""
+
+def _cold_import_time(statement: str, repeat: int):
+    """Mede, em um interpretador novo, o tempo de importação e os parsers carregados."""
+    import subprocess
+    import sys
+    best, modules = float('inf'), ""
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_TIMER.format(statement=statement)],
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        best = min(best, float(output[0]))
+        modules = output[1] if len(output) > 1 else "-"
+    return best, modules
+
+def bench_registry(args) -> None:
+    """Custo de inicialização e custo por arquivo da obtenção de parsers."""
+    from services.bank_identifier import PARSER_MODULES, BankIdentifier
+
+    print(f"Registro de parsers (melhor de {args.repeat})")
+    print("Inicialização (interpretador novo):")
+    eager = "; ".join(
+        f"import {path.split(':')[0]}" for path in PARSER_MODULES.values()
+    )
+    for label, statement in [
+        ("BankIdentifier (sob demanda)", "from services.bank_identifier import BankIdentifier; BankIdentifier()"),
+        ("+ todos os parsers", f"from services.bank_identifier import BankIdentifier; BankIdentifier(); {eager}"),
+    ]:
+        seconds, modules = _cold_import_time(statement, args.repeat)
+        print(f"  {label:<28} {seconds * 1000:10.1f} ms  parsers carregados: {modules}")
+
+    identifier = BankIdentifier()
+    print(f"Por arquivo ({args.files:,} obtenções por banco):")
+    for bank_name in identifier.get_available_banks():
+        parser_class = type(identifier.get_parser(bank_name))
+        fresh_time = _best_time(lambda: [parser_class() for _ in range(args.files)], args.repeat)
+        warm_time = _best_time(lambda: [identifier.get_parser(bank_name) for _ in range(args.files)], args.repeat)
+        print(f"{bank_name}:")
+        _report("instância nova", args.files, fresh_time, "arquivos")
+        _report("instância reaproveitada", args.files, warm_time, "arquivos")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmarks de desempenho do pipeline",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  python benchmark.py parsers
+  python benchmark.py parsers --lines 500000
+  python benchmark.py backends --pdf-dir pdfs
+  python benchmark.py registry
+  python benchmark.py writers --transactions 100000
+  python benchmark.py serialize
+  python benchmark.py ofx-reader --sizes 10000,100000,1000000
+  python benchmark.py rewrite --transactions 500000
+  python benchmark.py categorizer --ofx-dir ofxs_gerados
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parsers_cmd = subparsers.add_parser("parsers", help="Vazão por linha dos parsers de bancos")
+    parsers_cmd.add_argument("--lines", type=int, default=200_000, help="Linhas sintéticas por banco")
+    parsers_cmd.add_argument("--repeat", type=int, default=3, help="Repetições por medição")
+    parsers_cmd.set_defaults(handler=bench_parsers)
+
+    backends_cmd = subparsers.add_parser("backends", help="Tempo e equivalência dos backends de texto")
+    backends_cmd.add_argument("--pdf-dir", type=str, default=None, help="Diretório com os PDFs (padrão: pdfs/)")
+    backends_cmd.add_argument("--repeat", type=int, default=1, help="Repetições por medição")
+    backends_cmd.set_defaults(handler=bench_backends)
+
+    registry_cmd = subparsers.add_parser("registry", help="Custo de inicialização e por arquivo dos parsers")
+    registry_cmd.add_argument("--files", type=int, default=2_000, help="Obtenções de parser por banco")
+    registry_cmd.add_argument("--repeat", type=int, default=3, help="Repetições por medição")
+    registry_cmd.set_defaults(handler=bench_registry)
+
+    writers_cmd = subparsers.add_parser("writers", help="Tempo de escrita dos OFX comum e categorizado")
+    writers_cmd.add_argument("--transactions", type=int, default=100_000, help="Transações sintéticas")
+    writers_cmd.add_argument("--repeat", type=int, default=3, help="Repetições por medição")
+    writers_cmd.set_defaults(handler=bench_writers)
+
+    serialize_cmd = subparsers.add_parser("serialize", help="Vazão da serialização de STMTTRN")
+    serialize_cmd.add_argument("--transactions", type=int, default=200_000, help="Transações sintéticas")
+    serialize_cmd.add_argument("--repeat", type=int, default=3, help="Repetições por medição")
+    serialize_cmd.set_defaults(handler=bench_serialize)
+
+    reader_cmd = subparsers.add_parser("ofx-reader", help="Leitura de STMTTRN: leitor nativo vs ofxparse")
+    reader_cmd.add_argument("--sizes", type=str, default="10000,100000,1000000",
+                            help="Tamanhos dos OFX sintéticos, em transações, separados por vírgula")
+    reader_cmd.add_argument("--ofxparse-max", type=int, default=100_000,
+                            help="Maior OFX lido também com o ofxparse (padrão: 100000)")
+    reader_cmd.add_argument("--repeat", type=int, default=1, help="Repetições por medição")
+    reader_cmd.set_defaults(handler=bench_ofx_reader)
+
+    rewrite_cmd = subparsers.add_parser("rewrite", help="Reescrita do OFX com as categorias")
+    rewrite_cmd.add_argument("--transactions", type=int, default=200_000, help="Transações sintéticas")
+    rewrite_cmd.add_argument("--repeat", type=int, default=3, help="Repetições por medição")
+    rewrite_cmd.set_defaults(handler=bench_rewrite)
+
+    categorizer_cmd = subparsers.add_parser("categorizer", help="Vazão e equivalência do categorizador")
+    categorizer_cmd.add_argument("--transactions", type=int, default=50_000, help="Transações no corpus")
+    categorizer_cmd.add_argument("--unique", type=int, default=2_000,
+                                 help="Descrições distintas no corpus sintético, que se repetem como nos extratos")
+    categorizer_cmd.add_argument("--ofx-dir", type=str, default=None,
+                                 help="Inclui no corpus as descrições dos OFX deste diretório")
+    categorizer_cmd.add_argument("--repeat", type=int, default=3, help="Repetições por medição")
+    categorizer_cmd.set_defaults(handler=bench_categorizer)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == '__main__':
+    main()
@@ -4,25 +4,66 @@ Versão simplificada e eficiente para o contexto bancário brasileiro.
 """
 
 import argparse
+import os
 import sys
+from collections import defaultdict, deque
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import xml.etree.ElementTree as ET
-from ofxparse import OfxParser
-from services.logger import StructuredLogger
+from config import CATEGORIZATION_MANIFEST_PATH, CATEGORIZATION_STATS_PATH
+from interfaces import Logger
+from services.categorization_stats import CategorizationStats, FileStats
+from services.logger import BufferedLogger, StructuredLogger
+from services.manifest import CategorizationManifest
+from services.ofx_ingest import OFXDocument, read_ofx
+from services.parallel_processor import RecoveringProcessPool
+from services.sidecar import find_sidecar, read_sidecar
 from services.smart_keyword_categorizer import SmartKeywordCategorizer
 import unicodedata
 import re # Added for regex processing
 from keyword_config import CATEGORY_KEYWORDS
 
+# Estado de cada processo worker, criado uma única vez pelo initializer
+_worker_app: Optional['SmartCategorizeOFXApp'] = None
+
+def _init_worker(force: bool) -> None:
+    """Inicializa o worker com sua própria aplicação e categorizador."""
+    global _worker_app
+    logger = BufferedLogger()
+    _worker_app = SmartCategorizeOFXApp(logger=logger, force=force)
+    # As mensagens de carga do categorizador já aparecem no processo principal
+    logger.drain()
+
+def _categorize_in_worker(ofx_file: str) -> Tuple[Dict, List[Tuple[str, str]]]:
+    """Categoriza um arquivo no worker e devolve o resultado com os logs acumulados."""
+    result = _worker_app._process_logged_file(Path(ofx_file))
+    return result, _worker_app.logger.drain()
+
+def _failed_result(ofx_file: str, error_msg: str) -> Dict:
+    """Resultado de um arquivo que não pôde ser categorizado; o erro vai para as estatísticas."""
+    return {
+        'total': 0,
+        'categorized': 0,
+        'file': Path(ofx_file).name,
+        'error': error_msg,
+        'stats': FileStats(error=error_msg)
+    }
+
 class SmartCategorizeOFXApp:
     """Aplicação de categorização inteligente usando palavras-chave."""
     
-    def __init__(self):
-        self.logger = StructuredLogger()
+    _CATEGORY_MARKER = ' [CATEGORIA: '
+    
+    def __init__(self, workers: int = 1, logger: Optional[Logger] = None, force: bool = False):
+        self.workers = workers
+        self.force = force
+        self.logger = logger or StructuredLogger()
         self.categorizer = SmartKeywordCategorizer(self.logger)
+        self.ruleset_digest = self.categorizer.ruleset_digest()
         self.ofxs_dir = Path("ofxs_gerados")
         self.output_dir = Path("ofxs_categorizados")
+        self.manifest = CategorizationManifest(self.output_dir / CATEGORIZATION_MANIFEST_PATH.name)
+        self.stats = CategorizationStats()
     
     def run(self) -> None:
         """Executa a categorização inteligente."""
@@ -49,97 +90,202 @@ class SmartCategorizeOFXApp:
     
     def _process_ofx_files(self) -> None:
         """Processa todos os arquivos OFX encontrados."""
-        ofx_files = list(self.ofxs_dir.glob("*.ofx"))
+        ofx_files = sorted(self.ofxs_dir.glob("*.ofx"))
+        self._remove_orphaned_outputs()
         
         if not ofx_files:
             self.logger.warning(f"Nenhum arquivo OFX encontrado em {self.ofxs_dir}")
+            self.manifest.save()
             return
         
         self.logger.info(f"Encontrados {len(ofx_files)} arquivos OFX para categorizar")
         
+        ofx_files = self._select_stale_files(ofx_files)
+        if self.workers > 1 and len(ofx_files) > 1:
+            self.logger.info(f"Categorizando em paralelo com {self.workers} processos")
+            results = self._process_files_parallel(ofx_files)
+        else:
+            results = [self._process_logged_file(ofx_file) for ofx_file in ofx_files]
+        
         total_transactions = 0
         categorized_transactions = 0
-        
-        for ofx_file in ofx_files:
-            self.logger.info(f"Processando: {ofx_file.name}")
-            result = self._process_single_file(ofx_file)
+        cache = {'hits': 0, 'misses': 0, 'evictions': 0}
+        for ofx_file, result in zip(ofx_files, results):
             total_transactions += result['total']
             categorized_transactions += result['categorized']
+            for key, count in result.get('cache', {}).items():
+                cache[key] += count
+            if 'stats' in result:
+                self.stats.add_file(ofx_file.name, result['stats'])
+            if result.get('saved'):
+                self.manifest.record(str(ofx_file), self.ruleset_digest, str(self.output_dir / ofx_file.name))
+        self.manifest.save()
         
+        # Outras ferramentas leem as estatísticas sem reabrir os OFX
+        self.stats.save(self.output_dir / CATEGORIZATION_STATS_PATH.name)
         self.logger.info(f"Processamento concluído: {categorized_transactions}/{total_transactions} transações categorizadas")
+        self.logger.info(
+            f"Cache do categorizador: {cache['hits']} acertos, {cache['misses']} perdas, "
+            f"{cache['evictions']} descartes"
+        )
+    
+    def _select_stale_files(self, ofx_files: List[Path]) -> List[Path]:
+        """
+        Retorna, em ordem, os OFX que precisam ser categorizados.
+
+        Um OFX com o mesmo conteúdo e as mesmas regras da última execução é
+        ignorado, e suas estatísticas vêm do JSON gravado naquela execução.
+        """
+        previous_stats = CategorizationStats.load(self.output_dir / CATEGORIZATION_STATS_PATH.name)
+        stale_files = []
+        for ofx_file in ofx_files:
+            file_stats = previous_stats.files.get(ofx_file.name)
+            if (not self.force and file_stats is not None
+                    and self.manifest.is_up_to_date(str(ofx_file), self.ruleset_digest)):
+                self.stats.add_file(ofx_file.name, file_stats)
+                continue
+            stale_files.append(ofx_file)
+        up_to_date = len(ofx_files) - len(stale_files)
+        if up_to_date:
+            self.logger.info(
+                f"{up_to_date} arquivos já categorizados e inalterados foram ignorados "
+                f"(use --force para recategorizar)"
+            )
+        return stale_files
+    
+    def _remove_orphaned_outputs(self) -> None:
+        """Apaga as saídas de OFX que não existem mais."""
+        for entry in self.manifest.remove_orphans():
+            output_path = Path(entry.output_path)
+            if output_path.exists():
+                output_path.unlink()
+                self.logger.info(f"OFX categorizado órfão removido: {output_path.name}")
+    
+    def _process_logged_file(self, ofx_file: Path) -> Dict:
+        self.logger.info(f"Processando: {ofx_file.name}")
+        return self._process_single_file(ofx_file)
+    
+    def _process_files_parallel(self, ofx_files: List[Path]) -> List[Dict]:
+        """
+        Categoriza os arquivos em um pool de processos.
+
+        Cada worker carrega o categorizador uma única vez; os resultados e
+        os logs de cada arquivo voltam na ordem de entrada, como na execução
+        sequencial. Se um worker morrer, o arquivo pendente é reprocessado
+        isoladamente e conta como não processado se falhar de novo.
+        """
+        pool = RecoveringProcessPool(
+            self.logger, self.workers, _categorize_in_worker, _failed_result,
+            initializer=_init_worker, initargs=(self.force,)
+        )
+        return pool.run([str(ofx_file) for ofx_file in ofx_files])
     
     def _process_single_file(self, ofx_file: Path) -> Dict[str, int]:
-        """Processa um único arquivo OFX."""
+        """Processa um único arquivo OFX; o resultado inclui o uso do cache do categorizador no arquivo."""
+        cache_before = self.categorizer.cache_info()
         try:
-            # Lê o arquivo OFX usando ofxparse com diferentes encodings
-            encodings_to_try = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-            parsed_ofx = None
-            for encoding in encodings_to_try:
-                try:
-                    with open(ofx_file, 'r', encoding=encoding, errors='ignore') as file:
-                        ofx = OfxParser()
-                        parsed_ofx = ofx.parse(file)
-                    break  # Se chegou aqui, o encoding funcionou
-                except UnicodeDecodeError:
-                    continue
-                except Exception as e:
-                    # Se não for erro de encoding, tenta o próximo
-                    if 'codec' in str(e).lower():
-                        continue
-                    else:
-                        # Se for erro de ledger balance, tenta processar mesmo assim
-                        if 'Empty ledger balance' in str(e):
-                            self.logger.warning(f"Saldo não pode ser lido em {ofx_file.name}, mas continuando processamento...")
-                            try:
-                                with open(ofx_file, 'r', encoding=encoding, errors='ignore') as file:
-                                    ofx = OfxParser()
-                                    parsed_ofx = ofx.parse(file)
-                                break
-                            except Exception as parse_error:
-                                self.logger.warning(f"Tentando processamento alternativo para {ofx_file.name}")
-                                return self._process_ofx_alternative(ofx_file)
-                        else:
-                            # Fallback para XML puro se for erro de parsing
-                            if 'no element found' in str(e).lower() or 'syntax error' in str(e).lower() or 'not well-formed' in str(e).lower():
-                                self.logger.warning(f"Tentando fallback XML puro para {ofx_file.name}")
-                                return self._process_ofx_xml_fallback(ofx_file)
-                            raise e
-            if parsed_ofx is None:
-                # Fallback para XML puro se não conseguiu com ofxparse
-                self.logger.warning(f"Tentando fallback XML puro para {ofx_file.name}")
-                return self._process_ofx_xml_fallback(ofx_file)
+            # O OFX é mapeado uma única vez; o mesmo conteúdo serve ao parsing e à reescrita
+            with read_ofx(ofx_file) as document:
+                result = self._process_document(document)
+        except Exception as e:
+            error_msg = f"Erro ao processar {ofx_file.name}: {e}"
+            self.logger.error(error_msg)
+            result = _failed_result(str(ofx_file), error_msg)
+        cache_after = self.categorizer.cache_info()
+        result['cache'] = {
+            key: cache_after[key] - cache_before[key] for key in ('hits', 'misses', 'evictions')
+        }
+        return result
+
+    def _process_document(self, document: OFXDocument) -> Dict[str, int]:
+        """Processa um arquivo OFX já mapeado em memória."""
+        ofx_file = document.path
+        # O sidecar gerado junto com o OFX dispensa reprocessar o OFX
+        sidecar = find_sidecar(ofx_file)
+        if sidecar:
+            return self._process_sidecar(document, sidecar)
+        # Leitor nativo sobre o arquivo mapeado, para SGML e XML; o ofxparse fica como fallback
+        transactions = self._extract_transactions_native(document)
+        if not transactions:
+            try:
+                parsed_ofx = document.parse()
+            except Exception as e:
+                # Se for erro de ledger balance, tenta processar mesmo assim
+                if 'Empty ledger balance' in str(e):
+                    self.logger.warning(f"Saldo não pode ser lido em {ofx_file.name}, mas continuando processamento...")
+                    try:
+                        parsed_ofx = document.parse(fail_fast=False)
+                    except Exception:
+                        self.logger.warning(f"Tentando processamento alternativo para {ofx_file.name}")
+                        return self._process_ofx_alternative(document)
+                # Fallback para XML puro se for erro de parsing
+                elif 'no element found' in str(e).lower() or 'syntax error' in str(e).lower() or 'not well-formed' in str(e).lower():
+                    self.logger.warning(f"Tentando fallback XML puro para {ofx_file.name}")
+                    return self._process_ofx_xml_fallback(document)
+                else:
+                    raise e
             # Extrai transações
             transactions = self._extract_transactions_from_ofx(parsed_ofx)
-            if not transactions:
-                self.logger.warning(f"Nenhuma transação encontrada em {ofx_file.name}")
-                return {'total': 0, 'categorized': 0}
-            # Categoriza as transações
-            categorized_count = 0
-            categorized_transactions = []
-            for transaction in transactions:
-                category = self._categorize_transaction(transaction)
-                if category:
-                    categorized_count += 1
-                    transaction['category'] = category
-                categorized_transactions.append(transaction)
-            # Salva o arquivo categorizado
-            output_file = self.output_dir / f"categorizado_{ofx_file.name}"
-            self._save_categorized_ofx_file(ofx_file, categorized_transactions, output_file)
-            self.logger.info(f"Arquivo processado: {categorized_count}/{len(transactions)} transações categorizadas")
-            return {'total': len(transactions), 'categorized': categorized_count}
-        except Exception as e:
-            self.logger.error(f"Erro ao processar {ofx_file.name}: {e}")
+        if not transactions:
+            self.logger.warning(f"Nenhuma transação encontrada em {ofx_file.name}")
             return {'total': 0, 'categorized': 0}
+        # Categoriza as transações
+        categorized_count = 0
+        categorized_transactions = []
+        for transaction in transactions:
+            category = self._categorize_transaction(transaction)
+            if category:
+                categorized_count += 1
+                transaction['category'] = category
+            categorized_transactions.append(transaction)
+        # Salva o arquivo categorizado
+        output_file = self.output_dir / f"categorizado_{ofx_file.name}"
+        saved = self._save_categorized_ofx_file(document, categorized_transactions, output_file)
+        self.logger.info(f"Arquivo processado: {categorized_count}/{len(transactions)} transações categorizadas")
+        return self._file_result(categorized_transactions, saved)
+
+    def _file_result(self, categorized_transactions: List[Dict], saved: bool) -> Dict:
+        """Contagens de um arquivo: total, categorizadas, estatísticas por categoria e se a saída foi gravada."""
+        stats = FileStats()
+        for transaction in categorized_transactions:
+            stats.add(transaction.get('category'), float(transaction.get('amount') or 0.0),
+                      transaction.get('categorizer_calls', 0))
+        return {'total': stats.transactions, 'categorized': stats.categorized, 'stats': stats, 'saved': saved}
 
-    def _process_ofx_alternative(self, ofx_file: Path) -> Dict[str, int]:
+    def _process_sidecar(self, document: OFXDocument, sidecar: Path) -> Dict[str, int]:
+        """Processa as transações do sidecar gravado na conversão do PDF."""
+        ofx_file = document.path
+        transactions = [
+            {
+                'description': row['description'],
+                'amount': row['amount'],
+                'date': row['date'],
+                'fitid': row['fitid']
+            }
+            for row in read_sidecar(sidecar)
+        ]
+        if not transactions:
+            self.logger.warning(f"Nenhuma transação encontrada em {ofx_file.name}")
+            return {'total': 0, 'categorized': 0}
+        categorized_count = 0
+        categorized_transactions = []
+        for transaction in transactions:
+            category = self._categorize_transaction(transaction)
+            if category:
+                categorized_count += 1
+                transaction['category'] = category
+            categorized_transactions.append(transaction)
+        output_file = self.output_dir / f"categorizado_{ofx_file.name}"
+        saved = self._save_categorized_ofx_file(document, categorized_transactions, output_file)
+        self.logger.info(f"Arquivo processado (sidecar): {categorized_count}/{len(transactions)} transações categorizadas")
+        return self._file_result(categorized_transactions, saved)
+
+    def _process_ofx_alternative(self, document: OFXDocument) -> Dict[str, int]:
         """Processa arquivo OFX usando método alternativo quando ofxparse falha."""
+        ofx_file = document.path
         try:
-            # Lê o arquivo diretamente e extrai transações usando regex
-            with open(ofx_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            # Extrai transações usando regex
-            transactions = self._extract_transactions_with_regex(content)
+            # Extrai transações do texto já lido usando regex
+            transactions = self._extract_transactions_with_regex(document.text)
             
             if not transactions:
                 self.logger.warning(f"Nenhuma transação encontrada em {ofx_file.name}")
@@ -157,23 +303,22 @@ class SmartCategorizeOFXApp:
                 categorized_transactions.append(transaction)
             
             # Salva o arquivo categorizado
-            self._save_categorized_ofx_file(ofx_file, categorized_transactions, None)
+            saved = self._save_categorized_ofx_file(document, categorized_transactions, None)
             
             self.logger.info(f"Arquivo processado (método alternativo): {categorized_count}/{len(transactions)} transações categorizadas")
             
-            return {'total': len(transactions), 'categorized': categorized_count}
+            return self._file_result(categorized_transactions, saved)
             
         except Exception as e:
             self.logger.error(f"Erro no processamento alternativo de {ofx_file.name}: {e}")
             return {'total': 0, 'categorized': 0}
 
-    def _process_ofx_xml_fallback(self, ofx_file: Path) -> Dict[str, int]:
+    def _process_ofx_xml_fallback(self, document: OFXDocument) -> Dict[str, int]:
         """Processa arquivo OFX XML puro usando ElementTree."""
+        ofx_file = document.path
         try:
             import xml.etree.ElementTree as ET
-            with open(ofx_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            root = ET.fromstring(content)
+            root = ET.fromstring(document.text)
             transactions = []
             for stmttrn in root.findall('.//STMTTRN'):
                 trntype = stmttrn.findtext('TRNTYPE', default='')
@@ -206,13 +351,30 @@ class SmartCategorizeOFXApp:
                     transaction['category'] = category
                 categorized_transactions.append(transaction)
             output_file = self.output_dir / f"categorizado_{ofx_file.name}"
-            self._save_categorized_ofx_file(ofx_file, categorized_transactions, output_file)
+            saved = self._save_categorized_ofx_file(document, categorized_transactions, output_file)
             self.logger.info(f"Arquivo processado (XML): {categorized_count}/{len(transactions)} transações categorizadas")
-            return {'total': len(transactions), 'categorized': categorized_count}
+            return self._file_result(categorized_transactions, saved)
         except Exception as e:
             self.logger.error(f"Erro no fallback XML de {ofx_file.name}: {e}")
             return {'total': 0, 'categorized': 0}
     
+    def _extract_transactions_native(self, document: OFXDocument) -> List[Dict]:
+        """
+        Extrai as transações com o leitor nativo de OFX, sobre o arquivo já
+        mapeado, guardando o intervalo em bytes do MEMO para a reescrita.
+        """
+        return [
+            {
+                'description': transaction.description,
+                'amount': transaction.amount,
+                'date': transaction.date,
+                'type': transaction.trntype,
+                'fitid': transaction.fitid,
+                'memo_span': memo_span
+            }
+            for transaction, memo_span in document.index_transactions()
+        ]
+
     def _extract_transactions_from_ofx(self, parsed_ofx) -> List[Dict]:
         """Extrai todas as transações do arquivo OFX usando ofxparse."""
         transactions = []
@@ -229,7 +391,7 @@ class SmartCategorizeOFXApp:
                         'amount': float(transaction.amount) if transaction.amount else 0.0,
                         'date': date_str,
                         'type': transaction.type,
-                        'id': transaction.id if hasattr(transaction, 'id') else None
+                        'fitid': getattr(transaction, 'id', '') or ''
                     }
                     transactions.append(transaction_dict)
         
@@ -291,7 +453,13 @@ class SmartCategorizeOFXApp:
         return transactions
     
     def _categorize_transaction(self, transaction: Dict) -> str:
-        """Categoriza uma transação individual."""
+        """
+        Categoriza uma transação individual.
+
+        Cada chamada é contada na própria transação (categorizer_calls), e a
+        soma e o máximo por transação vão para as estatísticas do arquivo.
+        """
+        transaction['categorizer_calls'] = transaction.get('categorizer_calls', 0) + 1
         try:
             description = transaction.get('description', '')
             amount = transaction.get('amount', 0.0)
@@ -305,40 +473,146 @@ class SmartCategorizeOFXApp:
             self.logger.error(f"Erro ao categorizar transação: {e}")
             return "Outros"
     
-    def _save_categorized_ofx_file(self, original_file: Path, categorized_transactions: List[Dict], output_file: Path) -> None:
-        """Salva o arquivo OFX categorizado mantendo o formato original."""
+    def _save_categorized_ofx_file(self, document: OFXDocument, categorized_transactions: List[Dict], output_file: Path) -> bool:
+        """
+        Salva o arquivo OFX categorizado mantendo o formato original.
+
+        Os trechos do original são copiados direto do arquivo mapeado em
+        memória; só os sufixos [CATEGORIA: ...] são inseridos, ao fim do
+        valor de cada MEMO (veja OFXDocument.write_with_insertions).
+
+        Se o OFX não mudou desde a última categorização, só as categorias
+        que mudaram são trocadas na saída existente.
+
+        Returns:
+            True se a saída foi gravada (ou já estava atualizada)
+        """
         try:
-            # Lê o conteúdo original do arquivo com encoding correto
-            encodings_to_try = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-            original_content = None
-            
-            for encoding in encodings_to_try:
-                try:
-                    with open(original_file, 'r', encoding=encoding, errors='ignore') as f:
-                        original_content = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
-            if original_content is None:
-                raise Exception("Não foi possível ler o arquivo original")
-            
-            # Cria um mapeamento de transações por FITID
-            transaction_map = {}
-            for transaction in categorized_transactions:
-                fitid = transaction.get('fitid', '')
-                if fitid:
-                    transaction_map[fitid] = transaction.get('category', 'Outros')
-            
-            # Modifica o conteúdo OFX original adicionando categorias
-            modified_content = self._add_categories_to_ofx(original_content, transaction_map)
-            
+            original_file = document.path
+            insertions = self._category_insertions(document, categorized_transactions)
             # Salva o arquivo com o mesmo nome do original (sem prefixo)
             output_file = self.output_dir / original_file.name
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(modified_content)
+            if (not self.force and self.manifest.input_unchanged(str(original_file))
+                    and self._update_changed_categories(document, insertions, output_file)):
+                return True
+            document.write_with_insertions(
+                output_file,
+                ((offset, f"{self._CATEGORY_MARKER}{category}]") for offset, category in insertions)
+            )
             self.logger.info(f"Arquivo OFX categorizado salvo: {output_file.name}")
+            return True
         except Exception as e:
             self.logger.error(f"Erro ao salvar arquivo: {e}")
+            return False
+
+    def _update_changed_categories(self, document: OFXDocument, insertions: List[Tuple[int, str]],
+                                   output_file: Path) -> bool:
+        """
+        Troca na saída existente só as categorias que mudaram.
+
+        A saída anterior foi gerada do mesmo OFX, então o sufixo de cada
+        inserção está na posição original deslocada pelos sufixos anteriores.
+        Se algum sufixo não estiver onde deveria, a saída não corresponde
+        ao OFX e retorna False, para que seja regravada por inteiro.
+        """
+        encoding = document.encoding
+        marker = self._CATEGORY_MARKER.encode(encoding)
+        temp_file = output_file.with_suffix(output_file.suffix + '.tmp')
+        with read_ofx(output_file) as previous:
+            if previous.encoding != encoding:
+                return False
+            data = previous.data
+            replacements = []
+            shift = 0
+            for offset, category in insertions:
+                start = offset + shift
+                if data[start:start + len(marker)] != marker:
+                    return False
+                value_start = start + len(marker)
+                value_end = data.find(b']', value_start)
+                if value_end < 0:
+                    return False
+                if data[value_start:value_end] != category.encode(encoding, 'xmlcharrefreplace'):
+                    replacements.append((value_start, value_end, category))
+                shift = value_end + 1 - offset
+            if len(data) - shift != len(document.data):
+                return False
+            if replacements:
+                previous.write_with_replacements(temp_file, replacements)
+        if not replacements:
+            self.logger.info(f"Arquivo OFX categorizado sem categorias alteradas: {output_file.name}")
+            return True
+        os.replace(temp_file, output_file)
+        self.logger.info(f"Arquivo OFX categorizado atualizado: {output_file.name} ({len(replacements)} categorias alteradas)")
+        return True
+
+    def _category_insertions(self, document: OFXDocument, categorized_transactions: List[Dict]) -> List[Tuple[int, str]]:
+        """
+        Retorna (posição em bytes, categoria) para cada MEMO ainda sem categoria.
+
+        As transações do leitor nativo já trazem o intervalo do MEMO
+        (memo_span); nas demais (sidecar, ofxparse, regex), os MEMOs são
+        localizados no arquivo e associados às transações já categorizadas
+        pelo FITID ou, sem ele, por data, valor e descrição. FITIDs
+        repetidos são associados na ordem em que aparecem. Só uma transação
+        do arquivo que não esteja entre as categorizadas é categorizada
+        aqui; ela é acrescentada a categorized_transactions.
+        """
+        if categorized_transactions and 'memo_span' in categorized_transactions[0]:
+            return [
+                (transaction['memo_span'][1], transaction.get('category', 'Outros'))
+                for transaction in categorized_transactions
+                if transaction['memo_span'] and '[CATEGORIA:' not in transaction['description']
+            ]
+        by_fitid = defaultdict(deque)
+        by_content = defaultdict(deque)
+        for transaction in categorized_transactions:
+            fitid = transaction.get('fitid')
+            if fitid:
+                by_fitid[fitid].append(transaction)
+            by_content[self._content_key(transaction)].append(transaction)
+        insertions = []
+        for transaction, memo_span in document.index_transactions():
+            if memo_span is None or '[CATEGORIA:' in transaction.description:
+                continue
+            matched = self._take_match(by_fitid.get(transaction.fitid))
+            if matched is None:
+                matched = self._take_match(by_content.get(self._content_key({
+                    'date': transaction.date,
+                    'amount': transaction.amount,
+                    'description': transaction.description
+                })))
+            if matched is None:
+                # Transação que o parsing não trouxe: categorizada agora, com o valor real
+                matched = {
+                    'description': transaction.description,
+                    'amount': transaction.amount,
+                    'date': transaction.date,
+                    'fitid': transaction.fitid
+                }
+                matched['category'] = self._categorize_transaction(matched)
+                matched['joined'] = True
+                categorized_transactions.append(matched)
+            insertions.append((memo_span[1], matched.get('category', 'Outros')))
+        return insertions
+
+    @staticmethod
+    def _content_key(transaction: Dict) -> Tuple[str, float, str]:
+        return (
+            str(transaction.get('date', ''))[:8],
+            round(float(transaction.get('amount') or 0.0), 2),
+            transaction.get('description', '').strip()
+        )
+
+    @staticmethod
+    def _take_match(candidates: Optional[deque]) -> Optional[Dict]:
+        """Retira a primeira transação ainda não associada a um MEMO."""
+        while candidates:
+            transaction = candidates.popleft()
+            if not transaction.get('joined'):
+                transaction['joined'] = True
+                return transaction
+        return None
 
     def _normalize_text(self, text: str) -> str:
         """Normaliza texto para comparação flexível (sem acento, caixa baixa, sem espaços extras)."""
@@ -347,83 +621,30 @@ class SmartCategorizeOFXApp:
         text = ' '.join(text.split())
         return text
 
-    def _add_categories_to_ofx(self, ofx_content: str, transaction_map: Dict[str, str]) -> str:
-        """Adiciona categorias ao conteúdo OFX original usando FITID quando possível."""
-        lines = ofx_content.split('\n')
-        modified_lines = []
-        last_fitid = None
-        
-        for line in lines:
-            if '<FITID>' in line:
-                # Captura o FITID da transação
-                last_fitid = line.replace('<FITID>', '').replace('</FITID>', '').strip()
-                modified_lines.append(line)
-            elif '<MEMO>' in line:
-                # Extrai o conteúdo do MEMO
-                if '</MEMO>' in line:
-                    memo_content = line.replace('<MEMO>', '').replace('</MEMO>', '').strip()
-                else:
-                    memo_content = line.replace('<MEMO>', '').strip()
-                
-                # Busca categoria pelo FITID ou categoriza pela descrição
-                category = None
-                if last_fitid and last_fitid in transaction_map:
-                    category = transaction_map[last_fitid]
-                else:
-                    category = self.categorizer.categorize_transaction(memo_content, 0)
-                
-                # Adiciona categoria se não existir
-                if '[CATEGORIA:' not in memo_content:
-                    if '</MEMO>' in line:
-                        modified_memo = f"<MEMO>{memo_content} [CATEGORIA: {category}]</MEMO>"
-                    else:
-                        modified_memo = f"<MEMO>{memo_content} [CATEGORIA: {category}]"
-                else:
-                    if '</MEMO>' in line:
-                        modified_memo = f"<MEMO>{memo_content}</MEMO>"
-                    else:
-                        modified_memo = f"<MEMO>{memo_content}"
-                
-                modified_lines.append(modified_memo)
-            else:
-                modified_lines.append(line)
-        
-        return '\n'.join(modified_lines)
+    def _show_categorizer_calls(self) -> None:
+        """Mostra as chamadas ao categorizador; cada transação deve ser categorizada uma única vez."""
+        calls = self.stats.total_categorizer_calls
+        transactions = self.stats.total_transactions
+        self.logger.info(f"Chamadas ao categorizador: {calls} para {transactions} transações")
+        if self.stats.max_categorizer_calls > 1:
+            self.logger.warning(
+                f"⚠️  Alguma transação foi categorizada {self.stats.max_categorizer_calls} vezes"
+            )
     
     def _show_statistics(self) -> None:
         """Mostra estatísticas da categorização."""
         self.logger.info("=== ESTATÍSTICAS DE CATEGORIZAÇÃO ===")
         
-        # Conta transações por categoria nos arquivos processados
-        category_stats = {}
-        total_files = 0
-        total_transactions = 0
+        # Contagens acumuladas durante o processamento, inclusive as dos workers
+        category_stats = {category: totals.count for category, totals in self.stats.categories.items()}
+        total_files = self.stats.total_files
+        total_transactions = self.stats.total_categorized
         
-        for output_file in self.output_dir.glob("*.ofx"):
-            # Pula arquivos que não são do diretório de saída (arquivos originais)
-            if output_file.parent.name != "ofxs_categorizados":
-                continue
-                
-            try:
-                with open(output_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Conta categorias no arquivo OFX
-                lines = content.split('\n')
-                for line in lines:
-                    if '[CATEGORIA:' in line and ']' in line:
-                        # Extrai a categoria da linha
-                        start_idx = line.find('[CATEGORIA:') + 11
-                        end_idx = line.find(']', start_idx)
-                        if start_idx > 10 and end_idx > start_idx:
-                            category = line[start_idx:end_idx].strip()
-                            category_stats[category] = category_stats.get(category, 0) + 1
-                            total_transactions += 1
-                
-                total_files += 1
-                
-            except Exception as e:
-                self.logger.error(f"Erro ao ler estatísticas de {output_file.name}: {e}")
+        failed_files = self.stats.failed_files
+        if failed_files:
+            self.logger.warning(f"{len(failed_files)} arquivos não puderam ser categorizados:")
+            for file_name, error in sorted(failed_files.items()):
+                self.logger.warning(f"  - {file_name}: {error}")
         
         # Mostra estatísticas
         if total_transactions > 0:
@@ -433,7 +654,10 @@ class SmartCategorizeOFXApp:
             
             for category, count in sorted(category_stats.items(), key=lambda x: x[1], reverse=True):
                 percentage = (count / total_transactions) * 100
-                self.logger.info(f"  {category}: {count} ({percentage:.1f}%)")
+                total_amount = self.stats.categories[category].total_amount
+                self.logger.info(f"  {category}: {count} ({percentage:.1f}%) - R$ {total_amount:,.2f}")
+            
+            self._show_categorizer_calls()
             
             # Mostra eficácia (quanto reduziu "Outros")
             outros_count = category_stats.get("Outros", 0)
@@ -464,12 +688,28 @@ def main():
         epilog="""
 Exemplos de uso:
   python categorize_smart.py
+  python categorize_smart.py --workers 4
+  python categorize_smart.py --force
         """
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Número de processos para categorizar os arquivos em paralelo (padrão: 1)"
+    )
+    
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recategoriza e regrava todos os OFX, mesmo os que não mudaram desde a última execução"
+    )
     
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers deve ser maior ou igual a 1")
     
-    app = SmartCategorizeOFXApp()
+    app = SmartCategorizeOFXApp(workers=args.workers, force=args.force)
     app.run()
 
 if __name__ == '__main__':
@@ -11,7 +11,14 @@ BASE_DIR = Path(__file__).parent
 PDFS_DIR = BASE_DIR / 'pdfs'
 OFXS_DIR = BASE_DIR / 'ofxs_gerados'
 OFXS_CATEGORIZADOS_DIR = BASE_DIR / 'ofxs_categorizados'
+OFXS_CONSOLIDADOS_DIR = BASE_DIR / 'ofxs_consolidados'
 TEMP_DIR = BASE_DIR / 'temp'
+# Fica fora de TEMP_DIR, que é esvaziado ao final de cada execução
+CACHE_DIR = BASE_DIR / 'cache'
+CONVERSION_MANIFEST_PATH = OFXS_DIR / '.conversion_manifest.json'
+CATEGORIZATION_MANIFEST_PATH = OFXS_CATEGORIZADOS_DIR / '.categorization_manifest.json'
+# Estatísticas gravadas por categorize_smart.py, lidas sem reabrir os OFX
+CATEGORIZATION_STATS_PATH = OFXS_CATEGORIZADOS_DIR / 'categorization_stats.json'
 
 # Configurações de bancos
 BANK_CONFIGS = {
@@ -21,7 +28,12 @@ BANK_CONFIGS = {
         'account': '052607-3',
         'bank_id': '0260',
         'org': 'ITAÚ UNIBANCO S.A.',
-        'fid': '260'
+        'fid': '260',
+        # Trechos (em minúsculas) que identificam o banco pelo conteúdo do PDF
+        'fingerprints': {
+            'metadata': ('itaú', 'itau'),
+            'first_page': ('itaú unibanco', 'itau unibanco')
+        }
     },
     'mercadopago': {
         'name': 'Mercado Pago',
@@ -29,7 +41,11 @@ BANK_CONFIGS = {
         'account': '74645773646',
         'bank_id': '323',
         'org': 'MERCADO PAGO INSTITUIÇÃO DE PAGAMENTO LTDA.',
-        'fid': '323'
+        'fid': '323',
+        'fingerprints': {
+            'metadata': ('mercado pago', 'mercadopago'),
+            'first_page': ('mercado pago', 'mercadopago', 'id da operação')
+        }
     }
 }
 
@@ -58,5 +74,32 @@ LOG_CONFIG = {
 PROCESSING_CONFIG = {
     'max_file_size_mb': 50,
     'supported_extensions': ['.pdf'],
-    'temp_cleanup_enabled': True
-} 
\ No newline at end of file
+    'temp_cleanup_enabled': True,
+    # Backend de extração de texto: 'pdfplumber' ou 'pdfminer' (somente texto, mais rápido).
+    # Pode ser definido por banco com a chave 'text_backend' em BANK_CONFIGS.
+    'pdf_text_backend': 'pdfplumber',
+    # Extração paralela de páginas dentro de um mesmo PDF. Com --workers > 1 o
+    # limite passa a ser --workers, dividido entre os PDFs ainda em conversão:
+    # os processos ociosos no fim do lote ajudam a extrair os últimos PDFs
+    'parallel_extraction_min_pages': 150,
+    'parallel_extraction_workers': 4,
+    'parallel_extraction_chunk_pages': 25,
+    # Escrita do OFX: transações por bloco de escrita, tamanho até o qual o
+    # arquivo temporário fica em memória e buffer da cópia para o arquivo final
+    'ofx_write_chunk_transactions': 1000,
+    'ofx_spool_max_bytes': 8 * 1024 * 1024,
+    'ofx_copy_buffer_bytes': 1024 * 1024,
+    # Sidecar com as transações de cada OFX ('csv', 'jsonl' ou None para desativar),
+    # lido pelos scripts de categorização no lugar do OFX
+    'sidecar_format': 'jsonl',
+    # Consolidação: transações ordenadas em memória por vez quando um OFX não
+    # está em ordem de data; os blocos ordenados vão para arquivos em TEMP_DIR
+    'consolidation_sort_run': 50000
+}
+
+# Configurações de cache
+CACHE_CONFIG = {
+    'extraction_cache_enabled': True,
+    'extraction_cache_file': 'extraction_cache.sqlite3',
+    'compression_level': 6
+}
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Script para consolidar os OFX gerados em um único OFX, com um extrato por conta.
+"""
+
+import argparse
+from pathlib import Path
+from config import OFXS_DIR, OFXS_CONSOLIDADOS_DIR
+from services.logger import StructuredLogger
+from services.ofx_consolidator import OFXConsolidator
+from writers.consolidated_ofx_writer import ConsolidatedOFXWriter
+
+class ConsolidateOFXApp:
+    """Consolida os OFX por conta (BANKID/ACCTID) em ordem de data."""
+
+    def __init__(self, input_dir: Path, output_path: Path, dedupe: bool = False):
+        self.logger = StructuredLogger()
+        self.input_dir = input_dir
+        self.output_path = output_path
+        self.consolidator = OFXConsolidator(self.logger, dedupe=dedupe)
+        self.writer = ConsolidatedOFXWriter()
+
+    def run(self) -> None:
+        """Executa a consolidação."""
+        try:
+            ofx_files = self._find_ofx_files()
+            if not ofx_files:
+                self.logger.warning(f"Nenhum arquivo OFX encontrado em {self.input_dir}")
+                return
+            statements = self.consolidator.scan(ofx_files)
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+            count = self.writer.write(statements, str(self.output_path))
+            self._log_summary(ofx_files, statements, count)
+        except Exception as e:
+            self.logger.error(f"Erro crítico na aplicação: {e}")
+            raise
+
+    def _find_ofx_files(self):
+        if not self.input_dir.exists():
+            raise FileNotFoundError(f"Diretório {self.input_dir} não encontrado")
+        return sorted(
+            path for path in self.input_dir.glob("*.ofx")
+            if path.resolve() != self.output_path.resolve()
+        )
+
+    def _log_summary(self, ofx_files, statements, count: int) -> None:
+        self.logger.info("=" * 60)
+        self.logger.info("RESUMO DA CONSOLIDAÇÃO")
+        self.logger.info("=" * 60)
+        self.logger.info(f"Arquivos lidos: {len(ofx_files)}")
+        for statement in statements:
+            account = statement.account
+            self.logger.info(
+                f"Conta {account.bank_id}/{account.account_id}: {len(statement.inputs)} extrato(s), "
+                f"{statement.dt_start} a {statement.dt_end}"
+            )
+        if self.consolidator.dedupe:
+            self.logger.info(f"Transações duplicadas removidas: {self.consolidator.duplicates_removed}")
+        self.logger.info(f"Transações escritas: {count}")
+        self.logger.info(f"Arquivo gerado: {self.output_path}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Consolida os OFX gerados em um único OFX por conta, em ordem de data",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  python consolidate_ofx.py
+  python consolidate_ofx.py --input-dir ofxs_categorizados
+  python consolidate_ofx.py --dedupe --output ofxs_consolidados/2024.ofx
+        """
+    )
+    parser.add_argument(
+        "--input-dir",
+        type=Path,
+        default=OFXS_DIR,
+        help="Diretório com os OFX a consolidar (padrão: ofxs_gerados)"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=OFXS_CONSOLIDADOS_DIR / "consolidado.ofx",
+        help="Arquivo OFX consolidado (padrão: ofxs_consolidados/consolidado.ofx)"
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Remove transações repetidas entre extratos com períodos sobrepostos"
+    )
+    args = parser.parse_args()
+
+    app = ConsolidateOFXApp(args.input_dir, args.output, dedupe=args.dedupe)
+    app.run()
+
+if __name__ == '__main__':
+    main()
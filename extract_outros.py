@@ -6,10 +6,12 @@ Script para extrair todas as transações classificadas como "Outros" e gerar um
 import csv
 import argparse
 from pathlib import Path
-from typing import List, Dict
-from ofxparse import OfxParser
+from typing import Dict, Iterator, List
 from services.logger import StructuredLogger
+from parsers.ofx_parser import OFXParserImpl
+from services.sidecar import find_sidecar, read_sidecar
 from services.smart_keyword_categorizer import SmartKeywordCategorizer
+from datetime import datetime
 import hashlib
 
 class ExtractOutrosTransactions:
@@ -18,6 +20,7 @@ class ExtractOutrosTransactions:
     def __init__(self):
         self.logger = StructuredLogger()
         self.categorizer = SmartKeywordCategorizer(self.logger)
+        self.ofx_reader = OFXParserImpl()
         self.ofxs_dir = Path("ofxs_gerados")
         self.output_file = Path("csv_reports/transacoes_outros.csv")
         self.transaction_counter = 0
@@ -86,30 +89,12 @@ class ExtractOutrosTransactions:
     def _process_single_file(self, outros_transactions: List[Dict], ofx_file: Path) -> int:
         """Processa um único arquivo OFX e extrai transações 'Outros'."""
         try:
-            # Lê o arquivo OFX usando ofxparse com diferentes encodings
-            encodings_to_try = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-            parsed_ofx = None
-            
-            for encoding in encodings_to_try:
-                try:
-                    with open(ofx_file, 'r', encoding=encoding, errors='ignore') as file:
-                        ofx = OfxParser()
-                        parsed_ofx = ofx.parse(file)
-                    break  # Se chegou aqui, o encoding funcionou
-                except UnicodeDecodeError:
-                    continue
-                except Exception as e:
-                    # Se não for erro de encoding, tenta o próximo
-                    if 'codec' in str(e).lower():
-                        continue
-                    else:
-                        raise e
-            
-            if parsed_ofx is None:
-                raise Exception("Não foi possível ler o arquivo com nenhum encoding suportado")
-            
-            # Extrai transações
-            transactions = self._extract_transactions_from_ofx(parsed_ofx)
+            # O sidecar gerado junto com o OFX dispensa reprocessar o OFX
+            sidecar = find_sidecar(ofx_file)
+            if sidecar:
+                transactions = self._extract_transactions_from_sidecar(sidecar)
+            else:
+                transactions = self._read_ofx_transactions(ofx_file)
             
             if not transactions:
                 return 0
@@ -140,24 +125,33 @@ class ExtractOutrosTransactions:
             self.logger.error(f"Erro ao processar {ofx_file.name}: {e}")
             return 0
     
-    def _extract_transactions_from_ofx(self, parsed_ofx) -> List[Dict]:
-        """Extrai todas as transações do arquivo OFX usando ofxparse."""
-        transactions = []
-        
-        # Tenta extrair de diferentes tipos de conta
-        for account in parsed_ofx.accounts:
-            if hasattr(account, 'statement') and account.statement:
-                for transaction in account.statement.transactions:
-                    transaction_dict = {
-                        'description': transaction.memo or transaction.type or '',
-                        'amount': float(transaction.amount) if transaction.amount else 0.0,
-                        'date': transaction.date,
-                        'type': transaction.type,
-                        'id': transaction.id if hasattr(transaction, 'id') else None
-                    }
-                    transactions.append(transaction_dict)
-        
-        return transactions
+    def _read_ofx_transactions(self, ofx_file: Path) -> Iterator[Dict]:
+        """Lê as transações do arquivo OFX com o leitor nativo, uma a uma."""
+        dates = {}
+        for transaction in self.ofx_reader.iter_transactions(ofx_file):
+            date = dates.get(transaction.date)
+            if date is None:
+                date = dates[transaction.date] = datetime.strptime(transaction.date, '%Y%m%d')
+            yield {
+                'description': transaction.description,
+                'amount': transaction.amount,
+                'date': date,
+                'type': transaction.trntype,
+                'id': transaction.fitid or None
+            }
+    
+    def _extract_transactions_from_sidecar(self, sidecar: Path) -> List[Dict]:
+        """Extrai as transações do sidecar gravado na conversão do PDF."""
+        return [
+            {
+                'description': row['description'],
+                'amount': row['amount'],
+                'date': datetime.strptime(row['date'], '%Y%m%d'),
+                'type': None,
+                'id': row['fitid']
+            }
+            for row in read_sidecar(sidecar)
+        ]
     
     def _save_csv(self, outros_transactions: List[Dict]) -> None:
         """Salva as transações 'Outros' em um arquivo CSV."""
@@ -4,7 +4,7 @@ Seguindo o princípio de Dependency Inversion.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Protocol
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Protocol, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -19,6 +19,10 @@ class Transaction:
     category: str = ""  # Categoria da transação (adicionado para categorização)
     fitid: str = ""  # ID único da transação (opcional, para correspondência precisa)
 
+@dataclass
+class CategorizedTransaction(Transaction):
+    """Transação com a categoria atribuída pelo categorizador (campo category)."""
+
 @dataclass
 class AccountData:
     """Representa dados da conta bancária."""
@@ -37,6 +41,9 @@ class ProcessingResult:
     bank_name: str
     transactions_count: int
     error_message: str = ""
+    output_path: str = ""
+    cache_hits: int = 0
+    cache_misses: int = 0
 
 class BankParser(ABC):
     """Interface para parsers de bancos."""
@@ -50,13 +57,70 @@ class BankParser(ABC):
     def parse(self, file_path: str) -> tuple[List[Transaction], AccountData]:
         """Processa o arquivo PDF e retorna transações e dados da conta."""
         pass
+    
+    def parse_stream(self, file_path: str) -> Tuple[Iterator[Transaction], AccountData]:
+        """
+        Como parse, mas as transações são geradas sob demanda.
+        Parsers que não suportam streaming materializam a lista.
+        """
+        transactions, account_data = self.parse(file_path)
+        return iter(transactions), account_data
+    
+    @property
+    def version(self) -> str:
+        """Versão do parser; quando muda, conversões anteriores deixam de ser válidas."""
+        return ""
+
+class PDFTextDocument(ABC):
+    """Documento PDF aberto por um backend de extração de texto."""
+    
+    page_count: int = 0
+    
+    @abstractmethod
+    def iter_page_texts(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        """Gera o texto de cada página no intervalo [start, end), em ordem."""
+        pass
+    
+    def metadata(self) -> Dict[str, str]:
+        """Retorna os metadados do documento (Producer, Creator, Title...)."""
+        return {}
+    
+    @abstractmethod
+    def close(self) -> None:
+        """Libera os recursos do documento."""
+        pass
+    
+    def __enter__(self) -> 'PDFTextDocument':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+class PDFTextBackend(ABC):
+    """Interface para backends de extração de texto de PDFs."""
+    
+    name: str = ""
+    version: str = ""
+    
+    @abstractmethod
+    def open(self, file_path: str) -> PDFTextDocument:
+        """Abre o PDF para extração de texto."""
+        pass
 
 class OFXWriter(ABC):
     """Interface para escritores OFX."""
     
     @abstractmethod
-    def write(self, transactions: List[Transaction], account_data: AccountData, output_path: str) -> None:
-        """Escreve as transações em formato OFX."""
+    def write(self, transactions: Iterable[Transaction], account_data: AccountData, output_path: str) -> int:
+        """Escreve as transações em formato OFX e retorna quantas foram escritas."""
+        pass
+
+class CategorizedOFXWriter(ABC):
+    """Interface para escritores de OFX categorizado."""
+    
+    @abstractmethod
+    def write(self, transactions: Iterable[CategorizedTransaction], account_data: AccountData, output_path: str) -> int:
+        """Escreve as transações categorizadas em formato OFX e retorna quantas foram escritas."""
         pass
 
 class FileProcessor(ABC):
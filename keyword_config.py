@@ -218,6 +218,9 @@ TEXT_CLEANING = {
 # Configuração de score mínimo para categorização
 MIN_SCORE_THRESHOLD = 0.3
 
+# Descrições categorizadas mantidas em cache (LRU) pelo categorizador; 0 desativa (não pode ser negativo)
+CATEGORIZATION_CACHE_SIZE = 10000
+
 # Configuração de eficácia desejada
 EFFICIENCY_TARGETS = {
     "excellent": 30,  # Menos de 30% em "Outros" = Excelente
@@ -2,20 +2,31 @@
 Aplicação principal para conversão de extratos PDF para OFX.
 """
 
-from config import PDFS_DIR, OFXS_DIR
+import argparse
+from pathlib import Path
+from typing import Optional
+from config import PDFS_DIR, OFXS_DIR, CONVERSION_MANIFEST_PATH, PROCESSING_CONFIG
 from services.logger import StructuredLogger
 from services.file_validator import PDFFileValidator
 from services.file_processor import PDFFileProcessor
 from services.cleanup_service import CleanupService
+from services.manifest import ConversionManifest
+from services.parallel_processor import ParallelPDFProcessor
+from services.sidecar import remove_sidecars, sidecar_path
+from parsers.text_backends import TEXT_BACKENDS
 from writers.ofx_writer import OFXWriterRefactored
 
 class Extrato2OFXApp:
-    def __init__(self):
+    def __init__(self, workers: int = 1, force: bool = False, text_backend: Optional[str] = None):
+        self.workers = workers
+        self.force = force
+        self.text_backend = text_backend
         self.logger = StructuredLogger()
         self.ofx_writer = OFXWriterRefactored()
-        self.file_processor = PDFFileProcessor(self.ofx_writer, self.logger)
+        self.file_processor = PDFFileProcessor(self.ofx_writer, self.logger, text_backend)
         self.cleanup_service = CleanupService(self.logger)
         self.file_validator = PDFFileValidator()
+        self.manifest = ConversionManifest(CONVERSION_MANIFEST_PATH)
     
     def run(self) -> None:
         try:
@@ -35,22 +46,101 @@ class Extrato2OFXApp:
     def _process_pdf_files(self) -> None:
         self.logger.info("Iniciando conversão de PDFs em OFX...")
         pdf_files = self._get_valid_pdf_files()
+        self._remove_orphaned_outputs()
         if not pdf_files:
             self.logger.warning("Nenhum arquivo PDF válido encontrado")
+            self.manifest.save()
             return
         self.logger.info(f"Encontrados {len(pdf_files)} arquivos PDF para processar")
+        stale_files = self._select_stale_files(pdf_files)
+        up_to_date = len(pdf_files) - len(stale_files)
+        if up_to_date:
+            self.logger.info(
+                f"{up_to_date} arquivos já convertidos e inalterados foram ignorados "
+                f"(use --force para reconverter)"
+            )
+        file_paths = list(stale_files.keys())
+        results = self._convert_files(file_paths)
+        for file_path, result in zip(file_paths, results):
+            bank_name, parser_version = stale_files[file_path]
+            if result.success and parser_version:
+                self.manifest.record(file_path, bank_name, parser_version, result.output_path)
+        self.manifest.save()
         successful_conversions = 0
         failed_conversions = 0
-        for pdf_file in pdf_files:
-            result = self.file_processor.process_file(str(pdf_file))
+        cache_hits = 0
+        cache_misses = 0
+        for result in results:
             if result.success:
                 successful_conversions += 1
             else:
                 failed_conversions += 1
+            cache_hits += result.cache_hits
+            cache_misses += result.cache_misses
         self.logger.info(
             f"Processamento concluído: {successful_conversions} sucessos, "
             f"{failed_conversions} falhas"
         )
+        self.logger.info(
+            f"Cache de extração: {cache_hits} acertos, {cache_misses} perdas"
+        )
+    
+    def _select_stale_files(self, pdf_files):
+        """
+        Retorna, em ordem, os PDFs que precisam de conversão, com o banco e a
+        versão do parser de cada um.
+
+        O banco registrado no manifesto basta para conferir um PDF inalterado;
+        a identificação (que pode ler o conteúdo do PDF) só roda para os PDFs
+        sem registro ou que precisam ser reconvertidos.
+        """
+        bank_identifier = self.file_processor.bank_identifier
+        stale_files = {}
+        for pdf_file in pdf_files:
+            file_path = str(pdf_file)
+            entry = None if self.force else self.manifest.get(file_path)
+            if entry and entry.bank_name and self._is_up_to_date(file_path, entry.bank_name):
+                continue
+            bank_name = bank_identifier.identify_bank(file_path)
+            parser_version = bank_identifier.get_parser_version(bank_name) if bank_name else None
+            if entry and not entry.bank_name and bank_name and self._is_up_to_date(file_path, bank_name):
+                # Registro de versão anterior, sem o banco: completado uma única vez
+                self.manifest.record(file_path, bank_name, parser_version, entry.output_path)
+                continue
+            stale_files[file_path] = (bank_name, parser_version)
+        return stale_files
+    
+    def _is_up_to_date(self, file_path: str, bank_name: str) -> bool:
+        """Verifica se a conversão registrada do PDF ainda vale para o parser atual do banco."""
+        parser_version = self.file_processor.bank_identifier.get_parser_version(bank_name)
+        return (parser_version is not None
+                and self.manifest.is_up_to_date(file_path, parser_version)
+                and self._has_sidecar(file_path))
+    
+    def _has_sidecar(self, file_path: str) -> bool:
+        """Verifica se a conversão registrada já tem o sidecar no formato configurado."""
+        sidecar_format = PROCESSING_CONFIG['sidecar_format']
+        if not sidecar_format:
+            return True
+        entry = self.manifest.get(file_path)
+        return entry is not None and sidecar_path(entry.output_path, sidecar_format).exists()
+    
+    def _remove_orphaned_outputs(self) -> None:
+        """Apaga as saídas (OFX e sidecars) de PDFs que não existem mais."""
+        if not PDFS_DIR.exists():
+            return
+        for entry in self.manifest.remove_orphans():
+            output_path = Path(entry.output_path)
+            if output_path.exists():
+                output_path.unlink()
+                self.logger.info(f"OFX órfão removido: {output_path.name}")
+            remove_sidecars(str(output_path))
+    
+    def _convert_files(self, file_paths):
+        if self.workers > 1 and len(file_paths) > 1:
+            self.logger.info(f"Convertendo em paralelo com {self.workers} processos")
+            return ParallelPDFProcessor(self.logger, self.workers, self.text_backend).process_files(file_paths)
+        return [self.file_processor.process_file(file_path) for file_path in file_paths]
     
     def _get_valid_pdf_files(self):
         if not PDFS_DIR.exists():
@@ -60,7 +150,7 @@ class Extrato2OFXApp:
         for file_path in PDFS_DIR.iterdir():
             if self.file_validator.is_valid_file(str(file_path)):
                 valid_files.append(file_path)
-        return valid_files
+        return sorted(valid_files)
     
     def _cleanup_temp_files(self) -> None:
         self.cleanup_service.cleanup_temp_directory()
@@ -69,7 +159,39 @@ class Extrato2OFXApp:
         self.logger.info(f"Conversão concluída. Arquivos OFX gerados em: {OFXS_DIR}")
 
 def main():
-    app = Extrato2OFXApp()
+    parser = argparse.ArgumentParser(
+        description="Converte extratos bancários em PDF para OFX",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  python main.py
+  python main.py --workers 4
+  python main.py --force
+  python main.py --backend pdfminer
+        """
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Número de processos para converter PDFs em paralelo (padrão: 1)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reconverte todos os PDFs, mesmo os que não mudaram desde a última execução"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(TEXT_BACKENDS),
+        default=None,
+        help="Backend de extração de texto para todos os bancos (padrão: o configurado por banco)"
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers deve ser maior ou igual a 1")
+    
+    app = Extrato2OFXApp(workers=args.workers, force=args.force, text_backend=args.backend)
     app.run()
 
 if __name__ == '__main__':
@@ -1,2 +1,3 @@
 # Pacote parsers - Versão refatorada
-from . import itau, mercadopago, base_parser 
\ No newline at end of file
+# Os parsers de bancos são importados sob demanda por services.bank_identifier
+from . import base_parser
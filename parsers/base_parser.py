@@ -3,18 +3,118 @@ Parser base com funcionalidades comuns.
 """
 
 from abc import ABC
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from interfaces import BankParser, Transaction, AccountData
-from config import BANK_CONFIGS
+from typing import Iterable, Iterator, List, Optional, Tuple
+from interfaces import BankParser, Transaction, AccountData, PDFTextBackend
+from config import BANK_CONFIGS, PROCESSING_CONFIG
+from parsers.line_grammar import LineGrammar, LineGrammarEngine
+from parsers.text_backends import get_text_backend
+
+# Deve ser incrementada sempre que a extração mudar o texto produzido
+EXTRACTOR_VERSION = '2'
+
+def build_extractor_signature(backend: PDFTextBackend) -> str:
+    """Identifica o texto produzido por um backend nas chaves de cache."""
+    return f"{EXTRACTOR_VERSION}:{backend.name}-{backend.version}"
+
+class PageBudget:
+    """
+    Limite de processos para extrair as páginas de um PDF grande.
+
+    A conversão sequencial usa um limite fixo; a conversão paralela usa uma
+    subclasse cujo limite cresce à medida que os outros PDFs do lote terminam.
+    """
+    
+    def __init__(self, workers: int):
+        # Máximo de processos que a extração de um PDF pode chegar a usar
+        self.workers = workers
+    
+    def available(self) -> int:
+        """Processos que a extração de páginas pode ocupar agora (no mínimo 1)."""
+        return self.workers
 
 class BaseParser(BankParser, ABC):
+    # Deve ser incrementada sempre que o parser mudar as transações geradas
+    PARSER_VERSION = '1'
+    # Gramática das linhas de transação, declarada por cada banco; um parser
+    # sem gramática precisa sobrescrever _iter_transactions
+    GRAMMAR: Optional[LineGrammar] = None
+    
     def __init__(self, bank_name: str):
+        if self.GRAMMAR is None and type(self)._iter_transactions is BaseParser._iter_transactions:
+            raise TypeError(
+                f"{type(self).__name__} deve declarar GRAMMAR ou sobrescrever _iter_transactions"
+            )
         self.bank_name = bank_name
         self.bank_config = BANK_CONFIGS.get(bank_name, {})
+        self.text_backend = get_text_backend(
+            self.bank_config.get('text_backend', PROCESSING_CONFIG['pdf_text_backend'])
+        )
+        self.page_budget = PageBudget(PROCESSING_CONFIG['parallel_extraction_workers'])
+        self._engine = LineGrammarEngine(self.GRAMMAR) if self.GRAMMAR else None
+        # Extratos repetem poucas datas distintas; evita um strptime por transação
+        self._iso_dates = {}
+    
+    def parse(self, file_path: str):
+        lines = self._iter_lines_from_pdf(file_path)
+        transactions = self._parse_transactions(lines)
+        account_data = self._create_account_data()
+        return transactions, account_data
+    
+    def parse_stream(self, file_path: str) -> Tuple[Iterator[Transaction], AccountData]:
+        """Gera as transações à medida que as páginas são extraídas."""
+        lines = self._iter_lines_from_pdf(file_path)
+        return self._iter_transactions(lines), self._create_account_data()
+    
+    def _parse_transactions(self, lines: Iterable[str]) -> List[Transaction]:
+        return list(self._iter_transactions(lines))
+    
+    def _iter_transactions(self, lines: Iterable[str]) -> Iterator[Transaction]:
+        for match in self._engine.iter_matches(lines):
+            transaction = self._build_transaction(match)
+            if transaction:
+                yield transaction
+    
+    def _build_transaction(self, match) -> Optional[Transaction]:
+        date_str = match.group('date')
+        description = match.group('description').strip()
+        try:
+            amount = self._parse_amount(match.group('amount'))
+            transaction_type = 'saída' if amount < 0 else 'entrada'
+            amount = self._normalize_amount(amount, transaction_type)
+            date_iso = self._convert_date_to_iso(date_str)
+            trntype = self._determine_trntype(transaction_type)
+            return Transaction(
+                date=date_iso,
+                amount=amount,
+                description=description,
+                transaction_type=transaction_type,
+                trntype=trntype
+            )
+        except (ValueError, TypeError):
+            return None
+    
+    def _parse_amount(self, amount_str: str) -> float:
+        clean_amount = amount_str.replace('.', '').replace(',', '.')
+        return float(clean_amount)
+    
+    def use_text_backend(self, backend_name: str) -> None:
+        """Troca o backend de extração de texto deste parser."""
+        self.text_backend = get_text_backend(backend_name)
+    
+    def use_page_budget(self, page_budget: PageBudget) -> None:
+        """Define quantos processos a extração de páginas de um PDF grande pode usar."""
+        self.page_budget = page_budget
     
     def can_parse(self, file_name: str) -> bool:
         return self.bank_name.lower() in file_name.lower()
     
+    @property
+    def version(self) -> str:
+        return f"{self.bank_name}-{self.PARSER_VERSION}/{self._extractor_signature()}"
+    
     def _create_account_data(self) -> AccountData:
         return AccountData(
             bank_name=self.bank_config.get('name', self.bank_name.title()),
@@ -26,6 +126,13 @@ class BaseParser(BankParser, ABC):
         )
     
     def _convert_date_to_iso(self, date_str: str) -> str:
+        date_iso = self._iso_dates.get(date_str)
+        if date_iso is None:
+            date_iso = self._parse_date_to_iso(date_str)
+            self._iso_dates[date_str] = date_iso
+        return date_iso
+    
+    def _parse_date_to_iso(self, date_str: str) -> str:
         try:
             date_obj = datetime.strptime(date_str, '%d/%m/%Y')
             return date_obj.strftime('%Y%m%d')
@@ -46,11 +153,110 @@ class BaseParser(BankParser, ABC):
         return 'CREDIT' if transaction_type == 'entrada' else 'DEBIT'
     
     def _extract_text_from_pdf(self, file_path: str) -> str:
-        import pdfplumber
-        with pdfplumber.open(file_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        return text 
\ No newline at end of file
+        return "\n".join(self._iter_page_texts(file_path))
+    
+    def _iter_lines_from_pdf(self, file_path: str) -> Iterator[str]:
+        """Gera as linhas não vazias do PDF, uma página por vez."""
+        for page_text in self._iter_page_texts(file_path):
+            for line in page_text.split('\n'):
+                line = line.strip()
+                if line:
+                    yield line
+    
+    def _iter_page_texts(self, file_path: str) -> Iterator[str]:
+        """Gera o texto de cada página, usando o cache de extração quando disponível."""
+        # Importação tardia: o pacote services importa os parsers
+        from services.extraction_cache import ExtractionCache, get_extraction_cache
+        from services.file_hasher import compute_file_hash
+        cache = get_extraction_cache()
+        if cache is None:
+            yield from self._extract_page_texts(file_path)
+            return
+        key = ExtractionCache.make_key(compute_file_hash(file_path), self._extractor_signature())
+        cached_pages = cache.get_pages(key)
+        if cached_pages is not None:
+            yield from cached_pages
+            return
+        # A identificação do banco pode já ter extraído a primeira página
+        first_page = cache.get_first_page(key)
+        yield from cache.store_pages(key, self._extract_page_texts(file_path, first_page))
+    
+    def _extractor_signature(self) -> str:
+        return build_extractor_signature(self.text_backend)
+    
+    def _extract_page_texts(self, file_path: str, first_page: Optional[str] = None) -> Iterator[str]:
+        """
+        Extrai o texto de cada página, em ordem.
+        
+        Se first_page for informado, ele é usado como texto da primeira
+        página e a extração começa na segunda.
+        
+        Documentos com muitas páginas têm as faixas de páginas extraídas em
+        processos separados, até o limite de self.page_budget; os textos são
+        reagrupados na ordem das páginas antes de chegar aos parsers, então
+        linhas de continuação que cruzam a fronteira entre faixas são
+        tratadas como na extração sequencial.
+        """
+        start = 0
+        if first_page is not None:
+            if first_page:
+                yield first_page
+            start = 1
+        with self.text_backend.open(file_path) as document:
+            page_count = document.page_count
+            if not self._should_split_extraction(page_count - start):
+                for page_text in document.iter_page_texts(start):
+                    if page_text:
+                        yield page_text
+                return
+        yield from self._extract_page_texts_parallel(file_path, start, page_count)
+    
+    def _should_split_extraction(self, page_count: int) -> bool:
+        return (self.page_budget.workers > 1 and
+                page_count >= PROCESSING_CONFIG['parallel_extraction_min_pages'])
+    
+    def _extract_page_texts_parallel(self, file_path: str, first_page_index: int,
+                                     page_count: int) -> Iterator[str]:
+        """
+        Extrai as faixas de páginas em ordem, com tantas faixas em andamento
+        quanto o limite atual de self.page_budget.
+
+        O limite é consultado de novo a cada faixa concluída, então um PDF que
+        começou com um único processo passa a usar os que forem liberados.
+        Com limite 1 e nenhuma faixa pendente, a faixa é extraída neste processo.
+        """
+        chunk_pages = PROCESSING_CONFIG['parallel_extraction_chunk_pages']
+        page_ranges = deque(
+            (start, min(start + chunk_pages, page_count))
+            for start in range(first_page_index, page_count, chunk_pages)
+        )
+        backend_name = self.text_backend.name
+        in_flight = deque()
+        executor = None
+        try:
+            while page_ranges or in_flight:
+                budget = self.page_budget.available()
+                if budget > 1 and page_ranges:
+                    if executor is None:
+                        executor = ProcessPoolExecutor(max_workers=self.page_budget.workers)
+                    while page_ranges and len(in_flight) < budget:
+                        start, end = page_ranges.popleft()
+                        in_flight.append(executor.submit(_extract_page_range, backend_name, file_path, start, end))
+                if in_flight:
+                    yield from in_flight.popleft().result()
+                else:
+                    start, end = page_ranges.popleft()
+                    yield from _extract_page_range(backend_name, file_path, start, end)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+def _extract_page_range(backend_name: str, file_path: str, start: int, end: int) -> List[str]:
+    """
+    Ponto de entrada dos processos de extração paralela: extrai o texto não
+    vazio das páginas no intervalo [start, end).
+
+    Recebe apenas o nome do backend, não o parser inteiro.
+    """
+    with get_text_backend(backend_name).open(file_path) as document:
+        return [page_text for page_text in document.iter_page_texts(start, end) if page_text]
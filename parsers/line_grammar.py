@@ -0,0 +1,109 @@
+"""
+Motor de gramáticas de linha compartilhado pelos parsers de bancos.
+Cada banco declara sua gramática uma vez; os padrões são compilados
+em um autômato de passada única sobre as linhas do extrato.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Tuple
+
+@dataclass(frozen=True)
+class LineGrammar:
+    """
+    Gramática declarativa das linhas de transação de um extrato.
+
+    row: regex aplicada a cada registro montado; deve ter os grupos
+        nomeados date, description e amount.
+    header_prefixes: linhas que começam com um destes prefixos são descartadas.
+    record_start: linhas que abrem um novo registro. Se None, cada linha é
+        um registro completo e apenas `row` é avaliada.
+    record_anchor: linhas que começam com este padrão (ex.: uma data) nunca
+        são continuação nem descrição antecedente.
+    continuation: linhas anexadas ao registro corrente.
+    leading_description: se True, uma linha sem valor que precede
+        imediatamente o início de um registro é incorporada a ele.
+    skipped_descriptions: trechos (em minúsculas) que descartam o registro
+        quando aparecem na descrição.
+    """
+    row: str
+    header_prefixes: Tuple[str, ...] = ()
+    record_start: Optional[str] = None
+    record_anchor: Optional[str] = None
+    continuation: Optional[str] = None
+    leading_description: bool = False
+    skipped_descriptions: Tuple[str, ...] = ()
+
+class LineGrammarEngine:
+    """Executa uma LineGrammar compilada sobre um fluxo de linhas."""
+
+    def __init__(self, grammar: LineGrammar):
+        self.grammar = grammar
+        self._row = re.compile(grammar.row)
+        self._header_prefixes = grammar.header_prefixes
+        self._record_start = re.compile(grammar.record_start) if grammar.record_start else None
+        self._record_anchor = re.compile(grammar.record_anchor) if grammar.record_anchor else None
+        self._continuation = re.compile(grammar.continuation) if grammar.continuation else None
+        self._leading_description = grammar.leading_description
+        self._skipped_descriptions = grammar.skipped_descriptions
+
+    def iter_matches(self, lines: Iterable[str]) -> Iterator[re.Match]:
+        """Gera os matches de `row` para cada registro válido."""
+        row_search = self._row.search
+        skipped = self._skipped_descriptions
+        for record in self.iter_records(lines):
+            match = row_search(record)
+            if not match:
+                continue
+            if skipped:
+                description = match.group('description').lower()
+                if any(text in description for text in skipped):
+                    continue
+            yield match
+
+    def iter_records(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Monta os registros a partir das linhas, em uma única passada.
+
+        O registro corrente só é emitido quando o próximo começa (ou a
+        entrada termina), pois linhas de continuação ainda podem ser
+        anexadas a ele.
+        """
+        header_prefixes = self._header_prefixes
+        if self._record_start is None:
+            for line in lines:
+                if header_prefixes and line.startswith(header_prefixes):
+                    continue
+                yield line
+            return
+
+        record_start = self._record_start.search
+        anchor = self._record_anchor.match if self._record_anchor else None
+        continuation = self._continuation.search if self._continuation else None
+        leading_description = self._leading_description
+
+        current = None
+        pending = None
+        for line in lines:
+            if pending is not None:
+                description, pending = pending, None
+                if record_start(line):
+                    if current is not None:
+                        yield current
+                    current = description + ' ' + line
+                    continue
+            if header_prefixes and line.startswith(header_prefixes):
+                continue
+            if record_start(line):
+                if current is not None:
+                    yield current
+                current = line
+            elif anchor is not None and anchor(line):
+                continue
+            elif continuation is not None and continuation(line):
+                if current is not None:
+                    current += ' ' + line
+            elif leading_description:
+                pending = line
+        if current is not None:
+            yield current
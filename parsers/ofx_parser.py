@@ -1,126 +1,182 @@
 """
 Parser para arquivos OFX.
 Seguindo o princípio de Single Responsibility.
+
+O arquivo é lido em blocos e os STMTTRN são extraídos incrementalmente,
+então as transações são geradas uma a uma com memória constante. A mesma
+leitura atende OFX SGML (1.x, elementos sem tag de fechamento) e XML (2.x).
 """
 
 import re
-from typing import List
-from pathlib import Path
+from html import unescape
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
 from interfaces import Transaction, AccountData
+from services.ofx_ingest import open_ofx, repair_text
+
+# Tag de abertura com o texto até a próxima tag
+_OPEN = '<STMTTRN>'
+_CLOSE = '</STMTTRN>'
+_ELEMENT = re.compile(r'<([A-Za-z0-9._]+)>([^<]*)')
+_OPEN_BYTES = _OPEN.encode('ascii')
+_CLOSE_BYTES = _CLOSE.encode('ascii')
+_ELEMENT_BYTES = re.compile(_ELEMENT.pattern.encode('ascii'))
+_READ_CHUNK = 1024 * 1024
+_ACCOUNT_TAGS = frozenset(('ORG', 'FID', 'BANKID', 'BRANCHID', 'ACCTID'))
 
 class OFXParserImpl:
     """Implementação do parser de arquivos OFX."""
-    
+
     def parse(self, file_path: str) -> tuple[List[Transaction], AccountData]:
         """
         Processa o arquivo OFX e retorna transações e dados da conta.
-        
+
         Args:
             file_path: Caminho para o arquivo OFX
-            
+
         Returns:
             Tupla com lista de transações e dados da conta
         """
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-        
-        # Extrair dados da conta
-        account_data = self._extract_account_data(content)
-        
-        # Extrair transações
-        transactions = self._extract_transactions(content)
-        
-        return transactions, account_data
-    
-    def _extract_account_data(self, content: str) -> AccountData:
-        """Extrai dados da conta do conteúdo OFX."""
-        # Padrões para extrair dados da conta
-        org_pattern = r'<ORG>([^<]+)</ORG>'
-        fid_pattern = r'<FID>([^<]+)</FID>'
-        bankid_pattern = r'<BANKID>([^<]+)</BANKID>'
-        branchid_pattern = r'<BRANCHID>([^<]+)</BRANCHID>'
-        acctid_pattern = r'<ACCTID>([^<]+)</ACCTID>'
-        
-        # Extrair valores
-        org = re.search(org_pattern, content)
-        fid = re.search(fid_pattern, content)
-        bankid = re.search(bankid_pattern, content)
-        branchid = re.search(branchid_pattern, content)
-        acctid = re.search(acctid_pattern, content)
-        
+        account_fields: Dict[str, str] = {}
+        with open_ofx(file_path) as file:
+            transactions = list(self.read_transactions(file, account_fields))
+        return transactions, self._build_account_data(account_fields)
+
+    def iter_transactions(self, file_path: str) -> Iterator[Transaction]:
+        """Gera as transações do arquivo OFX uma a uma, sem carregá-lo em memória."""
+        with open_ofx(file_path) as file:
+            yield from self.read_transactions(file)
+
+    def read_transactions(self, file: TextIO,
+                          account_fields: Optional[Dict[str, str]] = None) -> Iterator[Transaction]:
+        """
+        Gera as transações de um OFX já aberto como texto.
+
+        Cada bloco lido é dividido nos STMTTRN; o último, que pode estar
+        incompleto, segue para o próximo bloco, então nenhuma transação fica
+        dividida entre dois blocos.
+
+        Args:
+            file: Arquivo ou buffer de texto com o OFX
+            account_fields: Se informado, recebe ORG, FID, BANKID, BRANCHID
+                e ACCTID encontrados fora das transações
+        """
+        find_fields = _ELEMENT.findall
+        build_transaction = self._build_transaction
+        collect = account_fields is not None
+        pending = ''
+        index = 0
+        while True:
+            chunk = file.read(_READ_CHUNK)
+            buffer = pending + chunk
+            segments = buffer.split(_OPEN)
+            pending = ''
+            if chunk:
+                if len(segments) > 1:
+                    # O último STMTTRN pode estar incompleto; segue para o próximo bloco
+                    pending = _OPEN + segments.pop()
+                else:
+                    cut = buffer.rfind('<')
+                    if cut >= 0:
+                        segments[0], pending = buffer[:cut], buffer[cut:]
+            if collect:
+                self._collect_account_fields(segments[0], account_fields)
+            for segment in segments[1:]:
+                close = segment.find(_CLOSE)
+                body = segment if close < 0 else segment[:close]
+                index += 1
+                transaction = build_transaction(dict(find_fields(body)), index)
+                if transaction:
+                    yield transaction
+                if collect and close >= 0:
+                    self._collect_account_fields(segment[close + len(_CLOSE):], account_fields)
+            if not chunk:
+                return
+
+    def index_transactions(self, data, encoding: str) -> Iterator[Tuple[Transaction, Optional[Tuple[int, int]]]]:
+        """
+        Gera as transações de um OFX em bytes (ex.: mmap), cada uma com o
+        intervalo [início, fim) em bytes do valor do seu MEMO, sem espaços
+        finais, ou None se a transação não tiver MEMO.
+
+        Só os campos de cada STMTTRN são decodificados; os intervalos
+        permitem reescrever o arquivo copiando os trechos sem alteração.
+        """
+        find = data.find
+        find_fields = _ELEMENT_BYTES.findall
+        build_transaction = self._build_transaction
+        size = len(data)
+        index = 0
+        position = find(_OPEN_BYTES)
+        while position >= 0:
+            start = position + len(_OPEN_BYTES)
+            next_open = find(_OPEN_BYTES, start)
+            end = find(_CLOSE_BYTES, start, next_open if next_open >= 0 else size)
+            if end < 0:
+                end = next_open if next_open >= 0 else size
+            fields = {
+                tag.decode('ascii'): value.decode(encoding, 'replace')
+                for tag, value in find_fields(data, start, end)
+            }
+            index += 1
+            transaction = build_transaction(fields, index)
+            if transaction:
+                memo_span = None
+                memo = find(b'<MEMO>', start, end)
+                if memo >= 0:
+                    value_start = memo + len(b'<MEMO>')
+                    value_end = find(b'<', value_start, end)
+                    if value_end < 0:
+                        value_end = end
+                    value_end = value_start + len(data[value_start:value_end].rstrip())
+                    memo_span = (value_start, value_end)
+                yield transaction, memo_span
+            position = next_open
+
+    def _collect_account_fields(self, text: str, account_fields: Dict[str, str]) -> None:
+        for tag, value in _ELEMENT.findall(text):
+            tag = tag.upper()
+            if tag in _ACCOUNT_TAGS:
+                account_fields.setdefault(tag, self._clean_value(value))
+
+    def _clean_value(self, text: str) -> str:
+        value = text.strip()
+        if not value.isascii():
+            value = repair_text(value)
+        if '&' in value:
+            value = unescape(value)
+        return value
+
+    def _build_account_data(self, account_fields: Dict[str, str]) -> AccountData:
+        """Monta os dados da conta a partir dos campos encontrados no OFX."""
+        org = account_fields.get('ORG', '')
         return AccountData(
-            bank_name=org.group(1) if org else "Banco",
-            agency=branchid.group(1) if branchid else "",
-            account=acctid.group(1) if acctid else "",
-            bank_id=bankid.group(1) if bankid else "",
-            org=org.group(1) if org else "",
-            fid=fid.group(1) if fid else ""
+            bank_name=org or "Banco",
+            agency=account_fields.get('BRANCHID', ''),
+            account=account_fields.get('ACCTID', ''),
+            bank_id=account_fields.get('BANKID', ''),
+            org=org,
+            fid=account_fields.get('FID', '')
         )
-    
-    def _extract_transactions(self, content: str) -> List[Transaction]:
-        """Extrai transações do conteúdo OFX."""
-        transactions = []
-        
-        # Padrão para encontrar blocos de transação - mais flexível
-        transaction_pattern = r'<STMTTRN>.*?</STMTTRN>'
-        transaction_blocks = re.findall(transaction_pattern, content, re.DOTALL)
-        
-        if not transaction_blocks:
-            # Tentar padrão alternativo
-            transaction_pattern = r'<STMTTRN>.*?<TRNTYPE>.*?</STMTTRN>'
-            transaction_blocks = re.findall(transaction_pattern, content, re.DOTALL)
-        
-        for i, block in enumerate(transaction_blocks):
-            try:
-                transaction = self._parse_transaction_block(block, i + 1)
-                if transaction:
-                    transactions.append(transaction)
-            except Exception as e:
-                # Log error but continue processing other transactions
-                print(f"Erro ao processar transação {i + 1}: {e}")
-                continue
-        
-        return transactions
-    
-    def _parse_transaction_block(self, block: str, index: int) -> Transaction:
-        """Processa um bloco de transação individual."""
-        # Padrões para extrair dados da transação - mais flexíveis
-        trntype_pattern = r'<TRNTYPE>([^<\n]+)'
-        dtposted_pattern = r'<DTPOSTED>([^<\n]+)'
-        trnamt_pattern = r'<TRNAMT>([^<\n]+)'
-        memo_pattern = r'<MEMO>([^<\n]+)'
-        fitid_pattern = r'<FITID>([^<\n]+)'
-        
-        # Extrair valores
-        trntype = re.search(trntype_pattern, block)
-        dtposted = re.search(dtposted_pattern, block)
-        trnamt = re.search(trnamt_pattern, block)
-        memo = re.search(memo_pattern, block)
-        fitid = re.search(fitid_pattern, block)
-        
-        if not all([trntype, dtposted, trnamt]):
-            raise ValueError(f"Dados obrigatórios não encontrados na transação {index}")
-        
-        # Processar tipo de transação
-        transaction_type = "entrada" if trntype.group(1).strip() == "CREDIT" else "saída"
-        
-        # Processar data (formato OFX: YYYYMMDDHHMMSS)
-        date_str = dtposted.group(1).strip()[:8]  # Pegar apenas YYYYMMDD
-        
-        # Processar valor
-        amount = float(trnamt.group(1).strip())
-        
-        # Processar descrição
-        description = memo.group(1).strip() if memo else f"Transação {index}"
-        
-        # Processar FITID
-        fitid_str = fitid.group(1).strip() if fitid else ""
-        
-        return Transaction(
-            date=date_str,
-            amount=amount,
-            description=description,
-            transaction_type=transaction_type,
-            trntype=trntype.group(1).strip(),
-            fitid=fitid_str
-        ) 
\ No newline at end of file
+
+    def _build_transaction(self, fields: Dict[str, str], index: int) -> Optional[Transaction]:
+        """Monta uma transação a partir dos campos de um bloco STMTTRN."""
+        try:
+            trntype = fields.get('TRNTYPE', '').strip()
+            dtposted = fields.get('DTPOSTED', '').strip()
+            trnamt = fields.get('TRNAMT', '').strip()
+            if not (trntype and dtposted and trnamt):
+                raise ValueError(f"Dados obrigatórios não encontrados na transação {index}")
+            memo = self._clean_value(fields.get('MEMO') or fields.get('NAME') or '')
+            return Transaction(
+                # Formato OFX: YYYYMMDDHHMMSS; só a data interessa
+                date=dtposted[:8],
+                amount=float(trnamt.replace(',', '.')),
+                description=memo or f"Transação {index}",
+                transaction_type="entrada" if trntype == "CREDIT" else "saída",
+                trntype=trntype,
+                fitid=self._clean_value(fields.get('FITID', ''))
+            )
+        except Exception as e:
+            # Log error but continue processing other transactions
+            print(f"Erro ao processar transação {index}: {e}")
+            return None
@@ -0,0 +1,154 @@
+"""
+Backends de extração de texto de PDFs.
+Seguindo o princípio de Open/Closed: novos backends são registrados em TEXT_BACKENDS.
+"""
+
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Type
+from interfaces import PDFTextBackend, PDFTextDocument
+
+class PdfplumberTextDocument(PDFTextDocument):
+    """Documento aberto com pdfplumber (modelo completo de caracteres e objetos)."""
+
+    def __init__(self, file_path: str):
+        import pdfplumber
+        self._pdf = pdfplumber.open(file_path)
+        self.page_count = len(self._pdf.pages)
+
+    def iter_page_texts(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        for page in self._pdf.pages[start:end]:
+            page_text = page.extract_text() or ""
+            self._release_page(page)
+            yield page_text
+
+    def metadata(self) -> Dict[str, str]:
+        return {key: str(value) for key, value in self._pdf.metadata.items() if value}
+
+    def close(self) -> None:
+        self._pdf.close()
+
+    def _release_page(self, page) -> None:
+        # pdfplumber >= 0.10 expõe close(); versões anteriores apenas flush_cache()
+        if hasattr(page, 'close'):
+            page.close()
+        else:
+            page.flush_cache()
+
+class PdfplumberBackend(PDFTextBackend):
+    """Backend padrão, com o mesmo texto de page.extract_text()."""
+
+    name = 'pdfplumber'
+    version = '1'
+
+    def open(self, file_path: str) -> PDFTextDocument:
+        return PdfplumberTextDocument(file_path)
+
+class PdfminerTextDocument(PDFTextDocument):
+    """
+    Documento aberto diretamente com pdfminer, sem o modelo de objetos do pdfplumber.
+
+    A análise de layout é reduzida ao mínimo: os caracteres de uma mesma
+    linha visual são agrupados em uma única linha de texto (char_margin
+    alto) e a ordenação hierárquica de blocos é desligada (boxes_flow=None);
+    as linhas são ordenadas de cima para baixo e da esquerda para a direita.
+    """
+
+    def __init__(self, file_path: str):
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdftypes import resolve1
+        self._file = open(file_path, 'rb')
+        try:
+            self._document = PDFDocument(PDFParser(self._file))
+            pages = resolve1(self._document.catalog.get('Pages'))
+            count = resolve1(pages.get('Count')) if isinstance(pages, dict) else None
+            if not isinstance(count, int):
+                count = sum(1 for _ in PDFPage.create_pages(self._document))
+            self.page_count = count
+        except Exception:
+            self._file.close()
+            raise
+
+    def iter_page_texts(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        from pdfminer.converter import PDFPageAggregator
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        laparams = LAParams(
+            line_overlap=0.5,
+            char_margin=1000.0,
+            line_margin=0.5,
+            word_margin=0.1,
+            boxes_flow=None,
+            detect_vertical=False,
+            all_texts=False
+        )
+        resource_manager = PDFResourceManager(caching=True)
+        device = PDFPageAggregator(resource_manager, laparams=laparams)
+        interpreter = PDFPageInterpreter(resource_manager, device)
+        for page in islice(PDFPage.create_pages(self._document), start, end):
+            interpreter.process_page(page)
+            yield self._layout_text(device.get_result())
+
+    def metadata(self) -> Dict[str, str]:
+        from pdfminer.pdftypes import resolve1
+        from pdfminer.psparser import PSLiteral
+        from pdfminer.utils import decode_text
+        metadata: Dict[str, str] = {}
+        for info in self._document.info:
+            for key, value in info.items():
+                value = resolve1(value)
+                if isinstance(value, bytes):
+                    value = decode_text(value)
+                elif isinstance(value, PSLiteral):
+                    value = value.name
+                if value:
+                    metadata[key] = str(value)
+        return metadata
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _layout_text(self, layout) -> str:
+        from pdfminer.layout import LTTextLine
+        text_lines: List = []
+        stack = [layout]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, LTTextLine):
+                text_lines.append(item)
+            elif hasattr(item, '__iter__'):
+                stack.extend(item)
+        text_lines.sort(key=lambda line: (-line.y1, line.x0))
+        return "\n".join(line.get_text().strip() for line in text_lines)
+
+class PdfminerBackend(PDFTextBackend):
+    """Backend leve, somente texto, usando o pdfminer já instalado com o pdfplumber."""
+
+    name = 'pdfminer'
+    version = '1'
+
+    def open(self, file_path: str) -> PDFTextDocument:
+        return PdfminerTextDocument(file_path)
+
+TEXT_BACKENDS: Dict[str, Type[PDFTextBackend]] = {
+    'pdfplumber': PdfplumberBackend,
+    'pdfminer': PdfminerBackend,
+}
+
+def get_text_backend(name: str) -> PDFTextBackend:
+    """
+    Retorna uma instância do backend de extração de texto.
+
+    Args:
+        name: Nome do backend registrado em TEXT_BACKENDS
+
+    Returns:
+        Instância do backend
+    """
+    backend_class = TEXT_BACKENDS.get(name)
+    if backend_class is None:
+        available = ", ".join(sorted(TEXT_BACKENDS))
+        raise ValueError(f"Backend de texto desconhecido: {name} (disponíveis: {available})")
+    return backend_class()
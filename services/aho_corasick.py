@@ -0,0 +1,73 @@
+"""
+Autômato de Aho-Corasick para busca de várias palavras-chave de uma vez.
+Seguindo o princípio de Single Responsibility.
+
+O autômato é montado uma vez a partir das palavras-chave; cada busca
+percorre o texto uma única vez, qualquer que seja o número de palavras.
+"""
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+class AhoCorasick:
+    """
+    Encontra quais padrões ocorrem em um texto, como substrings.
+
+    O resultado de find_all equivale a {p for p in padrões if p in texto}.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        outputs: List[Set[str]] = [set()]
+        for pattern in patterns:
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                    self._goto[state][char] = next_state
+                state = next_state
+            outputs[state].add(pattern)
+        # O padrão vazio ocorre em qualquer texto; os demais estados não o repetem
+        self._always: FrozenSet[str] = frozenset(outputs[0])
+        outputs[0] = set()
+        self._build_failure_links(outputs)
+        self._outputs: List[FrozenSet[str]] = [frozenset(output) for output in outputs]
+
+    def _build_failure_links(self, outputs: List[Set[str]]) -> None:
+        """Liga cada estado ao maior sufixo próprio que também é prefixo de um padrão."""
+        goto, fail = self._goto, self._fail
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                outputs[next_state] |= outputs[fail[next_state]]
+
+    def find_all(self, text: str) -> FrozenSet[str]:
+        """Retorna os padrões que ocorrem no texto, em uma única passada."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set(self._always)
+        state = 0
+        for char in text:
+            next_state = goto[state].get(char)
+            while next_state is None and state:
+                state = fail[state]
+                next_state = goto[state].get(char)
+            state = next_state or 0
+            if outputs[state]:
+                found |= outputs[state]
+        return frozenset(found)
+
+    def __len__(self) -> int:
+        """Número de estados do autômato."""
+        return len(self._goto)
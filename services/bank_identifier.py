@@ -3,30 +3,54 @@ Serviço de identificação de bancos.
 Seguindo o princípio de Single Responsibility.
 """
 
-from typing import Optional, Dict, Type
+from importlib import import_module
+from pathlib import Path
+from typing import Iterable, Optional, Dict, Type, Union
+from config import BANK_CONFIGS, PROCESSING_CONFIG
 from interfaces import BankParser
-from parsers.itau import ItauParser
-from parsers.mercadopago import MercadoPagoParser
+from parsers.base_parser import BaseParser, PageBudget, build_extractor_signature
+from parsers.text_backends import get_text_backend
+from services.extraction_cache import ExtractionCache, get_extraction_cache
+from services.file_hasher import compute_file_hash
+
+# Parser de cada banco, como "módulo:Classe"; o módulo só é importado
+# quando aparece um arquivo do banco
+PARSER_MODULES: Dict[str, str] = {
+    'itau': 'parsers.itau:ItauParser',
+    'mercadopago': 'parsers.mercadopago:MercadoPagoParser',
+}
 
 class BankIdentifier:
-    """Identifica qual parser usar baseado no nome do arquivo."""
+    """Identifica qual parser usar pelo nome do arquivo ou pelo conteúdo do PDF."""
     
-    def __init__(self):
-        self._parsers: Dict[str, Type[BankParser]] = {
-            'itau': ItauParser,
-            'mercadopago': MercadoPagoParser,
-        }
+    def __init__(self, text_backend: Optional[str] = None, page_budget: Optional[PageBudget] = None):
+        # Backend de texto escolhido para a execução; None usa o configurado por banco
+        self.text_backend = text_backend
+        # Limite de processos da extração de páginas; None usa o de PROCESSING_CONFIG
+        self.page_budget = page_budget
+        self._parsers: Dict[str, Union[str, Type[BankParser]]] = dict(PARSER_MODULES)
+        # Uma instância por banco, reaproveitada entre arquivos (padrões já compilados)
+        self._instances: Dict[str, BankParser] = {}
+        # Resultado da identificação por conteúdo, por hash do PDF
+        self._content_matches: Dict[str, Optional[str]] = {}
     
-    def identify_bank(self, file_name: str) -> Optional[str]:
+    def identify_bank(self, file_path: str) -> Optional[str]:
         """
-        Identifica o banco baseado no nome do arquivo.
+        Identifica o banco pelo nome do arquivo ou, se o nome não indicar
+        nenhum banco, pelo conteúdo do PDF.
         
         Args:
-            file_name: Nome do arquivo PDF
+            file_path: Caminho (ou apenas o nome) do arquivo PDF
             
         Returns:
             Nome do banco identificado ou None se não encontrado
         """
+        bank_name = self._identify_by_name(Path(file_path).name)
+        if bank_name or not Path(file_path).is_file():
+            return bank_name
+        return self._identify_by_content(file_path)
+    
+    def _identify_by_name(self, file_name: str) -> Optional[str]:
         file_name_lower = file_name.lower()
         
         for bank_name in self._parsers.keys():
@@ -35,31 +59,111 @@ class BankIdentifier:
         
         return None
     
+    def _identify_by_content(self, file_path: str) -> Optional[str]:
+        """
+        Compara os metadados e o texto da primeira página com as assinaturas
+        de cada banco (BANK_CONFIGS['fingerprints']).
+        
+        Apenas a primeira página é extraída. O texto fica no cache de extração
+        sob a chave que o parser usa com o mesmo backend, então essa página não
+        é extraída de novo na conversão.
+        """
+        file_hash = compute_file_hash(file_path)
+        if file_hash in self._content_matches:
+            return self._content_matches[file_hash]
+        
+        backend = get_text_backend(self.text_backend or PROCESSING_CONFIG['pdf_text_backend'])
+        cache = get_extraction_cache()
+        key = ExtractionCache.make_key(file_hash, build_extractor_signature(backend))
+        first_page = cache.get_first_page(key) if cache else None
+        bank_name = None
+        if first_page is None:
+            try:
+                with backend.open(file_path) as document:
+                    bank_name = self._match_fingerprints(document.metadata().values(), 'metadata')
+                    if not bank_name:
+                        first_page = next(document.iter_page_texts(0, 1), "")
+            except Exception:
+                # PDF ilegível: fica sem banco e a conversão registra a falha do arquivo
+                first_page = None
+            if first_page is not None and cache:
+                cache.store_first_page(key, first_page)
+        if not bank_name and first_page:
+            bank_name = self._match_fingerprints([first_page], 'first_page')
+        
+        self._content_matches[file_hash] = bank_name
+        return bank_name
+    
+    def _match_fingerprints(self, texts: Iterable[str], kind: str) -> Optional[str]:
+        content = "\n".join(texts).lower()
+        if not content:
+            return None
+        for bank_name in self._parsers.keys():
+            fingerprints = BANK_CONFIGS.get(bank_name, {}).get('fingerprints', {})
+            if any(term in content for term in fingerprints.get(kind, ())):
+                return bank_name
+        return None
+    
     def get_parser(self, bank_name: str) -> Optional[BankParser]:
         """
         Retorna a instância do parser para o banco especificado.
         
+        A instância é criada (e o módulo do parser importado) no primeiro
+        uso e reaproveitada nos arquivos seguintes do mesmo processo.
+        
         Args:
             bank_name: Nome do banco
             
         Returns:
             Instância do parser ou None se não encontrado
         """
-        parser_class = self._parsers.get(bank_name)
+        parser = self._instances.get(bank_name)
+        if parser is not None:
+            return parser
+        parser_class = self._load_parser_class(bank_name)
         if parser_class:
-            return parser_class()
+            parser = parser_class()
+            if isinstance(parser, BaseParser):
+                if self.text_backend:
+                    parser.use_text_backend(self.text_backend)
+                if self.page_budget:
+                    parser.use_page_budget(self.page_budget)
+            self._instances[bank_name] = parser
+            return parser
         return None
     
+    def _load_parser_class(self, bank_name: str) -> Optional[Type[BankParser]]:
+        parser_class = self._parsers.get(bank_name)
+        if isinstance(parser_class, str):
+            module_name, class_name = parser_class.split(':')
+            parser_class = getattr(import_module(module_name), class_name)
+            self._parsers[bank_name] = parser_class
+        return parser_class
+    
+    def get_parser_version(self, bank_name: str) -> Optional[str]:
+        """
+        Retorna a versão do parser do banco especificado.
+        
+        Args:
+            bank_name: Nome do banco
+            
+        Returns:
+            Versão do parser ou None se o banco não tiver parser
+        """
+        parser = self.get_parser(bank_name)
+        return parser.version if parser else None
+    
     def get_available_banks(self) -> list[str]:
         """Retorna lista de bancos disponíveis."""
         return list(self._parsers.keys())
     
-    def register_parser(self, bank_name: str, parser_class: Type[BankParser]) -> None:
+    def register_parser(self, bank_name: str, parser_class: Union[str, Type[BankParser]]) -> None:
         """
         Registra um novo parser.
         
         Args:
             bank_name: Nome do banco
-            parser_class: Classe do parser
+            parser_class: Classe do parser ou caminho "módulo:Classe"
         """
-        self._parsers[bank_name] = parser_class 
\ No newline at end of file
+        self._parsers[bank_name] = parser_class
+        self._instances.pop(bank_name, None) 
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""
+Estatísticas da categorização acumuladas durante o processamento.
+Seguindo o princípio de Single Responsibility.
+
+As contagens são somadas à medida que as transações são categorizadas e
+gravadas em um JSON ao lado dos OFX categorizados, para que o relatório
+e outras ferramentas não precisem reler os OFX.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+@dataclass
+class CategoryTotals:
+    """Quantidade e soma dos valores das transações de uma categoria."""
+    count: int = 0
+    total_amount: float = 0.0
+
+@dataclass
+class FileStats:
+    """Contagens de um arquivo categorizado."""
+    transactions: int = 0
+    categorized: int = 0
+    categories: Dict[str, CategoryTotals] = field(default_factory=dict)
+    # Chamadas ao categorizador no arquivo e o máximo para uma mesma transação
+    categorizer_calls: int = 0
+    max_categorizer_calls: int = 0
+    # Mensagem de erro quando o arquivo não pôde ser categorizado
+    error: Optional[str] = None
+
+    def add(self, category: Optional[str], amount: float, categorizer_calls: int = 0) -> None:
+        """Registra uma transação; category vazia conta como não categorizada."""
+        self.transactions += 1
+        self.categorizer_calls += categorizer_calls
+        self.max_categorizer_calls = max(self.max_categorizer_calls, categorizer_calls)
+        if not category:
+            return
+        self.categorized += 1
+        totals = self.categories.get(category)
+        if totals is None:
+            totals = self.categories[category] = CategoryTotals()
+        totals.count += 1
+        totals.total_amount += amount
+
+class CategorizationStats:
+    """
+    Acumula as estatísticas por arquivo e por categoria.
+
+    O resumo por categoria é mantido junto com as entradas por arquivo, então
+    o relatório custa O(categorias), sem depender do número de transações.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, FileStats] = {}
+        self.categories: Dict[str, CategoryTotals] = {}
+
+    @property
+    def total_files(self) -> int:
+        """Arquivos categorizados com sucesso."""
+        return sum(1 for stats in self.files.values() if stats.error is None)
+
+    @property
+    def failed_files(self) -> Dict[str, str]:
+        """Arquivos que não puderam ser categorizados, com a mensagem de erro."""
+        return {name: stats.error for name, stats in self.files.items() if stats.error is not None}
+
+    @property
+    def total_transactions(self) -> int:
+        return sum(stats.transactions for stats in self.files.values())
+
+    @property
+    def total_categorized(self) -> int:
+        return sum(totals.count for totals in self.categories.values())
+
+    @property
+    def total_categorizer_calls(self) -> int:
+        return sum(stats.categorizer_calls for stats in self.files.values())
+
+    @property
+    def max_categorizer_calls(self) -> int:
+        """Maior número de chamadas ao categorizador para uma única transação."""
+        return max((stats.max_categorizer_calls for stats in self.files.values()), default=0)
+
+    def add_file(self, file_name: str, stats: FileStats) -> None:
+        """Soma as contagens de um arquivo, substituindo as anteriores do mesmo arquivo."""
+        if file_name in self.files:
+            self._subtract(self.files[file_name])
+        self.files[file_name] = stats
+        for category, totals in stats.categories.items():
+            summary = self.categories.get(category)
+            if summary is None:
+                summary = self.categories[category] = CategoryTotals()
+            summary.count += totals.count
+            summary.total_amount += totals.total_amount
+
+    def _subtract(self, stats: FileStats) -> None:
+        for category, totals in stats.categories.items():
+            summary = self.categories[category]
+            summary.count -= totals.count
+            summary.total_amount -= totals.total_amount
+            if summary.count <= 0:
+                del self.categories[category]
+
+    def to_dict(self) -> dict:
+        return {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'total_files': self.total_files,
+            'failed_files': dict(sorted(self.failed_files.items())),
+            'total_transactions': self.total_transactions,
+            'total_categorized': self.total_categorized,
+            'total_categorizer_calls': self.total_categorizer_calls,
+            'max_categorizer_calls': self.max_categorizer_calls,
+            'categories': {
+                category: self._totals_dict(totals)
+                for category, totals in sorted(self.categories.items())
+            },
+            'files': {
+                file_name: self._file_dict(stats)
+                for file_name, stats in sorted(self.files.items())
+            }
+        }
+
+    def _file_dict(self, stats: FileStats) -> dict:
+        values = {
+            'transactions': stats.transactions,
+            'categorized': stats.categorized,
+            'categorizer_calls': stats.categorizer_calls,
+            'max_categorizer_calls': stats.max_categorizer_calls,
+            'categories': {
+                category: self._totals_dict(totals)
+                for category, totals in sorted(stats.categories.items())
+            }
+        }
+        if stats.error is not None:
+            values['error'] = stats.error
+        return values
+
+    @staticmethod
+    def _totals_dict(totals: CategoryTotals) -> dict:
+        values = asdict(totals)
+        values['total_amount'] = round(totals.total_amount, 2)
+        return values
+
+    def save(self, stats_path: Path) -> None:
+        """Grava as estatísticas de forma atômica."""
+        stats_path = Path(stats_path)
+        stats_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = stats_path.with_suffix(stats_path.suffix + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+        os.replace(temp_path, stats_path)
+
+    @classmethod
+    def load(cls, stats_path: Path) -> 'CategorizationStats':
+        """
+        Carrega as estatísticas gravadas por save; arquivo ausente ou
+        corrompido resulta em estatísticas vazias.
+        """
+        stats = cls()
+        try:
+            with open(stats_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            for file_name, entry in data.get('files', {}).items():
+                stats.add_file(file_name, FileStats(
+                    transactions=entry['transactions'],
+                    categorized=entry['categorized'],
+                    categories={
+                        category: CategoryTotals(**totals)
+                        for category, totals in entry['categories'].items()
+                    },
+                    categorizer_calls=entry.get('categorizer_calls', 0),
+                    max_categorizer_calls=entry.get('max_categorizer_calls', 0),
+                    error=entry.get('error')
+                ))
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls()
+        return stats
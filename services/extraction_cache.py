@@ -0,0 +1,142 @@
+"""
+Cache em disco do texto extraído de PDFs.
+Seguindo o princípio de Single Responsibility.
+"""
+
+import os
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+from config import CACHE_DIR, CACHE_CONFIG
+
+class ExtractionCache:
+    """
+    Cache do texto de cada página de um PDF, endereçado pelo conteúdo.
+
+    A chave combina o SHA-256 dos bytes do PDF com a assinatura do extrator,
+    de modo que renomear ou mover o arquivo não invalida o cache e mudar o
+    extrator não reaproveita texto antigo. O texto é gravado em SQLite,
+    comprimido com zlib, uma linha por página.
+    """
+
+    def __init__(self, db_path: Path, compression_level: int = 6):
+        self.db_path = Path(db_path)
+        self.compression_level = compression_level
+        self.hits = 0
+        self.misses = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+
+    @staticmethod
+    def make_key(file_hash: str, extractor_signature: str) -> str:
+        """Monta a chave do cache a partir do hash do PDF e da assinatura do extrator."""
+        return f"{file_hash}:{extractor_signature}"
+
+    def get_pages(self, key: str) -> Optional[Iterator[str]]:
+        """
+        Retorna um iterador sobre o texto das páginas em cache.
+
+        Args:
+            key: Chave gerada por make_key
+
+        Returns:
+            Iterador de textos de página, ou None se o documento não estiver em cache
+        """
+        connection = self._get_connection()
+        row = connection.execute(
+            "SELECT page_count FROM documents WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        blobs = [blob for (blob,) in connection.execute(
+            "SELECT data FROM pages WHERE key = ? ORDER BY page_no", (key,)
+        )]
+        if len(blobs) != row[0]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return (zlib.decompress(blob).decode('utf-8') for blob in blobs)
+
+    def store_pages(self, key: str, page_texts: Iterable[str]) -> Iterator[str]:
+        """
+        Repassa os textos de página e os grava no cache ao final.
+
+        O documento só é registrado quando todas as páginas foram consumidas,
+        então uma extração interrompida não deixa entrada incompleta.
+        Apenas os blobs comprimidos ficam em memória até a gravação.
+        """
+        blobs: List[bytes] = []
+        for page_text in page_texts:
+            blobs.append(zlib.compress(page_text.encode('utf-8'), self.compression_level))
+            yield page_text
+        self._write_document(key, blobs)
+
+    def get_first_page(self, key: str) -> Optional[str]:
+        """Retorna o texto da primeira página gravado pela identificação do banco."""
+        row = self._get_connection().execute(
+            "SELECT data FROM first_pages WHERE key = ?", (key,)
+        ).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+
+    def store_first_page(self, key: str, page_text: str) -> None:
+        """Grava o texto da primeira página, lido sem extrair o documento inteiro."""
+        connection = self._get_connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO first_pages (key, data) VALUES (?, ?)",
+                (key, zlib.compress(page_text.encode('utf-8'), self.compression_level))
+            )
+
+    def _write_document(self, key: str, blobs: List[bytes]) -> None:
+        connection = self._get_connection()
+        with connection:
+            connection.execute("DELETE FROM pages WHERE key = ?", (key,))
+            connection.executemany(
+                "INSERT INTO pages (key, page_no, data) VALUES (?, ?, ?)",
+                [(key, page_no, blob) for page_no, blob in enumerate(blobs)]
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO documents (key, page_count) VALUES (?, ?)",
+                (key, len(blobs))
+            )
+
+    def _get_connection(self) -> sqlite3.Connection:
+        # Conexões SQLite não podem ser herdadas por processos filhos (fork)
+        if self._connection is None or self._connection_pid != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.db_path), timeout=30)
+            self._connection_pid = os.getpid()
+            self._create_schema(self._connection)
+        return self._connection
+
+    def _create_schema(self, connection: sqlite3.Connection) -> None:
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "key TEXT PRIMARY KEY, page_count INTEGER NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "key TEXT NOT NULL, page_no INTEGER NOT NULL, data BLOB NOT NULL, "
+                "PRIMARY KEY (key, page_no))"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS first_pages ("
+                "key TEXT PRIMARY KEY, data BLOB NOT NULL)"
+            )
+
+_default_cache: Optional[ExtractionCache] = None
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Retorna o cache de extração do processo, ou None se estiver desabilitado."""
+    global _default_cache
+    if not CACHE_CONFIG['extraction_cache_enabled']:
+        return None
+    if _default_cache is None:
+        _default_cache = ExtractionCache(
+            CACHE_DIR / CACHE_CONFIG['extraction_cache_file'],
+            CACHE_CONFIG['compression_level']
+        )
+    return _default_cache
@@ -0,0 +1,41 @@
+"""
+Serviço de cálculo de hash de arquivos.
+Seguindo o princípio de Single Responsibility.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Dict, Tuple
+
+_CHUNK_SIZE = 1024 * 1024
+
+# Hashes já calculados neste processo, indexados por (caminho, tamanho, mtime)
+_hash_memo: Dict[Tuple[str, int, int], str] = {}
+
+def compute_file_hash(file_path: str) -> str:
+    """
+    Calcula o SHA-256 do conteúdo do arquivo.
+    
+    O resultado é memorizado por processo enquanto tamanho e data de
+    modificação do arquivo não mudarem.
+    
+    Args:
+        file_path: Caminho do arquivo
+        
+    Returns:
+        Hash SHA-256 em hexadecimal
+    """
+    path = Path(file_path)
+    stat = path.stat()
+    memo_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    cached = _hash_memo.get(memo_key)
+    if cached:
+        return cached
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    file_hash = digest.hexdigest()
+    _hash_memo[memo_key] = file_hash
+    return file_hash
@@ -5,19 +5,24 @@ Seguindo o princípio de Single Responsibility.
 
 import os
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+from config import PROCESSING_CONFIG
 from interfaces import FileProcessor, ProcessingResult, OFXWriter
+from parsers.base_parser import PageBudget
 from services.bank_identifier import BankIdentifier
+from services.extraction_cache import get_extraction_cache
 from services.file_validator import PDFFileValidator
 from services.logger import StructuredLogger
+from services.sidecar import TransactionSidecarWriter, remove_sidecars
 
 class PDFFileProcessor(FileProcessor):
     """Processador de arquivos PDF."""
     
-    def __init__(self, ofx_writer: OFXWriter, logger: StructuredLogger):
+    def __init__(self, ofx_writer: OFXWriter, logger: StructuredLogger, text_backend: Optional[str] = None,
+                 page_budget: Optional[PageBudget] = None):
         self.ofx_writer = ofx_writer
         self.logger = logger
-        self.bank_identifier = BankIdentifier()
+        self.bank_identifier = BankIdentifier(text_backend, page_budget)
         self.file_validator = PDFFileValidator()
     
     def process_file(self, file_path: str) -> ProcessingResult:
@@ -45,7 +50,7 @@ class PDFFileProcessor(FileProcessor):
             )
         
         # Identificar banco
-        bank_name = self.bank_identifier.identify_bank(file_name)
+        bank_name = self.bank_identifier.identify_bank(file_path)
         if not bank_name:
             error_msg = f"Banco não identificado para: {file_name}"
             self.logger.error(error_msg)
@@ -70,29 +75,43 @@ class PDFFileProcessor(FileProcessor):
                 error_message=error_msg
             )
         
+        sidecar = None
         try:
             # Processar arquivo
             self.logger.info(f"Processando {file_name} ({bank_name})...")
             
-            transactions, account_data = parser.parse(file_path)
+            cache = get_extraction_cache()
+            hits_before = cache.hits if cache else 0
+            misses_before = cache.misses if cache else 0
             
-            # Gerar arquivo OFX
+            # Extração, parsing e escrita do OFX em um único fluxo
+            transactions, account_data = parser.parse_stream(file_path)
             output_path = self._generate_output_path(file_path)
-            self.ofx_writer.write(transactions, account_data, output_path)
+            sidecar = self._create_sidecar(output_path, bank_name, file_name)
+            if sidecar:
+                transactions = sidecar.tee(transactions)
+            transactions_count = self.ofx_writer.write(transactions, account_data, output_path)
+            if sidecar:
+                sidecar.commit()
             
             self.logger.info(
                 f"{file_name} convertido com sucesso! "
-                f"Total de transações: {len(transactions)}"
+                f"Total de transações: {transactions_count}"
             )
             
             return ProcessingResult(
                 success=True,
                 file_name=file_name,
                 bank_name=bank_name,
-                transactions_count=len(transactions)
+                transactions_count=transactions_count,
+                output_path=output_path,
+                cache_hits=(cache.hits - hits_before) if cache else 0,
+                cache_misses=(cache.misses - misses_before) if cache else 0
             )
             
         except Exception as e:
+            if sidecar:
+                sidecar.discard()
             error_msg = f"Falha ao processar {file_name}: {str(e)}"
             self.logger.error(error_msg)
             return ProcessingResult(
@@ -103,6 +122,14 @@ class PDFFileProcessor(FileProcessor):
                 error_message=error_msg
             )
     
+    def _create_sidecar(self, output_path: str, bank_name: str, file_name: str) -> Optional[TransactionSidecarWriter]:
+        """Cria o gravador do sidecar configurado; sem sidecar, remove os antigos."""
+        sidecar_format = PROCESSING_CONFIG['sidecar_format']
+        if not sidecar_format:
+            remove_sidecars(output_path)
+            return None
+        return TransactionSidecarWriter(output_path, sidecar_format, bank_name, file_name)
+    
     def _generate_output_path(self, input_path: str) -> str:
         """Gera o caminho de saída para o arquivo OFX."""
         from config import OFXS_DIR
@@ -4,7 +4,7 @@ Seguindo o princípio de Single Responsibility.
 """
 
 import logging
-from typing import Optional
+from typing import List, Optional, Tuple
 from interfaces import Logger
 from config import LOG_CONFIG
 
@@ -42,4 +42,41 @@ class StructuredLogger(Logger):
     
     def debug(self, message: str) -> None:
         """Log de debug."""
-        self.logger.debug(message) 
\ No newline at end of file
+        self.logger.debug(message) 
+
+class BufferedLogger(Logger):
+    """
+    Logger que acumula as mensagens em memória.
+    Usado nos processos worker para que o processo principal reproduza
+    os logs na ordem de entrada dos arquivos.
+    """
+    
+    def __init__(self):
+        self.records: List[Tuple[str, str]] = []
+    
+    def info(self, message: str) -> None:
+        """Log de informação."""
+        self.records.append(('info', message))
+    
+    def error(self, message: str) -> None:
+        """Log de erro."""
+        self.records.append(('error', message))
+    
+    def warning(self, message: str) -> None:
+        """Log de aviso."""
+        self.records.append(('warning', message))
+    
+    def debug(self, message: str) -> None:
+        """Log de debug."""
+        self.records.append(('debug', message))
+    
+    def drain(self) -> List[Tuple[str, str]]:
+        """Retorna e remove as mensagens acumuladas."""
+        records, self.records = self.records, []
+        return records
+    
+    @staticmethod
+    def replay(records: List[Tuple[str, str]], logger: Logger) -> None:
+        """Reproduz as mensagens acumuladas em outro logger."""
+        for level, message in records:
+            getattr(logger, level)(message)
@@ -0,0 +1,187 @@
+"""
+Manifestos persistidos para processamento incremental.
+Seguindo o princípio de Single Responsibility.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from services.file_hasher import compute_file_hash
+
+class JSONManifest:
+    """Armazena entradas indexadas por caminho em um arquivo JSON."""
+
+    def __init__(self, manifest_path: Path):
+        self.manifest_path = Path(manifest_path)
+        self._entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            return data.get('entries', {})
+        except (OSError, ValueError):
+            # Manifesto corrompido equivale a não ter manifesto: tudo é reprocessado
+            return {}
+
+    def save(self) -> None:
+        """Grava o manifesto de forma atômica."""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.manifest_path.with_suffix(self.manifest_path.suffix + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'entries': self._entries}, file, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
+
+    def _input_unchanged(self, entry) -> bool:
+        """
+        Verifica se o arquivo de entrada de uma entrada ainda tem o mesmo conteúdo.
+
+        Tamanho e data de modificação iguais dispensam o hash; se apenas a
+        data mudou, o hash do conteúdo decide e a entrada é atualizada.
+        """
+        stat = Path(entry.input_path).stat()
+        if stat.st_size == entry.size and stat.st_mtime_ns == entry.mtime_ns:
+            return True
+        if stat.st_size != entry.size or compute_file_hash(entry.input_path) != entry.content_hash:
+            return False
+        entry.mtime_ns = stat.st_mtime_ns
+        self._entries[entry.input_path] = asdict(entry)
+        return True
+
+    def _key(self, input_path: str) -> str:
+        return str(Path(input_path).resolve())
+
+@dataclass
+class ConversionEntry:
+    """Estado registrado da última conversão bem-sucedida de um PDF."""
+    input_path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    parser_version: str
+    output_path: str
+    # Banco identificado na conversão; manifestos antigos não o registram
+    bank_name: str = ''
+
+class ConversionManifest(JSONManifest):
+    """Manifesto das conversões PDF → OFX."""
+
+    def get(self, input_path: str) -> Optional[ConversionEntry]:
+        entry = self._entries.get(self._key(input_path))
+        return ConversionEntry(**entry) if entry else None
+
+    def is_up_to_date(self, input_path: str, parser_version: str) -> bool:
+        """
+        Verifica se a saída registrada para o PDF ainda é válida.
+
+        Tamanho e data de modificação iguais dispensam o hash; se apenas a
+        data mudou, o hash do conteúdo decide e a entrada é atualizada.
+
+        Args:
+            input_path: Caminho do PDF
+            parser_version: Versão atual do parser do banco
+
+        Returns:
+            True se o PDF não precisa ser reconvertido
+        """
+        entry = self.get(input_path)
+        if entry is None or entry.parser_version != parser_version:
+            return False
+        if not Path(entry.output_path).exists():
+            return False
+        return self._input_unchanged(entry)
+
+    def record(self, input_path: str, bank_name: str, parser_version: str, output_path: str) -> None:
+        """Registra uma conversão bem-sucedida."""
+        stat = Path(input_path).stat()
+        entry = ConversionEntry(
+            input_path=self._key(input_path),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_hash=compute_file_hash(input_path),
+            parser_version=parser_version,
+            output_path=str(output_path),
+            bank_name=bank_name
+        )
+        self._entries[entry.input_path] = asdict(entry)
+
+    def remove_orphans(self) -> List[ConversionEntry]:
+        """
+        Remove do manifesto os PDFs que não existem mais.
+
+        Returns:
+            Entradas removidas, cujas saídas devem ser apagadas
+        """
+        orphans = []
+        for key in list(self._entries):
+            if not Path(key).exists():
+                orphans.append(ConversionEntry(**self._entries.pop(key)))
+        return orphans
+
+@dataclass
+class CategorizationEntry:
+    """Estado registrado da última categorização bem-sucedida de um OFX."""
+    input_path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    ruleset_digest: str
+    output_path: str
+
+class CategorizationManifest(JSONManifest):
+    """Manifesto das categorizações OFX → OFX categorizado."""
+
+    def get(self, input_path: str) -> Optional[CategorizationEntry]:
+        entry = self._entries.get(self._key(input_path))
+        return CategorizationEntry(**entry) if entry else None
+
+    def input_unchanged(self, input_path: str) -> bool:
+        """Verifica se o OFX e sua saída registrada não mudaram desde a última categorização."""
+        entry = self.get(input_path)
+        if entry is None or not Path(entry.output_path).exists():
+            return False
+        return self._input_unchanged(entry)
+
+    def is_up_to_date(self, input_path: str, ruleset_digest: str) -> bool:
+        """
+        Verifica se a saída registrada para o OFX ainda é válida: mesmo
+        conteúdo de entrada e mesmas regras de categorização.
+
+        Args:
+            input_path: Caminho do OFX
+            ruleset_digest: Digest atual das regras do categorizador
+        """
+        entry = self.get(input_path)
+        if entry is None or entry.ruleset_digest != ruleset_digest:
+            return False
+        return self.input_unchanged(input_path)
+
+    def record(self, input_path: str, ruleset_digest: str, output_path: str) -> None:
+        """Registra uma categorização bem-sucedida."""
+        stat = Path(input_path).stat()
+        entry = CategorizationEntry(
+            input_path=self._key(input_path),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_hash=compute_file_hash(input_path),
+            ruleset_digest=ruleset_digest,
+            output_path=str(output_path)
+        )
+        self._entries[entry.input_path] = asdict(entry)
+
+    def remove_orphans(self) -> List[CategorizationEntry]:
+        """
+        Remove do manifesto os OFX que não existem mais.
+
+        Returns:
+            Entradas removidas, cujas saídas devem ser apagadas
+        """
+        orphans = []
+        for key in list(self._entries):
+            if not Path(key).exists():
+                orphans.append(CategorizationEntry(**self._entries.pop(key)))
+        return orphans
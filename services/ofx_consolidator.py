@@ -0,0 +1,279 @@
+"""
+Serviço de consolidação de arquivos OFX.
+Seguindo o princípio de Single Responsibility.
+
+Junta os OFX gerados por PDF em um único OFX por conta (BANKID/ACCTID),
+com as transações em ordem de data, usando um merge k-way sobre as
+entradas já ordenadas: a memória depende do número de arquivos, não do
+número de transações. Entradas fora de ordem passam antes por uma
+ordenação externa, em blocos gravados em arquivos temporários.
+"""
+
+import hashlib
+import heapq
+import json
+import re
+import tempfile
+from dataclasses import dataclass, field
+from itertools import groupby, islice
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+from config import PROCESSING_CONFIG, TEMP_DIR
+from services.logger import StructuredLogger
+
+_TAG = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)')
+_ACCOUNT_TAGS = ('BANKID', 'BRANCHID', 'ACCTID', 'ACCTTYPE')
+
+@dataclass(frozen=True)
+class OFXAccount:
+    """Conta identificada pelo BANKACCTFROM de um extrato."""
+    bank_id: str
+    branch_id: str
+    account_id: str
+    account_type: str
+
+    @property
+    def merge_key(self) -> Tuple[str, str]:
+        return self.bank_id, self.account_id
+
+@dataclass
+class StatementInput:
+    """Extrato de uma conta dentro de um arquivo OFX; uma entrada do merge."""
+    path: Path
+    account: OFXAccount
+    currency: str = ""
+    count: int = 0
+    min_date: Optional[str] = None
+    max_date: Optional[str] = None
+    is_sorted: bool = True
+    ledger_balance: str = ""
+    ledger_date: str = ""
+
+@dataclass
+class ConsolidatedStatement:
+    """Extrato consolidado de uma conta, com as transações em ordem de data."""
+    account: OFXAccount
+    currency: str
+    dt_start: str  # YYYYMMDD
+    dt_end: str
+    ledger_balance: str
+    ledger_date: str
+    inputs: List[StatementInput] = field(default_factory=list)
+    transactions: Iterable[Dict[str, str]] = ()
+
+def iter_ofx_events(path: Path) -> Iterator[Tuple[str, object]]:
+    """
+    Lê um OFX (XML ou SGML) linha a linha e gera, em ordem, os eventos
+    ('account', OFXAccount), ('currency', str), ('transaction', dict)
+    e ('ledger', (BALAMT, DTASOF)).
+    """
+    section = None
+    values: Dict[str, str] = {}
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        for line in file:
+            for closing, tag, value in _TAG.findall(line):
+                if tag in _SECTIONS:
+                    if closing and tag == section:
+                        yield _SECTIONS[tag](values)
+                        section = None
+                    elif not closing:
+                        section, values = tag, {}
+                elif closing:
+                    continue
+                elif section:
+                    values[tag] = value.strip()
+                elif tag == 'CURDEF':
+                    yield 'currency', value.strip()
+
+_SECTIONS = {
+    'BANKACCTFROM': lambda values: ('account', OFXAccount(*(values.get(tag, '') for tag in _ACCOUNT_TAGS))),
+    'STMTTRN': lambda values: ('transaction', values),
+    'LEDGERBAL': lambda values: ('ledger', (values.get('BALAMT', ''), values.get('DTASOF', ''))),
+}
+
+def _transaction_date(transaction: Dict[str, str]) -> str:
+    return transaction.get('DTPOSTED', '')[:8]
+
+def _date_key(item: Tuple[int, Dict[str, str]]) -> str:
+    return _transaction_date(item[1])
+
+def sort_by_date(transactions: Iterable[Dict[str, str]], run_size: int) -> Iterator[Dict[str, str]]:
+    """
+    Ordena as transações por data com memória limitada a run_size transações.
+
+    Cada bloco de run_size transações é ordenado e gravado em um arquivo
+    temporário (um JSON por linha); o resultado é o merge dos blocos. Uma
+    entrada que cabe em um único bloco não vai para o disco. A ordenação é
+    estável: transações da mesma data mantêm a ordem do arquivo.
+    """
+    transactions = iter(transactions)
+    runs: List[IO[str]] = []
+    try:
+        while True:
+            block = sorted(islice(transactions, run_size), key=_transaction_date)
+            if not runs and len(block) < run_size:
+                yield from block
+                return
+            if not block:
+                break
+            runs.append(_spill_run(block))
+        # Em empates, heapq.merge prefere o bloco anterior, o que mantém a estabilidade
+        yield from heapq.merge(*(_read_run(run) for run in runs), key=_transaction_date)
+    finally:
+        for run in runs:
+            run.close()
+
+def _spill_run(block: List[Dict[str, str]]) -> IO[str]:
+    TEMP_DIR.mkdir(parents=True, exist_ok=True)
+    run = tempfile.TemporaryFile('w+', encoding='utf-8', dir=TEMP_DIR)
+    for transaction in block:
+        run.write(json.dumps(transaction, ensure_ascii=False))
+        run.write('\n')
+    run.seek(0)
+    return run
+
+def _read_run(run: IO[str]) -> Iterator[Dict[str, str]]:
+    for line in run:
+        yield json.loads(line)
+
+def _duplicate_key(transaction: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(transaction.get(tag, '') for tag in ('TRNTYPE', 'TRNAMT', 'MEMO'))
+
+class OFXConsolidator:
+    """
+    Consolida os extratos de vários OFX em um extrato por conta.
+
+    Cada arquivo é lido uma vez para descobrir contas, intervalo de datas
+    e saldo, e outra vez, em streaming, durante o merge. Entradas que não
+    estejam em ordem de data passam por sort_by_date, com no máximo
+    PROCESSING_CONFIG['consolidation_sort_run'] transações em memória.
+    """
+
+    def __init__(self, logger: StructuredLogger, dedupe: bool = False):
+        self.logger = logger
+        self.dedupe = dedupe
+        self.duplicates_removed = 0
+
+    def scan(self, ofx_files: Iterable[Path]) -> List[ConsolidatedStatement]:
+        """
+        Agrupa os extratos dos arquivos por conta (BANKID/ACCTID).
+
+        Returns:
+            Um extrato consolidado por conta, na ordem em que as contas aparecem
+        """
+        statements: Dict[Tuple[str, str], ConsolidatedStatement] = {}
+        for path in ofx_files:
+            for statement_input in self._scan_file(Path(path)):
+                if not statement_input.count:
+                    continue
+                key = statement_input.account.merge_key
+                statement = statements.get(key)
+                if statement is None:
+                    statement = statements[key] = ConsolidatedStatement(
+                        account=statement_input.account,
+                        currency=statement_input.currency,
+                        dt_start=statement_input.min_date,
+                        dt_end=statement_input.max_date,
+                        ledger_balance=statement_input.ledger_balance,
+                        ledger_date=statement_input.ledger_date
+                    )
+                else:
+                    statement.dt_start = min(statement.dt_start, statement_input.min_date)
+                    if statement_input.max_date >= statement.dt_end:
+                        # O saldo vale o do extrato mais recente
+                        statement.dt_end = statement_input.max_date
+                        statement.ledger_balance = statement_input.ledger_balance or statement.ledger_balance
+                        statement.ledger_date = statement_input.ledger_date or statement.ledger_date
+                    statement.currency = statement.currency or statement_input.currency
+                statement.inputs.append(statement_input)
+        for statement in statements.values():
+            statement.transactions = self.iter_transactions(statement)
+        return list(statements.values())
+
+    def _scan_file(self, path: Path) -> List[StatementInput]:
+        inputs: Dict[OFXAccount, StatementInput] = {}
+        current: Optional[StatementInput] = None
+        currency = ""
+        last_dates: Dict[OFXAccount, str] = {}
+        for event, payload in iter_ofx_events(path):
+            if event == 'currency':
+                currency = payload
+            elif event == 'account':
+                current = inputs.get(payload)
+                if current is None:
+                    current = inputs[payload] = StatementInput(path, payload, currency=currency)
+            elif event == 'transaction' and current is not None:
+                date = payload.get('DTPOSTED', '')[:8]
+                current.count += 1
+                if current.min_date is None or date < current.min_date:
+                    current.min_date = date
+                if current.max_date is None or date > current.max_date:
+                    current.max_date = date
+                if date < last_dates.get(current.account, ''):
+                    current.is_sorted = False
+                last_dates[current.account] = date
+            elif event == 'ledger' and current is not None:
+                current.ledger_balance, current.ledger_date = payload
+        return list(inputs.values())
+
+    def iter_transactions(self, statement: ConsolidatedStatement) -> Iterator[Dict[str, str]]:
+        """Gera as transações do extrato consolidado em ordem de data."""
+        qualify_fitids = len(statement.inputs) > 1
+        streams = [
+            self._input_stream(index, statement_input, qualify_fitids)
+            for index, statement_input in enumerate(statement.inputs)
+        ]
+        merged = heapq.merge(*streams, key=_date_key)
+        if self.dedupe:
+            merged = self._collapse_duplicates(merged)
+        for _, transaction in merged:
+            yield transaction
+
+    def _input_stream(self, index: int, statement_input: StatementInput,
+                      qualify_fitids: bool) -> Iterator[Tuple[int, Dict[str, str]]]:
+        transactions = self._iter_account_transactions(statement_input)
+        if not statement_input.is_sorted:
+            run_size = PROCESSING_CONFIG['consolidation_sort_run']
+            self.logger.info(
+                f"{statement_input.path.name} não está em ordem de data; "
+                f"ordenando em blocos de {run_size} transações"
+            )
+            transactions = sort_by_date(transactions, run_size)
+        # FITIDs gerados por PDF (trans_001_...) se repetem entre arquivos
+        suffix = '.' + hashlib.sha1(statement_input.path.name.encode('utf-8')).hexdigest()[:8]
+        for transaction in transactions:
+            if qualify_fitids and transaction.get('FITID'):
+                transaction['FITID'] += suffix
+            yield index, transaction
+
+    def _iter_account_transactions(self, statement_input: StatementInput) -> Iterator[Dict[str, str]]:
+        current = None
+        for event, payload in iter_ofx_events(statement_input.path):
+            if event == 'account':
+                current = payload
+            elif event == 'transaction' and current == statement_input.account:
+                yield payload
+
+    def _collapse_duplicates(self, merged: Iterable[Tuple[int, Dict[str, str]]]):
+        """
+        Remove transações repetidas entre arquivos (extratos com períodos
+        sobrepostos). Em cada data, uma transação (tipo, valor, memo) aparece
+        tantas vezes quanto no arquivo em que mais aparece.
+        """
+        for _, group in groupby(merged, key=_date_key):
+            group = list(group)
+            counts: Dict[Tuple[int, Tuple[str, ...]], int] = {}
+            for index, transaction in group:
+                key = (index, _duplicate_key(transaction))
+                counts[key] = counts.get(key, 0) + 1
+            allowed: Dict[Tuple[str, ...], int] = {}
+            for (_, key), count in counts.items():
+                allowed[key] = max(allowed.get(key, 0), count)
+            emitted: Dict[Tuple[str, ...], int] = {}
+            for item in group:
+                key = _duplicate_key(item[1])
+                if emitted.get(key, 0) < allowed[key]:
+                    emitted[key] = emitted.get(key, 0) + 1
+                    yield item
+                else:
+                    self.duplicates_removed += 1
@@ -0,0 +1,199 @@
+"""
+Leitura única de arquivos OFX com detecção de encoding pelo cabeçalho.
+Seguindo o princípio de Single Responsibility.
+
+O arquivo é mapeado em memória uma vez; o encoding vem do cabeçalho SGML
+(ENCODING/CHARSET) ou da declaração XML, e o mesmo conteúdo é usado
+tanto para o parsing quanto para reescrever o OFX.
+"""
+
+import codecs
+import io
+import mmap
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TextIO, Tuple, Union
+from interfaces import Transaction
+
+# Cabeçalho SGML (OFX 1.x) e declaração XML (OFX 2.x) ficam antes do primeiro '<OFX>'
+_HEADER_BYTES = 4096
+_SGML_HEADER = re.compile(rb'^\s*([A-Z]+)\s*:\s*([^\r\n]*?)\s*$', re.MULTILINE)
+_XML_DECLARATION = re.compile(rb'<\?xml[^>]*?encoding\s*=\s*["\']([A-Za-z0-9._-]+)["\']', re.IGNORECASE)
+_FALLBACK_ENCODING = 'cp1252'
+
+@dataclass
+class OFXDocument:
+    """
+    Arquivo OFX mapeado em memória, lido do disco uma única vez.
+
+    O texto decodificado só é montado se algum consumidor precisar dele
+    (ofxparse e fallbacks); o leitor nativo e a reescrita trabalham
+    direto sobre os bytes mapeados.
+    """
+    path: Path
+    encoding: str
+    data: Union[mmap.mmap, bytes]
+    _text: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            # Remove o BOM, que o ofxparse confundiria com o cabeçalho
+            self._text = str(self.data, self.encoding, 'replace').lstrip('\ufeff')
+        return self._text
+
+    def parse(self, fail_fast: bool = True):
+        """
+        Faz o parsing do texto com ofxparse, sem reler o arquivo.
+
+        O ofxparse decodifica os bytes conforme o cabeçalho (ou como ASCII,
+        se não houver ENCODING), então o texto é entregue em ASCII com os
+        demais caracteres como referências numéricas, que ele converte de
+        volta ao montar a árvore.
+        """
+        from ofxparse import OfxParser
+        buffer = io.BytesIO(self.text.encode('ascii', 'xmlcharrefreplace'))
+        return OfxParser.parse(buffer, fail_fast=fail_fast)
+
+    def index_transactions(self) -> Iterator[Tuple[Transaction, Optional[Tuple[int, int]]]]:
+        """
+        Gera as transações com o leitor nativo (parsers.ofx_parser), junto
+        com o intervalo em bytes do valor do MEMO de cada uma.
+        """
+        from parsers.ofx_parser import OFXParserImpl
+        return OFXParserImpl().index_transactions(self.data, self.encoding)
+
+    def write_with_insertions(self, output_path: Path, insertions: Iterable[Tuple[int, str]]) -> None:
+        """
+        Grava uma cópia do arquivo com textos inseridos nas posições dadas.
+
+        Os trechos entre as inserções são copiados direto do conteúdo
+        mapeado, sem decodificar; os textos inseridos são codificados no
+        encoding do próprio arquivo.
+
+        Args:
+            output_path: Arquivo de saída
+            insertions: (posição em bytes, texto), em ordem crescente de posição
+        """
+        self.write_with_replacements(
+            output_path, ((offset, offset, text) for offset, text in insertions)
+        )
+
+    def write_with_replacements(self, output_path: Path, replacements: Iterable[Tuple[int, int, str]]) -> None:
+        """
+        Grava uma cópia do arquivo com os intervalos [início, fim) em bytes
+        substituídos pelos textos dados; início igual a fim é uma inserção.
+
+        Args:
+            output_path: Arquivo de saída
+            replacements: (início, fim, texto), em ordem crescente e sem sobreposição
+        """
+        encoding = self.encoding
+        with open(output_path, 'wb') as file, memoryview(self.data) as original:
+            position = 0
+            for start, end, text in replacements:
+                file.write(original[position:start])
+                file.write(text.encode(encoding, 'xmlcharrefreplace'))
+                position = end
+            file.write(original[position:])
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self) -> 'OFXDocument':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def detect_encoding(raw: bytes) -> Optional[str]:
+    """
+    Retorna o encoding declarado no cabeçalho do OFX, ou None se não houver.
+
+    Segue o mesmo mapeamento do ofxparse para o cabeçalho SGML:
+    ENCODING:UTF-8/UNICODE é UTF-8; ENCODING:USASCII usa o CHARSET
+    (1252 por padrão, 8859-1 para ISO-8859-1).
+    """
+    head = raw[:_HEADER_BYTES]
+    declaration = _XML_DECLARATION.search(head)
+    if declaration:
+        return _normalize_codec(declaration.group(1).decode('ascii'))
+    sgml_end = head.find(b'<')
+    headers = {
+        key.upper(): value.upper()
+        for key, value in _SGML_HEADER.findall(head if sgml_end < 0 else head[:sgml_end])
+    }
+    encoding = headers.get(b'ENCODING')
+    if encoding in (b'UTF-8', b'UNICODE'):
+        return 'utf-8'
+    if encoding == b'USASCII':
+        charset = headers.get(b'CHARSET', b'1252')
+        if charset in (b'8859-1', b'ISO-8859-1'):
+            return 'iso-8859-1'
+        if charset.isdigit():
+            return _normalize_codec(f"cp{charset.decode('ascii')}")
+        return _normalize_codec(charset.decode('ascii', 'replace'))
+    return None
+
+def _normalize_codec(name: str) -> Optional[str]:
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+def decode_ofx(raw: Union[mmap.mmap, bytes]) -> Tuple[str, str]:
+    """
+    Decodifica os bytes de um OFX, retornando (texto, encoding).
+
+    Sem encoding declarado, tenta UTF-8 e cai para cp1252, o encoding
+    usual dos extratos de bancos brasileiros.
+    """
+    encoding = detect_encoding(raw)
+    if encoding:
+        return str(raw, encoding, 'replace'), encoding
+    try:
+        return str(raw, 'utf-8'), 'utf-8'
+    except UnicodeDecodeError:
+        return str(raw, _FALLBACK_ENCODING, 'replace'), _FALLBACK_ENCODING
+
+def read_ofx(path: Path) -> OFXDocument:
+    """
+    Mapeia o arquivo OFX em memória e detecta o encoding.
+
+    Sem encoding declarado, o arquivo é decodificado já aqui (UTF-8 ou
+    cp1252, veja decode_ofx) para decidir o encoding.
+    """
+    path = Path(path)
+    with open(path, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Arquivo vazio não pode ser mapeado
+            data = b''
+    encoding = detect_encoding(data[:_HEADER_BYTES])
+    if encoding:
+        return OFXDocument(path, encoding, data)
+    text, encoding = decode_ofx(data)
+    return OFXDocument(path, encoding, data, text.lstrip('\ufeff'))
+
+def open_ofx(path: Path) -> TextIO:
+    """
+    Abre o OFX como texto para leitura em streaming, com o encoding do
+    cabeçalho. Sem encoding declarado, lê como UTF-8 e preserva os bytes
+    inválidos como surrogates, para repair_text decodificá-los como cp1252.
+    """
+    with open(path, 'rb') as file:
+        encoding = detect_encoding(file.read(_HEADER_BYTES))
+    if encoding:
+        return open(path, 'r', encoding=encoding, errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='surrogateescape')
+
+def repair_text(value: str) -> str:
+    """Decodifica como cp1252 um valor lido por open_ofx com bytes que não são UTF-8."""
+    try:
+        value.encode('utf-8')
+        return value
+    except UnicodeEncodeError:
+        return value.encode('utf-8', 'surrogateescape').decode(_FALLBACK_ENCODING, errors='replace')
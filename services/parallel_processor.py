@@ -0,0 +1,200 @@
+"""
+Serviço de processamento paralelo de arquivos PDF.
+Seguindo o princípio de Single Responsibility.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+from interfaces import Logger, ProcessingResult
+from parsers.base_parser import PageBudget
+from services.file_processor import PDFFileProcessor
+from services.logger import BufferedLogger, StructuredLogger
+from writers.ofx_writer import OFXWriterRefactored
+
+# Estado de cada processo worker, criado uma única vez pelo initializer
+_worker_processor: Optional[PDFFileProcessor] = None
+_worker_logger: Optional[BufferedLogger] = None
+_worker_unfinished = None
+
+# Mensagens acumuladas por BufferedLogger: (nível, mensagem)
+LogRecords = List[Tuple[str, str]]
+
+class SharedPageBudget(PageBudget):
+    """
+    Divide os processos do pool de conversão entre os PDFs ainda não concluídos.
+
+    Enquanto houver tantos PDFs pendentes quanto workers, cada PDF é extraído
+    dentro do próprio worker; quando sobram menos PDFs, os processos que
+    ficaram ociosos passam a extrair faixas de páginas dos PDFs restantes.
+    """
+    
+    def __init__(self, workers: int, unfinished):
+        super().__init__(workers)
+        # multiprocessing.Value com o número de PDFs do lote ainda não concluídos
+        self.unfinished = unfinished
+    
+    def available(self) -> int:
+        return max(1, self.workers // max(1, self.unfinished.value))
+
+def _init_worker(text_backend: Optional[str], workers: int, unfinished) -> None:
+    """Inicializa o worker com seu próprio identificador de bancos, parsers e writer."""
+    global _worker_processor, _worker_logger, _worker_unfinished
+    _worker_logger = BufferedLogger()
+    _worker_unfinished = unfinished
+    _worker_processor = PDFFileProcessor(
+        OFXWriterRefactored(), _worker_logger, text_backend,
+        page_budget=SharedPageBudget(workers, unfinished)
+    )
+
+def _process_in_worker(file_path: str) -> Tuple[ProcessingResult, LogRecords]:
+    """Processa um arquivo no worker e devolve o resultado com os logs acumulados."""
+    try:
+        result = _worker_processor.process_file(file_path)
+    except Exception as e:
+        error_msg = f"Falha ao processar {Path(file_path).name}: {str(e)}"
+        _worker_logger.error(error_msg)
+        result = _failed_result(file_path, error_msg)
+    finally:
+        with _worker_unfinished.get_lock():
+            _worker_unfinished.value -= 1
+    return result, _worker_logger.drain()
+
+def _failed_result(file_path: str, error_msg: str) -> ProcessingResult:
+    return ProcessingResult(
+        success=False,
+        file_name=Path(file_path).name,
+        bank_name="",
+        transactions_count=0,
+        error_message=error_msg
+    )
+
+class RecoveringProcessPool:
+    """
+    Executa uma tarefa por arquivo em um pool de processos, tolerando a morte de workers.
+
+    A tarefa roda no worker e devolve (resultado, logs); os logs são
+    reproduzidos no logger do processo principal e os resultados voltam na
+    ordem de entrada. Se um worker morrer, o primeiro arquivo ainda pendente é
+    reprocessado isoladamente e os demais seguem em um novo pool, de modo que
+    a falha de um arquivo não interrompe o lote. on_pool_start, se informado,
+    recebe os arquivos entregues a cada novo pool antes de ele começar.
+    """
+
+    def __init__(self, logger: Logger, workers: int, task: Callable[[str], Tuple[Any, LogRecords]],
+                 failed_result: Callable[[str, str], Any],
+                 initializer: Optional[Callable[..., None]] = None, initargs: tuple = (),
+                 on_pool_start: Optional[Callable[[List[str]], None]] = None):
+        self.logger = logger
+        self.workers = workers
+        self.task = task
+        self.failed_result = failed_result
+        self.initializer = initializer
+        self.initargs = initargs
+        self.on_pool_start = on_pool_start
+
+    def run(self, file_paths: List[str]) -> List[Any]:
+        """
+        Processa os arquivos e retorna os resultados na mesma ordem de file_paths.
+        """
+        results: List[Any] = []
+        pending = list(file_paths)
+
+        while pending:
+            completed = self._run_pool(pending, results)
+            pending = pending[completed:]
+            if pending:
+                self.logger.warning(
+                    f"Pool de processos interrompido; reprocessando {Path(pending[0]).name} isoladamente"
+                )
+                self._collect(*self._run_isolated(pending[0]), results)
+                pending = pending[1:]
+
+        return results
+
+    def _run_pool(self, file_paths: List[str], results: List[Any]) -> int:
+        """Executa um pool e retorna quantos arquivos foram concluídos antes de uma eventual quebra."""
+        completed = 0
+        self._notify_pool_start(file_paths)
+        with self._executor(self.workers) as executor:
+            futures = []
+            for file_path in file_paths:
+                try:
+                    futures.append(executor.submit(self.task, file_path))
+                except BrokenProcessPool:
+                    break
+            for file_path, future in zip(file_paths, futures):
+                try:
+                    outcome = future.result()
+                except BrokenProcessPool:
+                    break
+                except Exception as e:
+                    outcome = self._failed_outcome(file_path, str(e))
+                self._collect(*outcome, results)
+                completed += 1
+        return completed
+
+    def _run_isolated(self, file_path: str) -> Tuple[Any, LogRecords]:
+        """Processa um único arquivo em um pool exclusivo."""
+        self._notify_pool_start([file_path])
+        with self._executor(1) as executor:
+            try:
+                return executor.submit(self.task, file_path).result()
+            except Exception as e:
+                return self._failed_outcome(
+                    file_path, f"processo worker encerrado inesperadamente ({e.__class__.__name__})"
+                )
+
+    def _notify_pool_start(self, file_paths: List[str]) -> None:
+        if self.on_pool_start:
+            self.on_pool_start(file_paths)
+
+    def _executor(self, workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=workers, initializer=self.initializer,
+                                   initargs=self.initargs)
+
+    def _failed_outcome(self, file_path: str, reason: str) -> Tuple[Any, LogRecords]:
+        error_msg = f"Falha ao processar {Path(file_path).name}: {reason}"
+        return self.failed_result(file_path, error_msg), [('error', error_msg)]
+
+    def _collect(self, result: Any, records: LogRecords, results: List[Any]) -> None:
+        BufferedLogger.replay(records, self.logger)
+        results.append(result)
+
+class ParallelPDFProcessor:
+    """Distribui a conversão de PDFs entre vários processos."""
+
+    def __init__(self, logger: StructuredLogger, workers: int, text_backend: Optional[str] = None):
+        self.logger = logger
+        self.workers = workers
+        self.text_backend = text_backend
+
+    def process_files(self, file_paths: List[str]) -> List[ProcessingResult]:
+        """
+        Processa os arquivos em um pool de processos.
+
+        Os resultados e os logs de cada arquivo são devolvidos na ordem de
+        entrada; a morte de um worker é tratada por RecoveringProcessPool.
+        Os workers compartilham a contagem de PDFs não concluídos, usada por
+        SharedPageBudget para repassar processos ociosos aos últimos PDFs.
+
+        Args:
+            file_paths: Caminhos dos arquivos PDF
+
+        Returns:
+            Lista de resultados na mesma ordem de file_paths
+        """
+        unfinished = multiprocessing.Value('i', len(file_paths))
+
+        def reset_unfinished(pool_files: List[str]) -> None:
+            # Um pool interrompido pode deixar a contagem defasada
+            unfinished.value = len(pool_files)
+
+        pool = RecoveringProcessPool(
+            self.logger, self.workers, _process_in_worker, _failed_result,
+            initializer=_init_worker, initargs=(self.text_backend, self.workers, unfinished),
+            on_pool_start=reset_unfinished
+        )
+        return pool.run(file_paths)
@@ -0,0 +1,117 @@
+"""
+Arquivos auxiliares (sidecar) com as transações de cada OFX em formato tabular.
+Seguindo o princípio de Single Responsibility.
+
+O sidecar é gravado na mesma passada que o OFX e permite que os scripts
+de categorização e relatórios leiam as transações sem reprocessar o OFX.
+"""
+
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+from interfaces import Transaction
+from writers.ofx_serializer import FITIDDateTable
+
+SIDECAR_FIELDS = ('date', 'amount', 'description', 'fitid', 'bank', 'source_file')
+SIDECAR_FORMATS = ('csv', 'jsonl')
+
+def sidecar_path(ofx_path: str, sidecar_format: str) -> Path:
+    """Caminho do sidecar de um OFX: mesmo nome, extensão do formato."""
+    return Path(ofx_path).with_suffix('.' + sidecar_format)
+
+def remove_sidecars(ofx_path: str, keep: Optional[str] = None) -> None:
+    """Remove os sidecars de um OFX, exceto o do formato keep."""
+    for sidecar_format in SIDECAR_FORMATS:
+        path = sidecar_path(ofx_path, sidecar_format)
+        if sidecar_format != keep and path.exists():
+            path.unlink()
+
+def find_sidecar(ofx_path: str) -> Optional[Path]:
+    """
+    Retorna o sidecar de um OFX, se houver um tão recente quanto o OFX.
+
+    Um sidecar mais antigo que o OFX (ex.: OFX regravado por outra
+    ferramenta) é ignorado.
+    """
+    ofx_mtime = Path(ofx_path).stat().st_mtime_ns
+    for sidecar_format in SIDECAR_FORMATS:
+        path = sidecar_path(ofx_path, sidecar_format)
+        if path.exists() and path.stat().st_mtime_ns >= ofx_mtime:
+            return path
+    return None
+
+def read_sidecar(path: Path) -> Iterator[Dict]:
+    """
+    Gera as transações de um sidecar como dicionários com os campos de
+    SIDECAR_FIELDS; amount é convertido para float.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        if path.suffix == '.csv':
+            rows = csv.DictReader(file)
+        else:
+            rows = (json.loads(line) for line in file if line.strip())
+        for row in rows:
+            row['amount'] = float(row['amount'])
+            yield row
+
+class TransactionSidecarWriter:
+    """
+    Grava o sidecar à medida que as transações seguem para o escritor OFX.
+
+    As transações sem FITID recebem o mesmo FITID que o escritor OFX
+    geraria (trans_NNN_YYYYMMDD), então OFX e sidecar se correspondem.
+    O arquivo é escrito em um temporário e só substitui o sidecar
+    anterior em commit(), depois que o OFX foi gravado.
+    """
+
+    def __init__(self, ofx_path: str, sidecar_format: str, bank_name: str, source_file: str):
+        if sidecar_format not in SIDECAR_FORMATS:
+            raise ValueError(f"Formato de sidecar desconhecido: {sidecar_format}")
+        self.ofx_path = ofx_path
+        self.sidecar_format = sidecar_format
+        self.path = sidecar_path(ofx_path, sidecar_format)
+        self.bank_name = bank_name
+        self.source_file = source_file
+        self._temp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        self._fitid_dates = FITIDDateTable()
+
+    def tee(self, transactions: Iterable[Transaction]) -> Iterator[Transaction]:
+        """Repassa as transações, gravando uma linha do sidecar para cada uma."""
+        fitid_dates = self._fitid_dates
+        bank_name = self.bank_name
+        source_file = self.source_file
+        with open(self._temp_path, 'w', encoding='utf-8', newline='') as file:
+            if self.sidecar_format == 'csv':
+                writer = csv.writer(file)
+                writer.writerow(SIDECAR_FIELDS)
+                write_row = writer.writerow
+            else:
+                write_row = lambda row: file.write(
+                    json.dumps(dict(zip(SIDECAR_FIELDS, row)), ensure_ascii=False) + '\n'
+                )
+            for index, transaction in enumerate(transactions, 1):
+                if not transaction.fitid:
+                    transaction.fitid = fitid_dates.fitid(index, transaction.date)
+                write_row((
+                    transaction.date,
+                    round(transaction.amount, 2),
+                    transaction.description,
+                    transaction.fitid,
+                    bank_name,
+                    source_file
+                ))
+                yield transaction
+
+    def commit(self) -> None:
+        """Publica o sidecar e remove os de outros formatos do mesmo OFX."""
+        os.replace(self._temp_path, self.path)
+        # O temporário foi escrito antes do OFX; find_sidecar exige um sidecar tão recente quanto ele
+        os.utime(self.path)
+        remove_sidecars(self.ofx_path, keep=self.sidecar_format)
+
+    def discard(self) -> None:
+        """Descarta o sidecar de uma conversão que falhou."""
+        if self._temp_path.exists():
+            self._temp_path.unlink()
@@ -3,11 +3,47 @@ Serviço de categorização inteligente baseado em palavras-chave.
 Otimizado para o contexto bancário brasileiro.
 """
 
+import hashlib
+import json
 import re
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+from dataclasses import asdict, dataclass
+from services.aho_corasick import AhoCorasick
 from services.logger import StructuredLogger
 
+_NON_WORD = re.compile(r'[^\w\s]')
+_SPACES = re.compile(r'\s+')
+
+# Tipos de transação como máscaras de bits; uma regra 'both' aceita os dois
+_EXPENSE = 1
+_INCOME = 2
+_TYPE_MASKS = {"expense": _EXPENSE, "income": _INCOME, "both": _EXPENSE | _INCOME}
+
+# Ajustes de score por faixa de valor (apenas para valores positivos)
+_HIGH_VALUE_ADJUSTMENTS = {"Investimentos": 0.2, "Transferências": 0.2, "Alimentação": -0.1, "Transporte": -0.1}
+_LOW_VALUE_ADJUSTMENTS = {"Alimentação": 0.1, "Transporte": 0.1, "Lazer": 0.1, "Investimentos": -0.2, "Transferências": -0.2}
+
+# Regras contextuais, aplicadas quando nenhuma palavra-chave basta
+_PIX_KEYWORD = "pix"
+_PIX_QR_KEYWORD = "qr"
+_PIX_TRANSFER_WORDS = ("receb", "enviado", "transf")
+_TRANSFER_CATEGORY = "Transferências"
+_INVESTMENT_CATEGORY = "Investimentos"
+_FALLBACK_CATEGORY = "Outros"
+
+# Valores usados quando keyword_config.py não existe
+_DEFAULT_SETTINGS = {
+    'min_score_threshold': 0.3,
+    'value_based_rules': {
+        "high_value_threshold": 1000,
+        "low_value_threshold": 50,
+        "investment_threshold": 5000
+    },
+    'transfer_keywords': ["pix transf", "pix receb", "pix enviado", "transferência"],
+    'cache_size': 10000
+}
+
 @dataclass
 class CategoryRule:
     """Regra de categorização com palavras-chave e prioridade."""
@@ -18,16 +54,243 @@ class CategoryRule:
     case_sensitive: bool = False
     category_type: str = "both"  # 'expense', 'income', ou 'both'
 
+@dataclass(frozen=True)
+class CompiledRule:
+    """Regra pronta para o caminho quente: palavras-chave já em minúsculas e tipo como máscara."""
+    category: str
+    keywords: Tuple[str, ...]
+    lowered_keywords: Tuple[str, ...]
+    keyword_set: FrozenSet[str]
+    priority: int
+    exact_match: bool
+    category_type: str
+    type_mask: int
+    high_value_adjustment: float
+    low_value_adjustment: float
+
+@dataclass(frozen=True)
+class CompiledRuleset:
+    """
+    Retrato imutável das regras de categorização, montado uma única vez.
+
+    Reúne as regras compiladas, o autômato das palavras-chave e os limites
+    de score e de valor configurados. O categorizador só
+    lê este objeto ao categorizar; trocar as regras é substituí-lo inteiro.
+    """
+    categories: Tuple[CategoryRule, ...]
+    rules: Tuple[CompiledRule, ...]
+    exact_match_order: Tuple[CompiledRule, ...]
+    automaton: AhoCorasick
+    min_score_threshold: float
+    high_value_threshold: float
+    low_value_threshold: float
+    investment_threshold: float
+    digest: str
+
+    @classmethod
+    def compile(cls, categories: List[CategoryRule], settings: Dict[str, Any], version: int) -> 'CompiledRuleset':
+        """
+        Compila as regras e as configurações de keyword_config.
+
+        Args:
+            categories: Regras de origem, na ordem de prioridade da busca
+            settings: min_score_threshold, value_based_rules e transfer_keywords
+                (None quando keyword_config.py não existe)
+            version: Versão da lógica de categorização, incluída no digest
+        """
+        # As regras de origem são copiadas para que alterá-las não afete o retrato
+        categories = tuple(
+            CategoryRule(rule.category, list(rule.keywords), rule.priority, rule.exact_match,
+                         rule.case_sensitive, rule.category_type)
+            for rule in categories
+        )
+        rules = tuple(
+            CompiledRule(
+                category=rule.category,
+                keywords=tuple(rule.keywords),
+                lowered_keywords=tuple(keyword.lower() for keyword in rule.keywords),
+                keyword_set=frozenset(keyword.lower() for keyword in rule.keywords),
+                priority=rule.priority,
+                exact_match=rule.exact_match,
+                category_type=rule.category_type,
+                type_mask=_TYPE_MASKS.get(rule.category_type, 0),
+                high_value_adjustment=_HIGH_VALUE_ADJUSTMENTS.get(rule.category, 0.0),
+                low_value_adjustment=_LOW_VALUE_ADJUSTMENTS.get(rule.category, 0.0)
+            )
+            for rule in categories
+        )
+        keywords = set()
+        for rule in rules:
+            keywords.update(rule.keyword_set)
+        effective = {
+            key: _DEFAULT_SETTINGS[key] if value is None else value
+            for key, value in settings.items()
+        }
+        value_rules = effective['value_based_rules']
+        return cls(
+            categories=categories,
+            rules=rules,
+            # Primeiro as categorias comuns, depois as de correspondência exata (PIX)
+            exact_match_order=(
+                tuple(rule for rule in rules if not rule.exact_match)
+                + tuple(rule for rule in rules if rule.exact_match)
+            ),
+            automaton=AhoCorasick(sorted(keywords)),
+            min_score_threshold=effective['min_score_threshold'],
+            high_value_threshold=value_rules["high_value_threshold"],
+            low_value_threshold=value_rules["low_value_threshold"],
+            investment_threshold=value_rules["investment_threshold"],
+            digest=cls._digest(categories, settings, version)
+        )
+
+    def amount_bucket(self, amount: float) -> Tuple[bool, bool, bool, bool]:
+        """
+        Reduz o valor às características que influenciam a categoria: sinal
+        (tipo da transação) e faixas de VALUE_BASED_RULES. Valores na mesma
+        faixa sempre resultam na mesma categoria para a mesma descrição.
+        """
+        return (
+            amount > 0,
+            amount > self.high_value_threshold,
+            amount < self.low_value_threshold,
+            amount > self.investment_threshold
+        )
+
+    @staticmethod
+    def _digest(categories: Tuple[CategoryRule, ...], settings: Dict[str, Any], version: int) -> str:
+        ruleset = {
+            'version': version,
+            'categories': [asdict(rule) for rule in categories],
+            'min_score_threshold': settings['min_score_threshold'],
+            'value_based_rules': settings['value_based_rules'],
+            'transfer_keywords': settings['transfer_keywords']
+        }
+        encoded = json.dumps(ruleset, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+class CategorizationCache:
+    """
+    Cache LRU limitado das categorias já calculadas.
+
+    Conta acertos, perdas e descartes (entradas removidas por falta de
+    espaço); um cache com tamanho 0 não guarda nada.
+    """
+
+    def __init__(self, max_size: int):
+        if max_size < 0:
+            raise ValueError(f"Tamanho do cache de categorias inválido: {max_size} (use 0 para desativar)")
+        self.max_size = max_size
+        self._entries: 'OrderedDict[Hashable, str]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        category = self._entries.get(key)
+        if category is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return category
+
+    def put(self, key: Hashable, category: str) -> None:
+        self._entries[key] = category
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def info(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'max_size': self.max_size
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 class SmartKeywordCategorizer:
     """
     Categorizador inteligente baseado em palavras-chave.
     Usa regras hierárquicas e contexto para melhor categorização.
+
+    As regras ficam em um CompiledRuleset imutável; cada categorização lê
+    o retrato atual uma única vez, então swap_ruleset pode trocá-lo a
+    qualquer momento sem que uma categorização misture regras antigas e novas.
+
+    As categorias calculadas ficam em um CategorizationCache, indexado pela
+    descrição limpa e pela faixa de valor (CompiledRuleset.amount_bucket).
+    Cada retrato tem o seu cache, então trocar as regras o invalida.
     """
     
-    def __init__(self, logger: StructuredLogger):
+    # Incrementar quando a lógica de categorização mudar, para que
+    # categorize_smart.py recategorize os arquivos já processados
+    RULESET_VERSION = 1
+    
+    def __init__(self, logger: StructuredLogger, cache_size: Optional[int] = None):
+        """
+        Args:
+            logger: Logger da aplicação
+            cache_size: Entradas do cache de categorias; None usa
+                CATEGORIZATION_CACHE_SIZE de keyword_config e 0 desativa;
+                um tamanho negativo gera ValueError
+        """
         self.logger = logger
-        self.categories = self._initialize_categories()
-        self._build_regex_patterns()
+        self._settings = self._load_settings()
+        if cache_size is None:
+            cache_size = self._settings['cache_size']
+            if cache_size is None:
+                cache_size = _DEFAULT_SETTINGS['cache_size']
+        self._cache_size = cache_size
+        ruleset = CompiledRuleset.compile(self._initialize_categories(), self._settings, self.RULESET_VERSION)
+        # Retrato e cache são trocados juntos, em uma única atribuição
+        self._state = (ruleset, CategorizationCache(cache_size))
+    
+    @property
+    def ruleset(self) -> CompiledRuleset:
+        """Retrato das regras em uso."""
+        return self._state[0]
+    
+    @property
+    def categories(self) -> List[CategoryRule]:
+        """Regras de origem do retrato em uso."""
+        return list(self.ruleset.categories)
+    
+    def swap_ruleset(self, ruleset: CompiledRuleset) -> CompiledRuleset:
+        """
+        Substitui as regras em uso por outro retrato, de uma só vez, com um
+        cache novo (as contagens do cache recomeçam do zero).
+
+        Returns:
+            O retrato anterior
+        """
+        previous = self._state[0]
+        self._state = (ruleset, CategorizationCache(self._cache_size))
+        return previous
+    
+    def cache_info(self) -> Dict[str, int]:
+        """Acertos, perdas, descartes e tamanho do cache do retrato em uso."""
+        return self._state[1].info()
+    
+    def _load_settings(self) -> Dict[str, Any]:
+        """Lê de keyword_config, uma única vez, os limites usados na categorização."""
+        try:
+            from keyword_config import MIN_SCORE_THRESHOLD, VALUE_BASED_RULES, TRANSFER_KEYWORDS
+        except ImportError:
+            MIN_SCORE_THRESHOLD, VALUE_BASED_RULES, TRANSFER_KEYWORDS = None, None, None
+        try:
+            from keyword_config import CATEGORIZATION_CACHE_SIZE
+        except ImportError:
+            CATEGORIZATION_CACHE_SIZE = None
+        return {
+            'min_score_threshold': MIN_SCORE_THRESHOLD,
+            'value_based_rules': VALUE_BASED_RULES,
+            'transfer_keywords': TRANSFER_KEYWORDS,
+            'cache_size': CATEGORIZATION_CACHE_SIZE
+        }
     
     def _initialize_categories(self) -> List[CategoryRule]:
         """Inicializa as regras de categorização brasileiras."""
@@ -70,60 +333,52 @@ class SmartKeywordCategorizer:
             CategoryRule("Outros", [], priority=0, category_type="both")
         ]
     
-    def _build_regex_patterns(self) -> None:
-        """Constrói padrões regex otimizados para cada categoria."""
-        for category in self.categories:
-            if category.keywords:
-                # Cria padrão regex case-insensitive
-                pattern = '|'.join(re.escape(keyword) for keyword in category.keywords)
-                if not category.case_sensitive:
-                    pattern = f'(?i){pattern}'
-                category.regex_pattern = re.compile(pattern)
-    
     def categorize_transaction(self, description: str, amount: float = 0.0) -> str:
         """
         Categoriza uma transação baseada na descrição e tipo.
         """
+        # Uma única leitura do retrato: uma troca concorrente não afeta esta categorização
+        ruleset, cache = self._state
         if not description:
-            return "Outros"
+            return _FALLBACK_CATEGORY
         description_clean = self._clean_description(description)
-        transaction_type = self._determine_transaction_type(amount)
+        if not cache.max_size:
+            return self._categorize_clean(ruleset, description_clean, amount)
+        key = (description_clean, ruleset.amount_bucket(amount))
+        category = cache.get(key)
+        if category is None:
+            category = self._categorize_clean(ruleset, description_clean, amount)
+            cache.put(key, category)
+        return category
+    
+    def _categorize_clean(self, ruleset: CompiledRuleset, description_clean: str, amount: float) -> str:
+        """Categoriza uma descrição já limpa com as regras do retrato dado."""
+        type_mask = _TYPE_MASKS[self._determine_transaction_type(amount)]
+        # Todas as palavras-chave presentes na descrição, em uma única passada
+        matched = ruleset.automaton.find_all(description_clean)
 
         # Busca por correspondências exatas primeiro
-        exact_match = self._find_exact_match(description_clean, transaction_type)
-        if exact_match:
-            return exact_match
+        if matched:
+            exact_match = self._find_exact_match(ruleset, matched, type_mask)
+            if exact_match:
+                return exact_match
 
         # Busca por correspondências de palavras-chave
-        best_category = None
-        best_score = 0
-        for category in self.categories:
-            if not category.keywords:
-                continue
-            if category.category_type != "both" and category.category_type != transaction_type:
-                continue
-            score = self._calculate_match_score(description_clean, category, amount)
-            if score > best_score:
-                best_score = score
-                best_category = category.category
-        try:
-            from keyword_config import MIN_SCORE_THRESHOLD
-        except ImportError:
-            MIN_SCORE_THRESHOLD = 0.3
-        if best_category and best_score > MIN_SCORE_THRESHOLD:
+        best_category = self._find_best_match(ruleset, matched, amount, type_mask)
+        if best_category:
             return best_category
 
         # Aplica regras contextuais
-        contextual_match = self._apply_contextual_rules(description_clean, amount, transaction_type)
+        contextual_match = self._apply_contextual_rules(ruleset, description_clean, amount)
         if contextual_match:
             return contextual_match
-        return "Outros"
+        return _FALLBACK_CATEGORY
     
     def _clean_description(self, description: str) -> str:
         """Limpa e normaliza a descrição da transação."""
         # Remove caracteres especiais e normaliza espaços
-        cleaned = re.sub(r'[^\w\s]', ' ', description)
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip().lower()
+        cleaned = _NON_WORD.sub(' ', description)
+        cleaned = _SPACES.sub(' ', cleaned).strip().lower()
         return cleaned
     
     def _determine_transaction_type(self, amount: float) -> str:
@@ -141,129 +396,92 @@ class SmartKeywordCategorizer:
         else:
             return "expense"  # Para valores zero, considera como despesa
     
-    def _find_exact_match(self, description: str, transaction_type: str) -> Optional[str]:
-        """Busca por correspondências exatas."""
-        # Primeiro, busca por palavras-chave específicas (não PIX)
-        for category in self.categories:
-            if not category.exact_match:  # Pula categorias com exact_match (como Transferências)
-                # Verifica se a categoria é compatível com o tipo de transação
-                if category.category_type == "both" or category.category_type == transaction_type:
-                    for keyword in category.keywords:
-                        if keyword.lower() in description:
-                            return category.category
-        
-        # Depois, busca por correspondências exatas (como PIX)
-        for category in self.categories:
-            if category.exact_match:
-                # Verifica se a categoria é compatível com o tipo de transação
-                if category.category_type == "both" or category.category_type == transaction_type:
-                    for keyword in category.keywords:
-                        if keyword.lower() in description:
-                            return category.category
+    def _find_exact_match(self, ruleset: CompiledRuleset, matched: FrozenSet[str], type_mask: int) -> Optional[str]:
+        """
+        Busca por correspondências exatas.
+
+        Primeiro nas categorias com palavras-chave específicas (não PIX),
+        depois nas de correspondência exata (como PIX), na ordem das regras.
+        """
+        for rule in ruleset.exact_match_order:
+            # Verifica se a categoria é compatível com o tipo de transação
+            if rule.type_mask & type_mask and not matched.isdisjoint(rule.keyword_set):
+                return rule.category
         return None
     
-    def _find_best_match(self, description: str, amount: float, transaction_type: str) -> Optional[str]:
+    def _find_best_match(self, ruleset: CompiledRuleset, matched: FrozenSet[str], amount: float,
+                         type_mask: int) -> Optional[str]:
         """Encontra a melhor correspondência baseada em palavras-chave."""
         best_category = None
         best_score = 0
-        
-        for category in self.categories:
-            if not category.keywords:
-                continue
-            
+        for rule in ruleset.rules:
             # Verifica se a categoria é compatível com o tipo de transação
-            if category.category_type != "both" and category.category_type != transaction_type:
+            if not rule.keywords or not rule.type_mask & type_mask:
                 continue
-            
-            score = self._calculate_match_score(description, category, amount)
+            score = self._calculate_match_score(ruleset, rule, matched, amount)
             if score > best_score:
                 best_score = score
-                best_category = category.category
-        
-        try:
-            from keyword_config import MIN_SCORE_THRESHOLD
-        except ImportError:
-            MIN_SCORE_THRESHOLD = 0.3
-        
-        return best_category if best_score > MIN_SCORE_THRESHOLD else None
+                best_category = rule.category
+        return best_category if best_score > ruleset.min_score_threshold else None
     
-    def _calculate_match_score(self, description: str, category: CategoryRule, amount: float) -> float:
+    def _calculate_match_score(self, ruleset: CompiledRuleset, rule: CompiledRule,
+                               matched: FrozenSet[str], amount: float) -> float:
         """Calcula score de correspondência para uma categoria."""
         score = 0
         
-        # Verifica correspondências de palavras-chave
-        for keyword in category.keywords:
-            if keyword.lower() in description:
-                # Score baseado na prioridade da categoria
-                score += category.priority * 0.1
-                
-                # Bônus para correspondências mais longas
-                if len(keyword) > 3:
-                    score += 0.05
+        # Verifica correspondências de palavras-chave, na ordem da regra
+        if not matched.isdisjoint(rule.keyword_set):
+            for keyword, lowered in zip(rule.keywords, rule.lowered_keywords):
+                if lowered in matched:
+                    # Score baseado na prioridade da categoria
+                    score += rule.priority * 0.1
+                    
+                    # Bônus para correspondências mais longas
+                    if len(keyword) > 3:
+                        score += 0.05
         
         # Aplica regras específicas baseadas no valor
         if amount > 0:
-            score = self._apply_amount_based_rules(description, category, amount, score)
+            score = self._apply_amount_based_rules(ruleset, rule, amount, score)
         
         return score
     
-    def _apply_amount_based_rules(self, description: str, category: CategoryRule, amount: float, base_score: float) -> float:
+    def _apply_amount_based_rules(self, ruleset: CompiledRuleset, rule: CompiledRule,
+                                  amount: float, base_score: float) -> float:
         """Aplica regras baseadas no valor da transação."""
-        try:
-            from keyword_config import VALUE_BASED_RULES
-        except ImportError:
-            # Valores padrão se configuração não existir
-            VALUE_BASED_RULES = {
-                "high_value_threshold": 1000,
-                "low_value_threshold": 50,
-                "investment_threshold": 5000
-            }
-        
-        score = base_score
-        
         # Regras para valores altos
-        if amount > VALUE_BASED_RULES["high_value_threshold"]:
-            if category.category in ["Investimentos", "Transferências"]:
-                score += 0.2
-            elif category.category in ["Alimentação", "Transporte"]:
-                score -= 0.1
-        
+        if amount > ruleset.high_value_threshold:
+            if rule.high_value_adjustment:
+                return base_score + rule.high_value_adjustment
         # Regras para valores baixos
-        elif amount < VALUE_BASED_RULES["low_value_threshold"]:
-            if category.category in ["Alimentação", "Transporte", "Lazer"]:
-                score += 0.1
-            elif category.category in ["Investimentos", "Transferências"]:
-                score -= 0.2
-        
-        return score
+        elif amount < ruleset.low_value_threshold:
+            if rule.low_value_adjustment:
+                return base_score + rule.low_value_adjustment
+        return base_score
     
-    def _apply_contextual_rules(self, description: str, amount: float, transaction_type: str) -> Optional[str]:
+    def _apply_contextual_rules(self, ruleset: CompiledRuleset, description: str, amount: float) -> Optional[str]:
         """Aplica regras contextuais para melhorar categorização."""
-        try:
-            from keyword_config import VALUE_BASED_RULES, TRANSFER_KEYWORDS
-        except ImportError:
-            # Valores padrão se configuração não existir
-            VALUE_BASED_RULES = {"investment_threshold": 5000}
-            TRANSFER_KEYWORDS = ["pix transf", "pix receb", "pix enviado", "transferência"]
-        
         # Regras para PIX
-        if "pix" in description:
-            if "qr" in description:
-                return "Transferências"
-            elif any(word in description for word in ["receb", "enviado", "transf"]):
-                return "Transferências"
+        if _PIX_KEYWORD in description:
+            if _PIX_QR_KEYWORD in description:
+                return _TRANSFER_CATEGORY
+            elif any(word in description for word in _PIX_TRANSFER_WORDS):
+                return _TRANSFER_CATEGORY
         
         # Regras para valores específicos
-        if amount > VALUE_BASED_RULES["investment_threshold"]:
-            return "Investimentos"
-        
-        # Regras para padrões de data/hora
-        if re.search(r'\d{2}/\d{2}', description):
-            # Se tem data, provavelmente é uma transação específica
-            pass
+        if amount > ruleset.investment_threshold:
+            return _INVESTMENT_CATEGORY
         
         return None
     
+    def ruleset_digest(self) -> str:
+        """
+        Retorna o SHA-256 das regras em uso: categorias, palavras-chave,
+        prioridades, tipos, limites de score e de valor e a versão da lógica.
+        Dois categorizadores com o mesmo digest categorizam igual.
+        """
+        return self.ruleset.digest
+    
     def get_category_statistics(self, transactions: List[Tuple[str, float]]) -> Dict[str, int]:
         """Retorna estatísticas de categorização."""
         stats = {}
@@ -275,10 +493,11 @@ class SmartKeywordCategorizer:
     def add_custom_rule(self, category: str, keywords: List[str], priority: int = 5, category_type: str = "both") -> None:
         """Adiciona regra customizada de categorização."""
         new_rule = CategoryRule(category, keywords, priority, category_type=category_type)
-        self.categories.append(new_rule)
-        self._build_regex_patterns()
+        self.swap_ruleset(CompiledRuleset.compile(
+            self.categories + [new_rule], self._settings, self.RULESET_VERSION
+        ))
         self.logger.info(f"Regra customizada adicionada: {category} com {len(keywords)} palavras-chave (tipo: {category_type})")
     
     def get_available_categories(self) -> List[str]:
         """Retorna lista de categorias disponíveis."""
-        return list(set(rule.category for rule in self.categories)) 
\ No newline at end of file
+        return list(set(rule.category for rule in self.ruleset.rules))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Script de teste do autômato de Aho-Corasick usado pelo categorizador.
+"""
+
+import random
+from services.aho_corasick import AhoCorasick
+from keyword_config import CATEGORY_KEYWORDS
+
+def _naive_find_all(patterns, text):
+    return {pattern for pattern in patterns if pattern in text}
+
+def test_matches_substring_search():
+    """find_all deve encontrar exatamente os padrões que ocorrem no texto."""
+    cases = [
+        # Padrões sobrepostos e sufixos de outros padrões
+        (["he", "she", "his", "hers"], ["ushers", "she", "h", "hishers", "shis", ""]),
+        # O padrão vazio ocorre em qualquer texto
+        (["", "a", "ab"], ["", "b", "ab", "xab"]),
+        # Palavras-chave com acentos e cedilha
+        (["açaí", "café", "farmácia", "água", "aç"], ["açaí da esquina", "cafe", "café e água", "farmácia açaí"]),
+    ]
+    for patterns, texts in cases:
+        automaton = AhoCorasick(patterns)
+        for text in texts:
+            assert automaton.find_all(text) == _naive_find_all(patterns, text), (patterns, text)
+
+def test_matches_category_keywords():
+    """Com as palavras-chave reais, o resultado deve coincidir com a busca simples."""
+    patterns = sorted({keyword.lower() for keywords in CATEGORY_KEYWORDS.values() for keyword in keywords})
+    automaton = AhoCorasick(patterns)
+    rng = random.Random(42)
+    for _ in range(500):
+        text = " ".join(rng.choice(patterns) for _ in range(rng.randint(0, 4)))
+        assert automaton.find_all(text) == _naive_find_all(patterns, text), text
+
+if __name__ == "__main__":
+    test_matches_substring_search()
+    test_matches_category_keywords()
+    print("✅ Aho-Corasick equivale à busca por substrings")
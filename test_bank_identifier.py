@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Script de teste do reaproveitamento da primeira página entre a
+identificação do banco e o parser.
+"""
+
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from interfaces import PDFTextBackend, PDFTextDocument
+from parsers.text_backends import TEXT_BACKENDS
+from services import extraction_cache
+from services.bank_identifier import BankIdentifier
+from services.extraction_cache import ExtractionCache
+
+PAGES = [
+    "Itaú Unibanco\nExtrato de conta corrente",
+    "01/02/2025 PIX TRANSF MARIA 150,00",
+    "03/02/2025 IFOOD *RESTAURANTE -45,90",
+]
+
+class CountingTextDocument(PDFTextDocument):
+    """Documento em memória que registra os intervalos de páginas extraídos."""
+
+    def __init__(self, requests: List[Tuple[int, Optional[int]]]):
+        self.page_count = len(PAGES)
+        self._requests = requests
+
+    def iter_page_texts(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        self._requests.append((start, end))
+        yield from PAGES[start:end]
+
+    def close(self) -> None:
+        pass
+
+class CountingTextBackend(PDFTextBackend):
+    name = 'contador'
+    version = '1'
+    requests: List[Tuple[int, Optional[int]]] = []
+
+    def open(self, file_path: str) -> PDFTextDocument:
+        return CountingTextDocument(self.requests)
+
+def test_first_page_reused_by_parser():
+    """A primeira página lida na identificação não é extraída de novo pelo parser."""
+    previous_cache = extraction_cache._default_cache
+    TEXT_BACKENDS[CountingTextBackend.name] = CountingTextBackend
+    CountingTextBackend.requests.clear()
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            extraction_cache._default_cache = ExtractionCache(Path(temp_dir) / 'cache.sqlite3')
+            # O nome não indica o banco: a identificação lê a primeira página
+            pdf_path = Path(temp_dir) / 'extrato.pdf'
+            pdf_path.write_bytes(b'%PDF-1.4 extrato de teste')
+
+            identifier = BankIdentifier(CountingTextBackend.name)
+            assert identifier.identify_bank(str(pdf_path)) == 'itau'
+            assert CountingTextBackend.requests == [(0, 1)]
+
+            parser = identifier.get_parser('itau')
+            transactions, _ = parser.parse(str(pdf_path))
+            assert len(transactions) == 2
+            # Só as páginas seguintes à primeira foram extraídas
+            assert CountingTextBackend.requests == [(0, 1), (1, None)]
+
+            # Na segunda leitura o documento inteiro vem do cache
+            cache = extraction_cache._default_cache
+            hits = cache.hits
+            parser.parse(str(pdf_path))
+            assert cache.hits == hits + 1
+            assert CountingTextBackend.requests == [(0, 1), (1, None)]
+    finally:
+        extraction_cache._default_cache = previous_cache
+        TEXT_BACKENDS.pop(CountingTextBackend.name, None)
+
+if __name__ == "__main__":
+    test_first_page_reused_by_parser()
+    print("✅ Primeira página reaproveitada entre identificação e parser")
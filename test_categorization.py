@@ -77,6 +77,37 @@ def test_ofx_processing():
         else:
             print(f"❌ Sem correspondência: '{keyword}'")
 
+# Categorias obtidas antes da busca com Aho-Corasick e do cache; não devem mudar
+KNOWN_CATEGORIES = [
+    ("IFOOD *RESTAURANTE", -45.9, "Alimentação"),
+    ("Uber *Trip", -23.5, "Transporte"),
+    ("Drogaria São Paulo", -89.0, "Saúde"),
+    ("PIX RECEBIDO Maria", 350.0, "Transferências"),
+    ("Pix enviado João", -120.0, "Transporte"),
+    ("PIX QR CODE", -15.0, "Transporte"),
+    ("Reserva por gastos Férias", -5.0, "Reservas"),
+    ("Dinheiro reservado", -5.0, "Reservas"),
+    ("Salário empresa", 5500.0, "Salário"),
+    ("Aluguel apartamento", -1800.0, "Moradia"),
+    ("Netflix.com", -39.9, "Moradia"),
+    ("Posto Shell", -200.0, "Transporte"),
+    ("Transferência recebida", 7000.0, "Transferências"),
+    ("Compra desconhecida", -10.0, "Compras Variadas"),
+    ("", -1.0, "Outros"),
+    ("Rendimento", 2.5, "Investimentos"),
+    ("Padaria do Zé", -12.0, "Alimentação"),
+    ("Conta de energia", -250.0, "Moradia"),
+]
+
+def test_known_categories():
+    """As categorias de descrições conhecidas não mudam, com ou sem cache."""
+    for cache_size in (None, 0):
+        categorizer = SmartKeywordCategorizer(StructuredLogger(), cache_size=cache_size)
+        # Duas passadas: a segunda é atendida pelo cache quando ele está ativo
+        for _ in range(2):
+            for description, amount, expected in KNOWN_CATEGORIES:
+                assert categorizer.categorize_transaction(description, amount) == expected, (description, amount)
+
 if __name__ == "__main__":
     test_categorization()
     test_ofx_processing() 
\ No newline at end of file
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Script de teste da ordenação externa usada na consolidação de OFX.
+"""
+
+import random
+from services.ofx_consolidator import sort_by_date
+
+def test_sort_by_date_matches_stable_sort():
+    """Em blocos gravados em disco, o resultado é o mesmo de sorted (estável)."""
+    rng = random.Random(7)
+    transactions = [
+        {'DTPOSTED': f"202501{rng.randint(1, 28):02d}", 'FITID': str(index)}
+        for index in range(1000)
+    ]
+    expected = sorted(transactions, key=lambda t: t['DTPOSTED'])
+    for run_size in (1, 3, 64, 999, 1000, 5000):
+        assert list(sort_by_date(transactions, run_size)) == expected, run_size
+
+def test_sort_by_date_empty():
+    assert list(sort_by_date([], 10)) == []
+
+if __name__ == "__main__":
+    test_sort_by_date_matches_stable_sort()
+    test_sort_by_date_empty()
+    print("✅ Ordenação externa equivale à ordenação em memória")
@@ -0,0 +1,104 @@
+"""
+Escritor de OFX consolidado (XML), com um extrato por conta.
+Seguindo o princípio de Single Responsibility.
+"""
+
+import os
+from datetime import datetime
+from itertools import islice
+from typing import IO, Dict, List
+from config import OFX_CONFIG, PROCESSING_CONFIG
+from services.ofx_consolidator import ConsolidatedStatement
+from writers.ofx_serializer import STMTTRNTemplate
+
+STMTTRN_TEMPLATE = (
+    '            <STMTTRN>\n'
+    '              <TRNTYPE>{trntype}</TRNTYPE>\n'
+    '              <DTPOSTED>{dtposted}</DTPOSTED>\n'
+    '              <TRNAMT>{trnamt}</TRNAMT>\n'
+    '              <FITID>{fitid}</FITID>\n'
+    '              <MEMO>{memo}</MEMO>\n'
+    '            </STMTTRN>\n'
+)
+
+class ConsolidatedOFXWriter:
+    """
+    Escreve os extratos consolidados em um único OFX XML, com um
+    STMTTRNRS por conta.
+
+    Os campos das transações são copiados como estão nos OFX de entrada.
+    Como o intervalo de datas de cada extrato já é conhecido, as
+    transações são escritas direto no arquivo, em lotes, à medida que o
+    merge as produz.
+    """
+
+    def __init__(self):
+        self._stmttrn = STMTTRNTemplate(
+            STMTTRN_TEMPLATE,
+            fields={'trntype': '', 'dtposted': '', 'trnamt': '', 'fitid': '', 'memo': ''}
+        )
+
+    def write(self, statements: List[ConsolidatedStatement], output_path: str) -> int:
+        """
+        Escreve o OFX consolidado; o arquivo só substitui o anterior ao final.
+
+        Returns:
+            Quantidade de transações escritas
+        """
+        temp_path = f"{output_path}.tmp"
+        count = 0
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                file.write('<?xml version="1.0" encoding="UTF-8"?>\n<OFX>\n')
+                file.write(self._generate_sign_on_message())
+                if statements:
+                    file.write('  <BANKMSGSRSV1>\n')
+                    for trnuid, statement in enumerate(statements, 1):
+                        count += self._write_statement(file, statement, trnuid)
+                    file.write('  </BANKMSGSRSV1>\n')
+                file.write("</OFX>\n")
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return count
+
+    def _write_statement(self, file: IO[str], statement: ConsolidatedStatement, trnuid: int) -> int:
+        file.write(self._generate_statement_start(statement, trnuid))
+        chunk_size = PROCESSING_CONFIG['ofx_write_chunk_transactions']
+        render = self._stmttrn.render
+        iterator = iter(statement.transactions)
+        count = 0
+        while True:
+            batch = list(islice(iterator, chunk_size))
+            if not batch:
+                break
+            file.write(''.join([self._render(render, transaction) for transaction in batch]))
+            count += len(batch)
+        file.write(self._generate_statement_end(statement))
+        return count
+
+    @staticmethod
+    def _render(render, transaction: Dict[str, str]) -> str:
+        get = transaction.get
+        return render(get('TRNTYPE', ''), get('DTPOSTED', ''), get('TRNAMT', ''),
+                      get('FITID', ''), get('MEMO', ''))
+
+    def _generate_sign_on_message(self) -> str:
+        """Gera a mensagem de sign-on."""
+        current_time = datetime.now().strftime("%Y%m%d%H%M%S")
+        return f'''  <SIGNONMSGSRSV1>\n    <SONRS>\n      <STATUS>\n        <CODE>0</CODE>\n        <SEVERITY>INFO</SEVERITY>\n      </STATUS>\n      <DTSERVER>{current_time}[0:GMT]</DTSERVER>\n      <LANGUAGE>{OFX_CONFIG['language']}</LANGUAGE>\n      <FI>\n        <ORG>CONSOLIDATED OFX</ORG>\n        <FID>CONS</FID>\n      </FI>\n    </SONRS>\n  </SIGNONMSGSRSV1>\n'''
+
+    def _generate_statement_start(self, statement: ConsolidatedStatement, trnuid: int) -> str:
+        """Gera o extrato de uma conta até a abertura da lista de transações."""
+        account = statement.account
+        currency = statement.currency or OFX_CONFIG['currency']
+        account_type = account.account_type or OFX_CONFIG['account_type']
+        return f'''    <STMTTRNRS>\n      <TRNUID>{trnuid}</TRNUID>\n      <STATUS>\n        <CODE>0</CODE>\n        <SEVERITY>INFO</SEVERITY>\n      </STATUS>\n      <STMTRS>\n        <CURDEF>{currency}</CURDEF>\n        <BANKACCTFROM>\n          <BANKID>{account.bank_id}</BANKID>\n          <BRANCHID>{account.branch_id}</BRANCHID>\n          <ACCTID>{account.account_id}</ACCTID>\n          <ACCTTYPE>{account_type}</ACCTTYPE>\n        </BANKACCTFROM>\n        <BANKTRANLIST>\n          <DTSTART>{statement.dt_start}000000[-3:BRT]</DTSTART>\n          <DTEND>{statement.dt_end}000000[-3:BRT]</DTEND>\n'''
+
+    def _generate_statement_end(self, statement: ConsolidatedStatement) -> str:
+        """Fecha a lista de transações e o extrato, com o saldo mais recente."""
+        ledger = ''
+        if statement.ledger_balance:
+            ledger = f'''        <LEDGERBAL>\n          <BALAMT>{statement.ledger_balance}</BALAMT>\n          <DTASOF>{statement.ledger_date}</DTASOF>\n        </LEDGERBAL>\n'''
+        return f'''        </BANKTRANLIST>\n{ledger}      </STMTRS>\n    </STMTTRNRS>\n'''
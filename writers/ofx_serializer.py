@@ -0,0 +1,124 @@
+"""
+Núcleo de serialização OFX compartilhado pelos escritores.
+Seguindo o princípio de Single Responsibility.
+"""
+
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import IO, Callable, Dict, Iterable, List, Optional
+from interfaces import AccountData, Transaction
+from config import PROCESSING_CONFIG, TEMP_DIR
+
+@dataclass
+class SpooledTransactions:
+    """STMTTRN já serializados em um arquivo temporário, com o resumo da passada."""
+    spool: IO[str]
+    count: int
+    min_date: Optional[str]
+    max_date: Optional[str]
+
+    def copy_to(self, file: IO[str]) -> None:
+        """Copia os STMTTRN para o arquivo final em blocos grandes."""
+        self.spool.seek(0)
+        shutil.copyfileobj(self.spool, file, PROCESSING_CONFIG['ofx_copy_buffer_bytes'])
+
+class STMTTRNTemplate:
+    """
+    Modelo de STMTTRN compilado uma única vez por execução.
+
+    As constantes (ex.: fuso horário do OFX_CONFIG) são substituídas na
+    compilação e os campos viram argumentos posicionais de str.format,
+    então renderizar uma transação é uma única chamada de format.
+
+    Args:
+        source: Modelo com campos {nome} (campos e constantes)
+        fields: Campos por transação, na ordem dos argumentos de render,
+            com o formato de cada um (ex.: {'amount': ':.2f'})
+        constants: Valores fixos substituídos na compilação
+    """
+
+    def __init__(self, source: str, fields: Dict[str, str], constants: Optional[Dict[str, str]] = None):
+        placeholders = {
+            name: '{' + str(position) + spec + '}'
+            for position, (name, spec) in enumerate(fields.items())
+        }
+        self.compiled = source.format(**(constants or {}), **placeholders)
+        self.render: Callable[..., str] = self.compiled.format
+
+class FITIDDateTable(dict):
+    """
+    Datas YYYYMMDD já validadas para o FITID, calculadas uma vez por data.
+    Uma data inválida levanta ValueError, como a conversão por transação.
+    """
+
+    def __missing__(self, date: str) -> str:
+        value = datetime.strptime(date, "%Y%m%d").strftime('%Y%m%d')
+        self[date] = value
+        return value
+
+    def fitid(self, index: int, date: str) -> str:
+        """FITID gerado para a transação de posição index (a partir de 1) no OFX."""
+        return f"trans_{index:03d}_{self[date]}"
+
+class ChunkedOFXSerializer(ABC):
+    """
+    Serializa transações em OFX em uma única passada e em tempo linear.
+
+    As transações são lidas em lotes de ofx_write_chunk_transactions; cada
+    lote é renderizado com um único str.join e gravado em um arquivo
+    temporário (em memória até ofx_spool_max_bytes), enquanto a
+    quantidade e o intervalo de datas são acumulados. O documento final
+    é então escrito com o cabeçalho completo, seguido do conteúdo
+    temporário. Se a iteração falhar, o arquivo de saída não é criado.
+    """
+
+    def serialize(self, transactions: Iterable[Transaction], account_data: AccountData, output_path: str) -> int:
+        """
+        Escreve o documento OFX com as transações de qualquer iterável.
+
+        Returns:
+            Quantidade de transações escritas
+        """
+        TEMP_DIR.mkdir(parents=True, exist_ok=True)
+        with tempfile.SpooledTemporaryFile(
+            max_size=PROCESSING_CONFIG['ofx_spool_max_bytes'],
+            mode='w+', encoding='utf-8', dir=TEMP_DIR
+        ) as spool:
+            spooled = self._spool_transactions(spool, transactions)
+            with open(output_path, 'w', encoding='utf-8') as file:
+                self._write_document(file, spooled, account_data)
+        return spooled.count
+
+    def _spool_transactions(self, spool: IO[str], transactions: Iterable[Transaction]) -> SpooledTransactions:
+        chunk_size = PROCESSING_CONFIG['ofx_write_chunk_transactions']
+        render_batch = self._render_batch
+        iterator = iter(transactions)
+        min_date = max_date = None
+        count = 0
+        while True:
+            batch = list(islice(iterator, chunk_size))
+            if not batch:
+                break
+            dates = [transaction.date for transaction in batch]
+            batch_min, batch_max = min(dates), max(dates)
+            if min_date is None or batch_min < min_date:
+                min_date = batch_min
+            if max_date is None or batch_max > max_date:
+                max_date = batch_max
+            spool.write(render_batch(batch, count + 1))
+            count += len(batch)
+        return SpooledTransactions(spool, count, min_date, max_date)
+
+    @abstractmethod
+    def _render_batch(self, transactions: List[Transaction], first_index: int) -> str:
+        """Retorna os blocos STMTTRN de um lote; first_index é o índice da primeira transação."""
+        pass
+
+    @abstractmethod
+    def _write_document(self, file: IO[str], spooled: SpooledTransactions, account_data: AccountData) -> None:
+        """Escreve o documento final, copiando os STMTTRN de spooled."""
+        pass
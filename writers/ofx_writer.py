@@ -3,17 +3,48 @@ Escritor OFX (XML).
 """
 
 import datetime
+from typing import Iterable
 from interfaces import OFXWriter, Transaction, AccountData
 from config import OFX_CONFIG
+from writers.ofx_serializer import ChunkedOFXSerializer, FITIDDateTable, STMTTRNTemplate
 
-class OFXWriterRefactored(OFXWriter):
-    def write(self, transactions, account_data, output_path):
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-            f.write('<OFX>\n')
-            self._write_sign_on(f)
-            self._write_bank_message(f, transactions, account_data)
-            f.write('</OFX>\n')
+STMTTRN_TEMPLATE = (
+    '          <STMTTRN>\n'
+    '            <TRNTYPE>{trntype}</TRNTYPE>\n'
+    '            <DTPOSTED>{date}000000{timezone}</DTPOSTED>\n'
+    '            <TRNAMT>{amount}</TRNAMT>\n'
+    '            <FITID>{fitid}</FITID>\n'
+    '            <MEMO>{description}</MEMO>\n'
+    '          </STMTTRN>\n'
+)
+
+class OFXWriterRefactored(OFXWriter, ChunkedOFXSerializer):
+    def __init__(self):
+        self._stmttrn = STMTTRNTemplate(
+            STMTTRN_TEMPLATE,
+            fields={'trntype': '', 'date': '', 'amount': ':.2f', 'fitid': '',
+                    'description': ''},
+            constants={'timezone': OFX_CONFIG['timezone']}
+        )
+        self._fitid_dates = FITIDDateTable()
+
+    def write(self, transactions: Iterable[Transaction], account_data: AccountData, output_path: str) -> int:
+        """
+        Escreve as transações em formato OFX, em uma única passada.
+
+        Aceita qualquer iterável (inclusive geradores); veja ChunkedOFXSerializer.
+
+        Returns:
+            Quantidade de transações escritas
+        """
+        return self.serialize(transactions, account_data, output_path)
+
+    def _write_document(self, file, spooled, account_data):
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        file.write('<OFX>\n')
+        self._write_sign_on(file)
+        self._write_bank_message(file, spooled, account_data)
+        file.write('</OFX>\n')
 
     def _write_sign_on(self, file):
         current_time = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
@@ -32,9 +63,9 @@ class OFXWriterRefactored(OFXWriter):
         file.write('    </SONRS>\n')
         file.write('  </SIGNONMSGSRSV1>\n')
 
-    def _write_bank_message(self, file, transactions, account_data):
+    def _write_bank_message(self, file, spooled, account_data):
         current_time = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-        dt_start, dt_end = self._calculate_date_range(transactions)
+        dt_start, dt_end = self._format_date_range(spooled.min_date, spooled.max_date)
         file.write('  <BANKMSGSRSV1>\n')
         file.write('    <STMTTRNRS>\n')
         file.write('      <TRNUID>1</TRNUID>\n')
@@ -45,7 +76,7 @@ class OFXWriterRefactored(OFXWriter):
         file.write('      <STMTRS>\n')
         file.write(f'        <CURDEF>{OFX_CONFIG["currency"]}</CURDEF>\n')
         self._write_bank_account_from(file, account_data)
-        self._write_bank_transaction_list(file, transactions, dt_start, dt_end)
+        self._write_bank_transaction_list(file, spooled, dt_start, dt_end)
         self._write_ledger_balance(file, current_time)
         self._write_balance_list(file, current_time)
         file.write('      </STMTRS>\n')
@@ -60,24 +91,21 @@ class OFXWriterRefactored(OFXWriter):
         file.write(f'          <ACCTTYPE>{OFX_CONFIG["account_type"]}</ACCTTYPE>\n')
         file.write('        </BANKACCTFROM>\n')
 
-    def _write_bank_transaction_list(self, file, transactions, dt_start, dt_end):
+    def _write_bank_transaction_list(self, file, spooled, dt_start, dt_end):
         file.write('        <BANKTRANLIST>\n')
         file.write(f'          <DTSTART>{dt_start}</DTSTART>\n')
         file.write(f'          <DTEND>{dt_end}</DTEND>\n')
-        for i, transaction in enumerate(transactions, 1):
-            self._write_transaction(file, transaction, i)
+        spooled.copy_to(file)
         file.write('        </BANKTRANLIST>\n')
 
-    def _write_transaction(self, file, transaction, index):
-        file.write('          <STMTTRN>\n')
-        file.write(f'            <TRNTYPE>{transaction.trntype}</TRNTYPE>\n')
-        file.write(f'            <DTPOSTED>{transaction.date}000000{OFX_CONFIG["timezone"]}</DTPOSTED>\n')
-        file.write(f'            <TRNAMT>{transaction.amount:.2f}</TRNAMT>\n')
-        date_obj = datetime.datetime.strptime(transaction.date, "%Y%m%d")
-        date_str = date_obj.strftime('%Y%m%d')
-        file.write(f'            <FITID>trans_{index:03d}_{date_str}</FITID>\n')
-        file.write(f'            <MEMO>{transaction.description}</MEMO>\n')
-        file.write('          </STMTTRN>\n')
+    def _render_batch(self, transactions, first_index):
+        render = self._stmttrn.render
+        fitid_dates = self._fitid_dates
+        return ''.join([
+            render(t.trntype, t.date, t.amount, t.fitid or fitid_dates.fitid(index, t.date),
+                   t.description)
+            for index, t in enumerate(transactions, first_index)
+        ])
 
     def _write_ledger_balance(self, file, current_time):
         file.write('        <LEDGERBAL>\n')
@@ -94,10 +122,9 @@ class OFXWriterRefactored(OFXWriter):
         file.write('          </BAL>\n')
         file.write('        </BALLIST>\n')
 
-    def _calculate_date_range(self, transactions):
-        if not transactions:
+    def _format_date_range(self, min_date, max_date):
+        if min_date is None:
             return "20250101000000[-3:BRT]", "20250101000000[-3:BRT]"
-        dates = [t.date for t in transactions]
-        dt_start = min(dates) + "000000[-3:BRT]"
-        dt_end = max(dates) + "000000[-3:BRT]"
+        dt_start = min_date + "000000[-3:BRT]"
+        dt_end = max_date + "000000[-3:BRT]"
         return dt_start, dt_end 
\ No newline at end of file